@@ -0,0 +1,230 @@
+import threading
+import time
+
+import numpy as np
+
+from domain.events import LotResized, VehicleLeft, VehicleParked
+
+
+class _Codes:
+    # categorical column: strings are stored once, rows hold small ints
+    def __init__(self):
+        self.index = {}
+        self.names = []
+
+    def code(self, name):
+        code = self.index.get(name)
+        if code is None:
+            code = self.index[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+def _percentiles(values, q):
+    # np.percentile's linear interpolation on already sorted values; sorting
+    # and indexing is several times faster than np.percentile here
+    position = (len(values) - 1) * q / 100
+    low = np.floor(position).astype(np.int64)
+    high = np.minimum(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+class OccupancyAnalytics:
+    """Columnar record of every stay in a lot, for vectorized statistics.
+
+    One row per stay: arrival and departure time (NaN while still parked),
+    level, EV pool flag and categorical codes for type, color and make. Rows
+    are appended from the lot's events; queries are NumPy reductions over
+    the columns, so they cost milliseconds even over millions of stays.
+
+    Attach it where the lot is not changing concurrently (e.g. on the domain
+    lane), as vehicles already parked are read before subscribing.
+    """
+
+    COLUMNS = {
+        "arrived": np.float64,
+        "left": np.float64,
+        "level": np.int32,
+        "ev": np.bool_,
+        "type": np.int32,
+        "color": np.int32,
+        "make": np.int32,
+    }
+    CATEGORIES = ("type", "color", "make")
+
+    def __init__(self, lot=None, clock=time.time, reserve=4096):
+        self.lot = lot
+        self.clock = clock
+        self.size = 0
+        self.columns = {name: np.empty(reserve, dtype) for name, dtype in self.COLUMNS.items()}
+        self.codes = {name: _Codes() for name in self.CATEGORIES}
+        self.active = {}        # (level, slot) -> row of the stay in progress
+        self.capacity = {}      # level -> (capacity, ev_capacity)
+        self._lock = threading.Lock()
+        self._subscription = None
+        if lot is not None:
+            self._refresh_capacity()
+            # vehicles already parked are counted from now; their real
+            # arrival time is unknown
+            now = self.clock()
+            for slot, level, vehicle in lot.iter_status():
+                self._arrive(now, level, slot, vehicle)
+            self._subscription = lot.events.subscribe(
+                self._on_event, VehicleParked, VehicleLeft, LotResized
+            )
+
+    def close(self):
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
+
+    # Recording
+
+    def _grow(self):
+        for name, column in self.columns.items():
+            grown = np.empty(len(column) * 2, column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def record_stay(self, arrived, left, level, ev, vehicle_type, color, make):
+        # appends a stay directly, e.g. history loaded from elsewhere;
+        # left=None for a vehicle that is still parked. Returns the row.
+        with self._lock:
+            return self._append(arrived, left, level, ev, vehicle_type, color, make)
+
+    def _append(self, arrived, left, level, ev, vehicle_type, color, make):
+        if self.size == len(self.columns["arrived"]):
+            self._grow()
+        row = self.size
+        c = self.columns
+        c["arrived"][row] = arrived
+        c["left"][row] = np.nan if left is None else left
+        c["level"][row] = level
+        c["ev"][row] = ev
+        c["type"][row] = self.codes["type"].code(vehicle_type)
+        c["color"][row] = self.codes["color"].code(color.lower())
+        c["make"][row] = self.codes["make"].code(make)
+        self.size += 1
+        return row
+
+    def _arrive(self, now, level, slot, vehicle):
+        row = self._append(now, None, level, isinstance(slot, str),
+                           vehicle.getType(), vehicle.color, vehicle.make)
+        self.active[(level, slot)] = row
+
+    def _refresh_capacity(self):
+        self.capacity = {level: (capacity, ev_capacity)
+                         for capacity, ev_capacity, level in self.lot.layout()}
+
+    def _on_event(self, event):
+        now = self.clock()
+        with self._lock:
+            if isinstance(event, VehicleParked):
+                self._arrive(now, event.level, event.slot, event.vehicle)
+            elif isinstance(event, VehicleLeft):
+                row = self.active.pop((event.level, event.slot), None)
+                if row is not None:
+                    self.columns["left"][row] = now
+            else:
+                # the level was reconfigured: whatever was on it is gone
+                for key in [k for k in self.active if event.level is None or k[0] == event.level]:
+                    self.columns["left"][self.active.pop(key)] = now
+                self._refresh_capacity()
+
+    # Queries
+
+    def _view(self):
+        with self._lock:
+            return {name: column[:self.size] for name, column in self.columns.items()}
+
+    def _groups(self, by, view):
+        # (keys array, label for each code) for a by= argument
+        if by is None:
+            return np.zeros(len(view["arrived"]), np.int32), ["all"]
+        if by == "level":
+            return view["level"], None
+        if by == "ev":
+            return view["ev"].astype(np.int32), ["regular", "ev"]
+        if by in self.CATEGORIES:
+            return view[by], list(self.codes[by].names)
+        raise ValueError(f"cannot group by {by!r}")
+
+    def occupancy(self, by="level"):
+        # vehicles parked right now per group
+        view = self._view()
+        parked = np.isnan(view["left"])
+        keys, labels = self._groups(by, view)
+        counts = np.bincount(keys[parked], minlength=len(labels) if labels else 0)
+        if labels is None:
+            return {int(k): int(n) for k, n in enumerate(counts) if n}
+        return {labels[k]: int(n) for k, n in enumerate(counts) if n}
+
+    def occupancy_rate(self):
+        # parked / capacity per level, regular and EV pools together
+        counts = self.occupancy("level")
+        rates = {}
+        for level, (capacity, ev_capacity) in sorted(self.capacity.items()):
+            total = capacity + ev_capacity
+            rates[level] = counts.get(level, 0) / total if total else 0.0
+        return rates
+
+    def dwell_percentiles(self, percentiles=(50, 90, 99), since=None, until=None, by=None):
+        # dwell time in seconds of stays that ended in [since, until)
+        view = self._view()
+        left = view["left"]
+        done = ~np.isnan(left)
+        if since is not None:
+            done &= left >= since
+        if until is not None:
+            done &= left < until
+        dwell = (left - view["arrived"])[done]
+        keys, labels = self._groups(by, view)
+        keys = keys[done]
+        q = np.asarray(percentiles, np.float64)
+        result = {}
+        for key in np.flatnonzero(np.bincount(keys)):
+            values = np.sort(dwell[keys == key])
+            label = int(key) if labels is None else labels[key]
+            result[label] = dict(zip(percentiles, _percentiles(values, q).tolist()))
+        return result
+
+    def hourly_turnover(self, since, until, bucket=3600):
+        # (bucket start times, arrivals per bucket, departures per bucket)
+        view = self._view()
+        buckets = int(np.ceil((until - since) / bucket))
+        starts = since + bucket * np.arange(buckets)
+
+        def histogram(times):
+            times = times[(times >= since) & (times < until)]
+            index = ((times - since) * (1 / bucket)).astype(np.int64)
+            return np.bincount(np.minimum(index, buckets - 1), minlength=buckets)
+
+        return starts, histogram(view["arrived"]), histogram(view["left"])
+
+    def turnover_per_hour(self, since, until):
+        # departures per hour, averaged over the window
+        _, _, departures = self.hourly_turnover(since, until)
+        return departures.sum() / ((until - since) / 3600)
+
+    def utilisation(self, since, until, ev=None):
+        # time-weighted share of slots occupied over [since, until);
+        # ev=True/False restricts to one pool
+        view = self._view()
+        now = self.clock()
+        left = np.where(np.isnan(view["left"]), max(now, until), view["left"])
+        mask = np.ones(len(left), bool) if ev is None else view["ev"] == ev
+        overlap = np.clip(np.minimum(left, until) - np.maximum(view["arrived"], since), 0, None)
+        slots = sum(
+            (capacity if ev is not True else 0) + (ev_capacity if ev is not False else 0)
+            for capacity, ev_capacity in self.capacity.values()
+        )
+        if not slots:
+            return 0.0
+        return float(overlap[mask].sum() / (slots * (until - since)))
+
+    def ev_utilisation(self, since=None, until=None):
+        # EV pool utilisation: right now, or time-weighted over a window
+        if since is None:
+            ev_slots = sum(ev_capacity for _, ev_capacity in self.capacity.values())
+            return self.occupancy("ev").get("ev", 0) / ev_slots if ev_slots else 0.0
+        return self.utilisation(since, until if until is not None else self.clock(), ev=True)
@@ -1,4 +1,8 @@
 class ElectricMixin:
+    # the charge slot is declared by the concrete vehicle class, since two
+    # bases with non-empty __slots__ cannot be combined
+    __slots__ = ()
+
     def __init__(self):
         self.charge = 0
 
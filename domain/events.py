@@ -0,0 +1,215 @@
+import asyncio
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class VehicleParked:
+    level: int
+    slot: object  # int for regular slots, "EV-n" for EV slots
+    vehicle: object
+
+
+@dataclass(frozen=True, slots=True)
+class VehicleLeft:
+    level: int
+    slot: object
+    vehicle: object
+
+
+@dataclass(frozen=True, slots=True)
+class LotResized:
+    # a level was (re)configured or reloaded and its previous contents are
+    # gone; level None means every level. Vehicles placed afterwards (e.g. by
+    # a snapshot restore) follow as VehicleParked events.
+    level: int | None
+    capacity: int
+    ev_capacity: int
+
+
+@dataclass(frozen=True, slots=True)
+class ChargeUpdated:
+    regnum: str
+    charge: float
+
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+
+class Subscription:
+    """A subscriber's bounded queue of events, filled by EventBus.publish.
+
+    When the queue is full, overflow decides what happens: "block" makes the
+    publisher wait for the consumer (backpressure), "drop_oldest" and
+    "drop_newest" discard an event and count it in ``dropped``.
+    """
+
+    def __init__(self, bus, event_types, maxsize, overflow):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self.bus = bus
+        self.event_types = event_types
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self.closed = False
+        self._events = deque()
+        self._cond = threading.Condition()
+
+    def _deliver(self, event):
+        with self._cond:
+            while len(self._events) >= self.maxsize and not self.closed:
+                if self.overflow == "drop_newest":
+                    self.dropped += 1
+                    return
+                if self.overflow == "drop_oldest":
+                    self._events.popleft()
+                    self.dropped += 1
+                    break
+                self._cond.wait()
+            if self.closed:
+                return
+            self._events.append(event)
+            self._cond.notify_all()
+        self._wake()
+
+    def _wake(self):
+        pass
+
+    def get(self, timeout=None):
+        # next event, or None once closed (or on timeout)
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._events or self.closed, timeout):
+                return None
+            if not self._events:
+                return None
+            event = self._events.popleft()
+            self._cond.notify_all()
+            return event
+
+    def drain(self):
+        # every queued event, without waiting
+        with self._cond:
+            events = list(self._events)
+            self._events.clear()
+            self._cond.notify_all()
+            return events
+
+    def close(self):
+        self.bus._remove(self)
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+        self._wake()
+
+
+class AsyncSubscription(Subscription):
+    """Subscription consumed from an asyncio loop: ``async for event in sub``.
+
+    Publishers may run on any thread. A "block" subscription whose publisher
+    runs on the subscriber's own loop would deadlock; use a drop policy there.
+    """
+
+    def __init__(self, bus, event_types, maxsize, overflow, loop):
+        super().__init__(bus, event_types, maxsize, overflow)
+        self._loop = loop
+        self._ready = asyncio.Event()
+
+    def _wake(self):
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    async def next(self):
+        while True:
+            self._ready.clear()
+            with self._cond:
+                if self._events:
+                    event = self._events.popleft()
+                    self._cond.notify_all()
+                    return event
+                if self.closed:
+                    raise StopAsyncIteration
+            await self._ready.wait()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.next()
+
+
+class _Handler:
+    # synchronous subscriber: called on the publishing thread
+    __slots__ = ("bus", "handler", "event_types")
+
+    def __init__(self, bus, handler, event_types):
+        self.bus = bus
+        self.handler = handler
+        self.event_types = event_types
+
+    def _deliver(self, event):
+        self.handler(event)
+
+    def close(self):
+        self.bus._remove(self)
+
+
+class EventBus:
+    """Typed publish/subscribe for lot changes.
+
+    Subscribers pick event classes to receive (all events if none are
+    given). A bus is falsy while nobody is subscribed, so publishers can skip
+    building events: ``if bus: bus.publish(...)``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = ()
+
+    def __bool__(self):
+        return bool(self._subscribers)
+
+    def _add(self, subscriber):
+        with self._lock:
+            self._subscribers = self._subscribers + (subscriber,)
+        return subscriber
+
+    def _remove(self, subscriber):
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscriber)
+
+    def subscribe(self, handler, *event_types):
+        # handler(event) runs synchronously in publish(); returns a handle
+        # whose close() unsubscribes
+        return self._add(_Handler(self, handler, event_types))
+
+    def subscribe_queue(self, *event_types, maxsize=1024, overflow="block"):
+        # for consumers that poll, e.g. the Tk main loop
+        return self._add(Subscription(self, event_types, maxsize, overflow))
+
+    def subscribe_threaded(self, handler, *event_types, maxsize=1024, overflow="block",
+                           name="event-subscriber"):
+        # handler(event) runs on a dedicated thread, in publish order
+        subscription = self.subscribe_queue(*event_types, maxsize=maxsize, overflow=overflow)
+
+        def consume():
+            while True:
+                event = subscription.get()
+                if event is None:
+                    return
+                handler(event)
+
+        threading.Thread(target=consume, name=name, daemon=True).start()
+        return subscription
+
+    def subscribe_async(self, *event_types, maxsize=1024, overflow="block", loop=None):
+        loop = loop or asyncio.get_running_loop()
+        return self._add(AsyncSubscription(self, event_types, maxsize, overflow, loop))
+
+    def publish(self, event):
+        for subscriber in self._subscribers:
+            if not subscriber.event_types or isinstance(event, subscriber.event_types):
+                subscriber._deliver(event)
@@ -0,0 +1,403 @@
+from bisect import bisect_left, insort
+
+from domain.events import EventBus, LotResized
+from domain.parking_lot import ParkingLot, _check_window, paginate
+from domain.reservations import ReservationBook
+
+
+class LevelIndex:
+    """Max segment tree of free-slot counts, indexed by level position."""
+
+    def __init__(self, counts):
+        size = 1
+        while size < len(counts):
+            size *= 2
+        self.size = size
+        self.tree = [0] * (2 * size)
+        self.tree[size:size + len(counts)] = counts
+        for i in range(size - 1, 0, -1):
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+
+    def update(self, pos, count):
+        i = pos + self.size
+        self.tree[i] = count
+        i //= 2
+        while i:
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+            i //= 2
+
+    def first_from(self, pos):
+        # lowest position >= pos that has free space
+        return self._first(1, 0, self.size, pos)
+
+    def last_until(self, pos):
+        # highest position <= pos that has free space
+        return self._last(1, 0, self.size, pos)
+
+    def _first(self, node, lo, hi, pos):
+        if hi <= pos or self.tree[node] == 0:
+            return None
+        if hi - lo == 1:
+            return lo
+        mid = (lo + hi) // 2
+        found = self._first(2 * node, lo, mid, pos)
+        if found is None:
+            found = self._first(2 * node + 1, mid, hi, pos)
+        return found
+
+    def _last(self, node, lo, hi, pos):
+        if lo > pos or self.tree[node] == 0:
+            return None
+        if hi - lo == 1:
+            return lo
+        mid = (lo + hi) // 2
+        found = self._last(2 * node + 1, mid, hi, pos)
+        if found is None:
+            found = self._last(2 * node, lo, mid, pos)
+        return found
+
+
+class Facility:
+    """A multi-storey site: one ParkingLot (regular + EV pools) per level."""
+
+    def __init__(self, capacity, ev_capacity, levels):
+        self.levels = {}
+        self.level_numbers = []
+        self.reg_level = {}
+        # shared with every level's ParkingLot, so their events reach the
+        # facility's subscribers directly
+        self.events = EventBus()
+        # one book for every level, shared the same way
+        self.reservations = ReservationBook()
+        for level in range(1, levels + 1):
+            self.levels[level] = self._new_level(capacity, ev_capacity, level)
+            self.level_numbers.append(level)
+        self._rebuild_index()
+
+    def _new_level(self, capacity, ev_capacity, level):
+        lot = ParkingLot(capacity, ev_capacity, level)
+        lot.events = self.events
+        lot.reservations = self.reservations
+        return lot
+
+    def _rebuild_index(self):
+        lots = [self.levels[level] for level in self.level_numbers]
+        self.free_index = LevelIndex([len(lot.free_slots) for lot in lots])
+        self.free_ev_index = LevelIndex([len(lot.free_ev_slots) for lot in lots])
+
+    def _refresh(self, level, ev, pending=0):
+        # pending: slots promised to a batch that has not been applied yet
+        lot = self.levels[level]
+        pos = bisect_left(self.level_numbers, level)
+        if ev:
+            self.free_ev_index.update(pos, len(lot.free_ev_slots) - pending)
+        else:
+            self.free_index.update(pos, len(lot.free_slots) - pending)
+
+    @property
+    def capacity(self):
+        return sum(lot.capacity for lot in self.levels.values())
+
+    @property
+    def ev_capacity(self):
+        return sum(lot.ev_capacity for lot in self.levels.values())
+
+    def create_lot(self, capacity, ev_capacity, level):
+        # (re)configures a single level; other levels keep their vehicles
+        old = self.levels.get(level)
+        if old is not None:
+            for _, _, vehicle in old.status():
+                del self.reg_level[vehicle.regnum]
+        self.reservations.drop_level(level)
+        self.levels[level] = self._new_level(capacity, ev_capacity, level)
+        if old is None:
+            insort(self.level_numbers, level)
+            self._rebuild_index()
+        else:
+            self._refresh(level, False)
+            self._refresh(level, True)
+        if self.events:
+            self.events.publish(LotResized(level, capacity, ev_capacity))
+
+    def drop_level(self, level):
+        # removes a level with its vehicles and reservations; returns its
+        # ParkingLot, or None if there is no such level
+        lot = self.levels.pop(level, None)
+        if lot is None:
+            return None
+        for _, _, vehicle in lot.status():
+            del self.reg_level[vehicle.regnum]
+        self.reservations.drop_level(level)
+        self.level_numbers.remove(level)
+        self._rebuild_index()
+        if self.events:
+            self.events.publish(LotResized(level, 0, 0))
+        return lot
+
+    def find_level(self, ev=False, level=None):
+        index = self.free_ev_index if ev else self.free_index
+        if level is None:
+            pos = index.first_from(0)
+            return None if pos is None else self.level_numbers[pos]
+
+        pos = bisect_left(self.level_numbers, level)
+        above = index.first_from(pos)
+        below = index.last_until(pos - 1)
+        if above is None and below is None:
+            return None
+        if below is None:
+            return self.level_numbers[above]
+        if above is None:
+            return self.level_numbers[below]
+        up = self.level_numbers[above]
+        down = self.level_numbers[below]
+        # ties go to the lower level
+        return up if up - level < level - down else down
+
+    def park(self, vehicle, ev=False, level=None):
+        # level is a preference: the nearest level with space is used
+        if vehicle.regnum in self.reg_level:
+            raise ValueError(f"Vehicle {vehicle.regnum} is already parked")
+
+        target = self.find_level(ev, level)
+        book = self.reservations
+        if book:
+            # a holder goes to the level of their reservation
+            mine = book.holding(vehicle.regnum, book.clock())
+            if mine is not None and mine.ev == ev and mine.level in self.levels:
+                target = mine.level
+        if target is None:
+            return None
+
+        slot = self.levels[target].park(vehicle, ev=ev)
+        if slot is None:
+            # every free slot on target is held for someone else
+            target, slot = self._park_unheld(vehicle, ev, target if level is None else level, target)
+            if slot is None:
+                return None
+        self.reg_level[vehicle.regnum] = target
+        self._refresh(target, ev)
+        return slot
+
+    def _park_unheld(self, vehicle, ev, near, tried):
+        # tries every other level with free slots, nearest to `near` first
+        for level in sorted(self.level_numbers, key=lambda n: (abs(n - near), n)):
+            lot = self.levels[level]
+            if level == tried or lot.get_empty_slot(ev) is None:
+                continue
+            slot = lot.park(vehicle, ev=ev)
+            if slot is not None:
+                return level, slot
+        return None, None
+
+    def park_at(self, vehicle, slot_id, ev=False, level=None):
+        # parks in exactly that slot of that level (the first if None)
+        if vehicle.regnum in self.reg_level:
+            raise ValueError(f"Vehicle {vehicle.regnum} is already parked")
+        if level is None:
+            level = self.level_numbers[0] if self.level_numbers else None
+        lot = self.levels.get(level)
+        if lot is None or lot.park_at(vehicle, slot_id, ev) is None:
+            return None
+        self.reg_level[vehicle.regnum] = level
+        self._refresh(level, ev)
+        return slot_id
+
+    def leave(self, slot_id, ev=False, level=None):
+        if level is None:
+            if not self.level_numbers:
+                return False
+            level = self.level_numbers[0]
+        lot = self.levels.get(level)
+        if lot is None:
+            return False
+
+        slots = lot.ev_slots if ev else lot.slots
+        index = slot_id - 1
+        vehicle = slots[index] if 0 <= index < len(slots) else None
+        if not lot.leave(slot_id, ev=ev):
+            return False
+        del self.reg_level[vehicle.regnum]
+        self._refresh(level, ev)
+        return True
+
+    def park_many(self, entries):
+        # levels are chosen per entry, then each level's lot is filled in one batch
+        if self.reservations:
+            # holds make placement depend on the vehicle; no batching
+            return [self._park_one(vehicle, ev, level) for vehicle, ev, level in entries]
+        results = []
+        buckets = {}
+        pending = {}
+        batch_regs = set()
+        for i, (vehicle, ev, level) in enumerate(entries):
+            regnum = vehicle.regnum
+            if regnum in self.reg_level or regnum in batch_regs:
+                results.append((None, None, f"Vehicle {regnum} is already parked"))
+                continue
+            target = self.find_level(ev, level)
+            if target is None:
+                results.append((None, None, "Parking is full"))
+                continue
+            batch_regs.add(regnum)
+            key = (target, ev)
+            pending[key] = pending.get(key, 0) + 1
+            self._refresh(target, ev, pending[key])
+            buckets.setdefault(target, []).append((i, (vehicle, ev, None)))
+            results.append(None)
+
+        for target, items in buckets.items():
+            lot_results = self.levels[target].park_many(entry for _, entry in items)
+            for (i, (vehicle, _, _)), result in zip(items, lot_results):
+                results[i] = result
+                self.reg_level[vehicle.regnum] = target
+        for target, ev in pending:
+            self._refresh(target, ev)
+        return results
+
+    def _park_one(self, vehicle, ev, level):
+        try:
+            slot = self.park(vehicle, ev, level)
+        except ValueError as e:
+            return (None, None, str(e))
+        if slot is None:
+            return (None, None, "Parking is full")
+        return (slot, self.reg_level[vehicle.regnum], None)
+
+    def leave_many(self, entries):
+        # entries are (slot_id, ev, level) like leave(); returns a bool per entry
+        results = []
+        buckets = {}
+        for i, (slot_id, ev, level) in enumerate(entries):
+            if level is None and self.level_numbers:
+                level = self.level_numbers[0]
+            lot = self.levels.get(level)
+            if lot is None:
+                results.append(False)
+                continue
+            slots = lot.ev_slots if ev else lot.slots
+            index = slot_id - 1
+            vehicle = slots[index] if 0 <= index < len(slots) else None
+            buckets.setdefault(level, []).append((i, vehicle, (slot_id, ev, None)))
+            results.append(False)
+
+        for level, items in buckets.items():
+            lot_results = self.levels[level].leave_many(entry for _, _, entry in items)
+            touched = set()
+            for (i, vehicle, (_, ev, _)), ok in zip(items, lot_results):
+                if ok:
+                    results[i] = True
+                    del self.reg_level[vehicle.regnum]
+                    touched.add(ev)
+            for ev in touched:
+                self._refresh(level, ev)
+        return results
+
+    def layout(self):
+        return [
+            (self.levels[level].capacity, self.levels[level].ev_capacity, level)
+            for level in self.level_numbers
+        ]
+
+    def restore(self, entries):
+        by_level = {}
+        for entry in entries:
+            by_level.setdefault(entry[3], []).append(entry)
+        for level, items in by_level.items():
+            lot = self.levels[level]
+            for vehicle, slot_id, ev, _ in items:
+                slots = lot.ev_slots if ev else lot.slots
+                if slots[slot_id - 1] is not None:
+                    del self.reg_level[slots[slot_id - 1].regnum]
+                self.reg_level[vehicle.regnum] = level
+            lot.restore(items)
+            self._refresh(level, False)
+            self._refresh(level, True)
+
+    def status(self):
+        vehicles = []
+        for level in self.level_numbers:
+            vehicles.extend(self.levels[level].status())
+        return vehicles
+
+    def status_snapshot(self):
+        # per-level snapshots; levels added later are not part of it
+        return [(level, self.levels[level], self.levels[level].status_snapshot())
+                for level in self.level_numbers]
+
+    def iter_status(self, level=None, ev=None, vehicle_type=None, cursor=None, snapshot=None):
+        for _, row in self._iter_status(level, ev, vehicle_type, cursor, snapshot):
+            yield row
+
+    def status_page(self, limit, cursor=None, level=None, ev=None, vehicle_type=None, snapshot=None):
+        return paginate(self._iter_status(level, ev, vehicle_type, cursor, snapshot), limit)
+
+    def _iter_status(self, level, ev, vehicle_type, cursor, snapshot):
+        if snapshot is None:
+            levels = [(number, self.levels[number], None) for number in self.level_numbers]
+        else:
+            # a level replaced since keeps its old lot, which still holds the snapshot's slots
+            levels = snapshot
+        for number, lot, lot_snapshot in levels:
+            if (level is not None and number != level) or (cursor is not None and number < cursor[0]):
+                continue
+            lot_cursor = cursor if cursor is not None and number == cursor[0] else None
+            yield from lot._iter_status(None, ev, vehicle_type, lot_cursor, lot_snapshot)
+
+    def get_slots_by_color(self, color):
+        results = []
+        for level in self.level_numbers:
+            for slot in self.levels[level].get_slots_by_color(color):
+                results.append((level, slot))
+        return results
+
+    def get_slot_by_reg(self, regnum):
+        level = self.reg_level.get(regnum)
+        if level is None:
+            return None
+        return (level, self.levels[level].get_slot_by_reg(regnum))
+
+    def get_vehicle_by_reg(self, regnum):
+        level = self.reg_level.get(regnum)
+        if level is None:
+            return None
+        return self.levels[level].get_vehicle_by_reg(regnum)
+
+    def get_level_by_reg(self, regnum):
+        return self.reg_level.get(regnum)
+
+    def get_regs_by_color(self, color):
+        regs = []
+        for level in self.level_numbers:
+            regs.extend(self.levels[level].get_regs_by_color(color))
+        return regs
+
+    # Reservations
+
+    def reserve(self, regnum, start, end, ev=False, level=None):
+        # like ParkingLot.reserve; level is a preference, nearest level first
+        _check_window(self.reservations, regnum, start, end)
+        levels = self.level_numbers
+        if level is not None:
+            levels = sorted(levels, key=lambda n: (abs(n - level), n))
+        for number in levels:
+            reservation = self.levels[number].reserve(regnum, start, end, ev)
+            if reservation is not None:
+                return reservation
+        return None
+
+    def cancel_reservation(self, reservation_id):
+        return self.reservations.cancel(reservation_id)
+
+    def available_slots(self, start, end, ev=False, level=None):
+        # (slot, level) of every slot free over [start, end), by level
+        levels = self.level_numbers if level is None else [level] if level in self.levels else []
+        return [row for number in levels
+                for row in self.levels[number].available_slots(start, end, ev)]
+
+    def get_reservations(self, start, end, ev=None, level=None):
+        levels = self.level_numbers if level is None else [level] if level in self.levels else []
+        found = []
+        for number in levels:
+            found += self.levels[number].get_reservations(start, end, ev)
+        return sorted(found, key=lambda r: (r.start, r.id))
@@ -1,3 +1,92 @@
+import heapq
+import weakref
+
+from domain.events import EventBus, LotResized, VehicleLeft, VehicleParked
+from domain.reservations import ReservationBook
+
+_UNCHANGED = object()
+
+
+class StatusSnapshot:
+    """Copy-on-write view of a lot's slots at the moment it was taken.
+
+    The slot lists are shared with the lot; the lot copies a slot's previous
+    vehicle into ``overrides`` the first time it changes that slot while the
+    snapshot is alive. Drop the snapshot (or let it be collected) to stop
+    the copying.
+    """
+
+    __slots__ = ("slots", "ev_slots", "level", "overrides", "__weakref__")
+
+    def __init__(self, slots, ev_slots, level):
+        self.slots = slots
+        self.ev_slots = ev_slots
+        self.level = level
+        self.overrides = {}
+
+    def preserve(self, ev, index, vehicle):
+        self.overrides.setdefault((ev, index), vehicle)
+
+
+def _heap_remove(heap, i):
+    # removes heap[i] in O(log n), keeping the heap invariant
+    last = heap.pop()
+    if i == len(heap):
+        return
+    heap[i] = last
+    moved = False
+    while i:
+        parent = (i - 1) >> 1
+        if heap[parent] <= heap[i]:
+            break
+        heap[parent], heap[i] = heap[i], heap[parent]
+        i = parent
+        moved = True
+    if moved:
+        return
+    size = len(heap)
+    while True:
+        child = 2 * i + 1
+        if child >= size:
+            return
+        if child + 1 < size and heap[child + 1] < heap[child]:
+            child += 1
+        if heap[i] <= heap[child]:
+            return
+        heap[i], heap[child] = heap[child], heap[i]
+        i = child
+
+
+def _heap_ascending(heap):
+    # the items of a min-heap in ascending order, lazily: O(log k) for the
+    # k-th, without touching the rest. The heap must not change meanwhile.
+    if not heap:
+        return
+    frontier = [(heap[0], 0)]
+    size = len(heap)
+    while frontier:
+        value, i = heapq.heappop(frontier)
+        yield value
+        child = 2 * i + 1
+        if child < size:
+            heapq.heappush(frontier, (heap[child], child))
+            if child + 1 < size:
+                heapq.heappush(frontier, (heap[child + 1], child + 1))
+
+
+def paginate(positions, limit):
+    # (rows, next_cursor) for the first `limit` of (cursor, row) pairs;
+    # next_cursor is None when nothing follows
+    rows = []
+    last = None
+    for cursor, row in positions:
+        if len(rows) == limit:
+            return rows, last
+        rows.append(row)
+        last = cursor
+    return rows, None
+
+
 class ParkingLot:
     def __init__(self, capacity, ev_capacity, level):
         self.capacity = capacity
@@ -7,11 +96,25 @@ class ParkingLot:
         self.slots = [None] * capacity
         self.ev_slots = [None] * ev_capacity
 
+        # min-heaps of free slot indices; a sorted range is already a valid heap
+        self.free_slots = list(range(capacity))
+        self.free_ev_slots = list(range(ev_capacity))
+
+        # secondary indexes: regnum -> (ev, index), color -> {(ev, index)}
+        self.reg_index = {}
+        self.color_index = {}
+
+        # change notifications; events are only built while someone listens
+        self.events = EventBus()
+        # live StatusSnapshots sharing self.slots / self.ev_slots
+        self._snapshots = weakref.WeakSet()
+        # slot holds booked ahead; shared with the other levels of a Facility
+        self.reservations = ReservationBook()
+
     def get_empty_slot(self, ev=False):
-        slots = self.ev_slots if ev else self.slots
-        for i, slot in enumerate(slots):
-            if slot is None:
-                return i
+        free = self.free_ev_slots if ev else self.free_slots
+        if free:
+            return free[0]
         return None
 
     def park(self, vehicle, ev=False, level=None):
@@ -19,24 +122,223 @@ class ParkingLot:
         if level is not None:
             self.level = level
 
-        slot = self.get_empty_slot(ev)
-        if slot is None:
+        if vehicle.regnum in self.reg_index:
+            raise ValueError(f"Vehicle {vehicle.regnum} is already parked")
+
+        free = self.free_ev_slots if ev else self.free_slots
+        if not free:
             return None
+        if self.reservations:
+            slot = self._allocate_reserved(vehicle.regnum, ev)
+            if slot is None:
+                return None
+        else:
+            slot = heapq.heappop(free)
+        self._place(vehicle, ev, slot)
+        return slot + 1
+
+    def park_at(self, vehicle, slot_id, ev=False, level=None):
+        # parks in exactly that slot, e.g. on journal replay; returns slot_id,
+        # or None if it is taken or out of range. Reservations are not checked.
+        if vehicle.regnum in self.reg_index:
+            raise ValueError(f"Vehicle {vehicle.regnum} is already parked")
+        slots = self.ev_slots if ev else self.slots
+        index = slot_id - 1
+        if not 0 <= index < len(slots) or slots[index] is not None:
+            return None
+        self._take_free(ev, index)
+        self._place(vehicle, ev, index)
+        return slot_id
 
+    def _place(self, vehicle, ev, slot):
+        if self._snapshots:
+            self._preserve(ev, slot)
         if ev:
             self.ev_slots[slot] = vehicle
         else:
             self.slots[slot] = vehicle
+        self._index_vehicle(vehicle, ev, slot)
+        if self.events:
+            self.events.publish(VehicleParked(self.level, self._slot_label(ev, slot), vehicle))
 
-        return slot + 1
+    def _take_free(self, ev, index):
+        # removes a known free slot from its heap; finding it is a linear
+        # (C speed) search unless it is the next one park() would use anyway
+        free = self.free_ev_slots if ev else self.free_slots
+        if free[0] == index:
+            heapq.heappop(free)
+        else:
+            _heap_remove(free, free.index(index))
+
+    def _allocate_reserved(self, regnum, ev):
+        # slot index for park() while reservations exist: the holder's own
+        # reserved slot if it is free, else the lowest free slot not held for
+        # someone else; None if every free slot is held
+        book = self.reservations
+        now = book.clock()
+        book.expire(now)
+        mine = book.holding(regnum, now)
+        if mine is not None and mine.level == self.level and mine.ev == ev:
+            if (self.ev_slots if ev else self.slots)[mine.index] is None:
+                self._take_free(ev, mine.index)
+                return mine.index
+        held = book.held(self.level, ev, now)
+        free = self.free_ev_slots if ev else self.free_slots
+        if not held:
+            return heapq.heappop(free)
+        skipped = []
+        slot = None
+        while free:
+            index = heapq.heappop(free)
+            if index in held and held[index].regnum != regnum:
+                skipped.append(index)
+            else:
+                slot = index
+                break
+        for index in skipped:
+            heapq.heappush(free, index)
+        return slot
 
     def leave(self, slot_id, ev=False):
         slots = self.ev_slots if ev else self.slots
         index = slot_id - 1
         if 0 <= index < len(slots) and slots[index] is not None:
+            vehicle = slots[index]
+            if self._snapshots:
+                self._preserve(ev, index)
+            self._unindex_vehicle(vehicle, ev, index)
             slots[index] = None
+            heapq.heappush(self.free_ev_slots if ev else self.free_slots, index)
+            if self.events:
+                self.events.publish(VehicleLeft(self.level, self._slot_label(ev, index), vehicle))
             return True
         return False
+
+    def park_many(self, entries):
+        # entries are (vehicle, ev, level) like park(); a ParkingLot is a single
+        # level, so level is ignored. Returns (slot, level, error) per entry.
+        if self.reservations:
+            return [self._park_one(vehicle, ev) for vehicle, ev, _ in entries]
+        results = []
+        reg_index = self.reg_index
+        added_by_color = {}
+        parked = [] if self.events else None
+        preserve = self._preserve if self._snapshots else None
+        heappop = heapq.heappop
+        for vehicle, ev, _ in entries:
+            if vehicle.regnum in reg_index:
+                results.append((None, None, f"Vehicle {vehicle.regnum} is already parked"))
+                continue
+            free = self.free_ev_slots if ev else self.free_slots
+            if not free:
+                results.append((None, None, "Parking is full"))
+                continue
+            index = heappop(free)
+            if preserve is not None:
+                preserve(ev, index)
+            (self.ev_slots if ev else self.slots)[index] = vehicle
+            key = (ev, index)
+            reg_index[vehicle.regnum] = key
+            added_by_color.setdefault(vehicle.color.lower(), []).append(key)
+            results.append((index + 1, self.level, None))
+            if parked is not None:
+                parked.append((self._slot_label(ev, index), vehicle))
+
+        for color, keys in added_by_color.items():
+            self.color_index.setdefault(color, set()).update(keys)
+        if parked:
+            for slot, vehicle in parked:
+                self.events.publish(VehicleParked(self.level, slot, vehicle))
+        return results
+
+    def _park_one(self, vehicle, ev):
+        # park() as a park_many result
+        try:
+            slot = self.park(vehicle, ev)
+        except ValueError as e:
+            return (None, None, str(e))
+        if slot is None:
+            return (None, None, "Parking is full")
+        return (slot, self.level, None)
+
+    def leave_many(self, entries):
+        # entries are (slot_id, ev, level) like leave(); returns a bool per entry
+        results = []
+        freed = {False: [], True: []}
+        notify = bool(self.events)
+        preserve = self._preserve if self._snapshots else None
+        for slot_id, ev, _ in entries:
+            slots = self.ev_slots if ev else self.slots
+            index = slot_id - 1
+            if 0 <= index < len(slots) and slots[index] is not None:
+                vehicle = slots[index]
+                if preserve is not None:
+                    preserve(ev, index)
+                self._unindex_vehicle(vehicle, ev, index)
+                slots[index] = None
+                freed[ev].append(index)
+                results.append(True)
+                if notify:
+                    self.events.publish(VehicleLeft(self.level, self._slot_label(ev, index), vehicle))
+            else:
+                results.append(False)
+
+        for ev, indices in freed.items():
+            free = self.free_ev_slots if ev else self.free_slots
+            if len(indices) * 4 > len(free):
+                # large batch: one O(n) heapify beats a push per slot
+                free.extend(indices)
+                heapq.heapify(free)
+            else:
+                for index in indices:
+                    heapq.heappush(free, index)
+        return results
+
+    def layout(self):
+        # (capacity, ev_capacity, level) for every level; one for a ParkingLot
+        return [(self.capacity, self.ev_capacity, self.level)]
+
+    def restore(self, entries):
+        # entries are (vehicle, slot_id, ev, level) placed at exactly that slot,
+        # e.g. when loading a snapshot; free heaps are rebuilt once at the end
+        preserve = self._preserve if self._snapshots else None
+        for vehicle, slot_id, ev, _ in entries:
+            slots = self.ev_slots if ev else self.slots
+            index = slot_id - 1
+            if preserve is not None:
+                preserve(ev, index)
+            if slots[index] is not None:
+                self._unindex_vehicle(slots[index], ev, index)
+            slots[index] = vehicle
+            self._index_vehicle(vehicle, ev, index)
+        self.free_slots = [i for i, v in enumerate(self.slots) if v is None]
+        self.free_ev_slots = [i for i, v in enumerate(self.ev_slots) if v is None]
+        if self.events:
+            self.events.publish(LotResized(self.level, self.capacity, self.ev_capacity))
+            for slot, level, vehicle in self.status():
+                self.events.publish(VehicleParked(level, slot, vehicle))
+
+    def _index_vehicle(self, vehicle, ev, index):
+        key = (ev, index)
+        self.reg_index[vehicle.regnum] = key
+        color = vehicle.color.lower()
+        keys = self.color_index.get(color)
+        if keys is None:
+            keys = self.color_index[color] = set()
+        keys.add(key)
+
+    def _unindex_vehicle(self, vehicle, ev, index):
+        del self.reg_index[vehicle.regnum]
+        color = vehicle.color.lower()
+        keys = self.color_index[color]
+        keys.discard((ev, index))
+        if not keys:
+            del self.color_index[color]
+
+    @staticmethod
+    def _slot_label(ev, index):
+        # regular slots are reported as ints, EV slots as "EV-n"
+        return f"EV-{index + 1}" if ev else index + 1
     
     def status(self):
         vehicles = []
@@ -50,39 +352,149 @@ class ParkingLot:
                 vehicles.append((f"EV-{i + 1}", self.level, vehicle))
         return vehicles
 
+    def status_snapshot(self):
+        # token for iter_status/status_page: later changes stay invisible to it
+        snapshot = StatusSnapshot(self.slots, self.ev_slots, self.level)
+        self._snapshots.add(snapshot)
+        return snapshot
+
+    def _preserve(self, ev, index):
+        vehicle = (self.ev_slots if ev else self.slots)[index]
+        for snapshot in self._snapshots:
+            snapshot.preserve(ev, index, vehicle)
+
+    def iter_status(self, level=None, ev=None, vehicle_type=None, cursor=None, snapshot=None):
+        # status() rows one at a time, optionally filtered; see status_page
+        for _, row in self._iter_status(level, ev, vehicle_type, cursor, snapshot):
+            yield row
+
+    def status_page(self, limit, cursor=None, level=None, ev=None, vehicle_type=None, snapshot=None):
+        # (rows, next_cursor); pass next_cursor back for the following page.
+        # Cursors are opaque; with a snapshot, pass the same one every time.
+        return paginate(self._iter_status(level, ev, vehicle_type, cursor, snapshot), limit)
+
+    def _iter_status(self, level, ev, vehicle_type, cursor, snapshot):
+        # yields (cursor, row); a cursor is (level, ev, index) of its row
+        if snapshot is None:
+            slots, ev_slots, lot_level, overrides = self.slots, self.ev_slots, self.level, {}
+        else:
+            slots, ev_slots, lot_level = snapshot.slots, snapshot.ev_slots, snapshot.level
+            overrides = snapshot.overrides
+        if level is not None and level != lot_level:
+            return
+        after_ev, after_index = (False, -1) if cursor is None else (cursor[1], cursor[2])
+        for pool_ev, pool in ((False, slots), (True, ev_slots)):
+            if (ev is not None and pool_ev != ev) or pool_ev < after_ev:
+                continue
+            start = after_index + 1 if pool_ev == after_ev else 0
+            for index in range(start, len(pool)):
+                vehicle = pool[index]
+                if overrides:
+                    old = overrides.get((pool_ev, index), _UNCHANGED)
+                    if old is not _UNCHANGED:
+                        vehicle = old
+                if vehicle is None:
+                    continue
+                if vehicle_type is not None and vehicle.getType() != vehicle_type:
+                    continue
+                yield (lot_level, pool_ev, index), (self._slot_label(pool_ev, index), lot_level, vehicle)
+
     def create_lot(self, capacity, ev_capacity, level):
         self.capacity = capacity
         self.ev_capacity = ev_capacity
         self.level = level
+        # live snapshots keep the old lists, which are never written again
+        self._snapshots = weakref.WeakSet()
         self.slots = [None] * capacity
         self.ev_slots = [None] * ev_capacity
+        self.free_slots = list(range(capacity))
+        self.free_ev_slots = list(range(ev_capacity))
+        self.reg_index = {}
+        self.color_index = {}
+        self.reservations.drop_level()
+        if self.events:
+            self.events.publish(LotResized(None, capacity, ev_capacity))
 
     def get_slots_by_color(self, color):
-        results = []
-        for i, v in enumerate(self.slots):
-            if v and v.color.lower() == color.lower():
-                results.append(i + 1)
-        for i, v in enumerate(self.ev_slots):
-            if v and v.color.lower() == color.lower():
-                results.append(f"EV-{i + 1}")
-        return results
+        # sorted keys keep the old order: regular slots first, then EV slots
+        keys = sorted(self.color_index.get(color.lower(), ()))
+        return [self._slot_label(ev, index) for ev, index in keys]
 
     def get_slot_by_reg(self, regnum):
-        for i, v in enumerate(self.slots):
-            if v and v.regnum == regnum:
-                return i + 1
-        for i, v in enumerate(self.ev_slots):
-            if v and v.regnum == regnum:
-                return f"EV-{i + 1}"
+        key = self.reg_index.get(regnum)
+        if key is None:
+            return None
+        return self._slot_label(*key)
+
+    def get_vehicle_by_reg(self, regnum):
+        key = self.reg_index.get(regnum)
+        if key is None:
+            return None
+        ev, index = key
+        return (self.ev_slots if ev else self.slots)[index]
+
+    def get_level_by_reg(self, regnum):
+        if regnum in self.reg_index:
+            return self.level
         return None
 
     def get_regs_by_color(self, color):
-        regs = []
-        for v in self.slots + self.ev_slots:
-            if v and v.color.lower() == color.lower():
-                regs.append(v.regnum)
-        return regs
+        keys = sorted(self.color_index.get(color.lower(), ()))
+        return [
+            (self.ev_slots if ev else self.slots)[index].regnum
+            for ev, index in keys
+        ]
+
+    # Reservations
+
+    def reserve(self, regnum, start, end, ev=False, level=None):
+        # holds the lowest slot that is free over [start, end) (epoch
+        # seconds); returns the Reservation, or None if no slot is free for
+        # the whole window. level is ignored, as for park().
+        _check_window(self.reservations, regnum, start, end)
+        for index in self._free_between(ev, start, end):
+            return self.reservations.add(regnum, self.level, ev, index, start, end)
+        return None
+
+    def cancel_reservation(self, reservation_id):
+        return self.reservations.cancel(reservation_id)
 
+    def available_slots(self, start, end, ev=False, level=None):
+        # (slot, level) of every slot free over [start, end)
+        if level is not None and level != self.level:
+            return []
+        return [(self._slot_label(ev, index), self.level)
+                for index in self._free_between(ev, start, end)]
 
+    def get_reservations(self, start, end, ev=None, level=None):
+        # reservations overlapping [start, end), ordered by start
+        if level is not None and level != self.level:
+            return []
+        pools = (False, True) if ev is None else (ev,)
+        found = []
+        for pool_ev in pools:
+            found += self.reservations.overlapping(self.level, pool_ev, start, end)
+        return sorted(found, key=lambda r: (r.start, r.id))
+
+    def _free_between(self, ev, start, end):
+        # slot indices with no reservation over [start, end), ascending; a
+        # window that has already begun also skips occupied slots. Costs the
+        # interval search, plus O(log n) per slot returned or booked: only
+        # booked slots are ever skipped, never occupied ones.
+        book = self.reservations
+        booked = book.booked(self.level, ev, start, end) if book else ()
+        if start <= book.clock():
+            candidates = _heap_ascending(self.free_ev_slots if ev else self.free_slots)
+        else:
+            candidates = range(self.ev_capacity if ev else self.capacity)
+        for index in candidates:
+            if index not in booked:
+                yield index
 
 
+def _check_window(book, regnum, start, end):
+    if not start < end:
+        raise ValueError("A reservation must end after it starts")
+    for reservation in book.by_regnum.get(regnum, {}).values():
+        if reservation.start < end and reservation.end > start:
+            raise ValueError(f"Vehicle {regnum} already has a reservation at that time")
@@ -0,0 +1,240 @@
+import heapq
+import itertools
+import random
+import time
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Reservation:
+    # a hold on one slot over [start, end), times in epoch seconds
+    id: int
+    regnum: str
+    level: int
+    ev: bool
+    index: int  # 0-based slot index within the level's regular or EV pool
+    start: float
+    end: float
+
+    @property
+    def slot(self):
+        # same labels as status(): int for regular slots, "EV-n" for EV slots
+        return f"EV-{self.index + 1}" if self.ev else self.index + 1
+
+
+class _Node:
+    __slots__ = ("key", "reservation", "priority", "max_end", "left", "right")
+
+    def __init__(self, reservation, priority):
+        self.key = (reservation.start, reservation.id)
+        self.reservation = reservation
+        self.priority = priority
+        self.max_end = reservation.end
+        self.left = None
+        self.right = None
+
+    def update(self):
+        max_end = self.reservation.end
+        if self.left is not None and self.left.max_end > max_end:
+            max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > max_end:
+            max_end = self.right.max_end
+        self.max_end = max_end
+
+
+class IntervalTree:
+    """Reservations ordered by start, each subtree tagged with its latest end.
+
+    A treap, so inserts and removals are O(log n) expected. Overlap searches
+    skip every subtree whose latest end is before the window and everything
+    right of a node starting after it, so they cost O(log n) plus roughly
+    the number of reservations reported.
+    """
+
+    def __init__(self, seed=None):
+        self.root = None
+        self.size = 0
+        self._random = random.Random(seed).random
+
+    def __len__(self):
+        return self.size
+
+    def insert(self, reservation):
+        self.root = self._insert(self.root, _Node(reservation, self._random()))
+        self.size += 1
+
+    def _insert(self, node, new):
+        if node is None:
+            return new
+        if new.key < node.key:
+            node.left = self._insert(node.left, new)
+            if node.left.priority > node.priority:
+                node = self._rotate_right(node)
+        else:
+            node.right = self._insert(node.right, new)
+            if node.right.priority > node.priority:
+                node = self._rotate_left(node)
+        node.update()
+        return node
+
+    def remove(self, reservation):
+        size = self.size
+        self.root = self._remove(self.root, (reservation.start, reservation.id))
+        return self.size < size
+
+    def _remove(self, node, key):
+        if node is None:
+            return None
+        if key < node.key:
+            node.left = self._remove(node.left, key)
+        elif key > node.key:
+            node.right = self._remove(node.right, key)
+        else:
+            if node.left is None:
+                self.size -= 1
+                return node.right
+            if node.right is None:
+                self.size -= 1
+                return node.left
+            # rotate the node down towards a leaf, then retry below
+            if node.left.priority > node.right.priority:
+                node = self._rotate_right(node)
+                node.right = self._remove(node.right, key)
+            else:
+                node = self._rotate_left(node)
+                node.left = self._remove(node.left, key)
+        node.update()
+        return node
+
+    @staticmethod
+    def _rotate_right(node):
+        top = node.left
+        node.left = top.right
+        top.right = node
+        node.update()
+        top.update()
+        return top
+
+    @staticmethod
+    def _rotate_left(node):
+        top = node.right
+        node.right = top.left
+        top.left = node
+        node.update()
+        top.update()
+        return top
+
+    def overlapping(self, start, end, inclusive=False):
+        # reservations with r.start < end (<= with inclusive) and r.end > start
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            if node.max_end <= start:
+                continue
+            if node.left is not None:
+                stack.append(node.left)
+            node_start = node.key[0]
+            if node_start < end or (inclusive and node_start == end):
+                if node.reservation.end > start:
+                    found.append(node.reservation)
+                if node.right is not None:
+                    stack.append(node.right)
+        return found
+
+    def __iter__(self):
+        stack, node = [], self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.reservation
+            node = node.right
+
+
+class ReservationBook:
+    """Every reservation of a lot, indexed per (level, ev) pool.
+
+    A reservation holds its slot from ``hold_before`` seconds before its
+    start until its end: other vehicles are not parked there meanwhile, and
+    the holder is given that slot on arrival. A book is falsy while empty,
+    so the allocator only pays for reservations when there are some.
+    """
+
+    def __init__(self, clock=time.time, hold_before=0.0):
+        self.clock = clock
+        self.hold_before = hold_before
+        self.pools = {}         # (level, ev) -> IntervalTree
+        self.by_id = {}
+        self.by_regnum = {}     # regnum -> {id: Reservation}
+        self._ends = []         # min-heap of (end, id), for expire()
+        self._ids = itertools.count(1)
+
+    def __bool__(self):
+        return bool(self.by_id)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def _pool(self, level, ev):
+        tree = self.pools.get((level, ev))
+        if tree is None:
+            tree = self.pools[(level, ev)] = IntervalTree()
+        return tree
+
+    def add(self, regnum, level, ev, index, start, end):
+        reservation = Reservation(next(self._ids), regnum, level, ev, index, start, end)
+        self._pool(level, ev).insert(reservation)
+        heapq.heappush(self._ends, (end, reservation.id))
+        self.by_id[reservation.id] = reservation
+        self.by_regnum.setdefault(regnum, {})[reservation.id] = reservation
+        return reservation
+
+    def cancel(self, reservation_id):
+        reservation = self.by_id.pop(reservation_id, None)
+        if reservation is None:
+            return False
+        self.pools[(reservation.level, reservation.ev)].remove(reservation)
+        mine = self.by_regnum[reservation.regnum]
+        del mine[reservation_id]
+        if not mine:
+            del self.by_regnum[reservation.regnum]
+        return True
+
+    def drop_level(self, level=None):
+        # a level was reconfigured; its reservations (all, for None) go
+        for reservation in list(self.by_id.values()):
+            if level is None or reservation.level == level:
+                self.cancel(reservation.id)
+        if not self.by_id:
+            self._ends = []
+
+    def overlapping(self, level, ev, start, end):
+        tree = self.pools.get((level, ev))
+        return tree.overlapping(start, end) if tree is not None else []
+
+    def booked(self, level, ev, start, end):
+        # slot indices with a reservation overlapping [start, end)
+        return {r.index for r in self.overlapping(level, ev, start, end)}
+
+    def held(self, level, ev, now):
+        # {slot index: reservation} for holds in force at `now`
+        tree = self.pools.get((level, ev))
+        if tree is None:
+            return {}
+        return {r.index: r for r in tree.overlapping(now, now + self.hold_before, inclusive=True)}
+
+    def holding(self, regnum, now):
+        # the reservation of regnum whose hold is in force at `now`, if any
+        for reservation in self.by_regnum.get(regnum, {}).values():
+            if reservation.start - self.hold_before <= now < reservation.end:
+                return reservation
+        return None
+
+    def expire(self, now=None):
+        # forgets reservations that have ended; O(1) when none have
+        now = self.clock() if now is None else now
+        ends = self._ends
+        while ends and ends[0][0] <= now:
+            self.cancel(heapq.heappop(ends)[1])  # no-op if cancelled earlier
@@ -1,11 +1,16 @@
+import sys
 from abc import ABC, abstractmethod
 
 class Vehicle(ABC):
+    # __slots__ keeps a parked vehicle to a few pointers instead of a per-instance
+    # dict; make/model/color repeat across a lot, so they are interned
+    __slots__ = ("regnum", "make", "model", "color")
+
     def __init__(self, regnum, make, model, color):
         self.regnum = regnum
-        self.make = make
-        self.model = model
-        self.color = color
+        self.make = sys.intern(make)
+        self.model = sys.intern(model)
+        self.color = sys.intern(color)
 
     @abstractmethod
     def getType(self):
@@ -13,11 +18,14 @@ class Vehicle(ABC):
 
 
 class Car(Vehicle):
+    __slots__ = ()
+
     def getType(self):
         return "Car"
 
 
 class Motorcycle(Vehicle):
+    __slots__ = ()
+
     def getType(self):
         return "Motorcycle"
-
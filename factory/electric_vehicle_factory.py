@@ -3,11 +3,15 @@ from domain.electric_mixin import ElectricMixin
 from factory.vehicle_factory import VehicleFactory
 
 class ElectricCar(Car, ElectricMixin):
+    __slots__ = ("charge",)
+
     def __init__(self, regnum, make, model, color):
         Car.__init__(self, regnum, make, model, color)
         ElectricMixin.__init__(self)
 
 class ElectricBike(Motorcycle, ElectricMixin):
+    __slots__ = ("charge",)
+
     def __init__(self, regnum, make, model, color):
         Motorcycle.__init__(self, regnum, make, model, color)
         ElectricMixin.__init__(self)
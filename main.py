@@ -1,25 +1,69 @@
+import os
 import tkinter as tk
-from domain.parking_lot import ParkingLot
+from contextlib import nullcontext
+from domain.facility import Facility
 from factory.regular_vehicle_factory import RegularVehicleFactory
 from factory.electric_vehicle_factory import ElectricVehicleFactory
+from monitoring import metrics, tracing
+from monitoring.lot_metrics import LotMetrics
+from monitoring.profiling import capture
+from persistence.persistent_lot import PersistentLot
 from presenter.parking_presenter import ParkingPresenter
+from services.charging_cache import CachedChargingClient
 from services.charging_client import ChargingServiceClient
+from services.async_charging_client import AsyncChargingServiceClient
+from sharding.cluster import ShardCluster
 from ui.app import ParkingUI
 
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
 def main():
-    parking_lot = ParkingLot(capacity=10, ev_capacity=5, level=1)
+    # state survives restarts: latest snapshot + journal tail are replayed here.
+    # PARKING_SHARDS=<n> runs n levels on n shard processes instead, each
+    # journaling its own levels, see sharding/cluster.py
+    shards = int(os.environ.get("PARKING_SHARDS", "0"))
+    cluster = None
+    if shards:
+        cluster = ShardCluster(capacity=10, ev_capacity=5, levels=shards, shards=shards,
+                               directory=os.path.join(DATA_DIR, "shards"))
+        parking_lot = cluster.router()
+    else:
+        parking_lot = PersistentLot(Facility(capacity=10, ev_capacity=5, levels=1), DATA_DIR)
+
+    # PARKING_METRICS_PORT=<port> serves the lot's metrics at /metrics on localhost
+    lot_metrics = LotMetrics(parking_lot)
+    metrics_port = os.environ.get("PARKING_METRICS_PORT")
+    if metrics_port:
+        metrics.serve(lot_metrics.registry, port=int(metrics_port))
+
+    # PARKING_TRACE=<file> times presenter, domain and client calls (exported
+    # with the metrics) and writes their span stacks there on exit;
+    # PARKING_PROFILE=<file> profiles the whole session, see monitoring/profiling.py
+    trace_path = os.environ.get("PARKING_TRACE")
+    if trace_path:
+        tracing.enable(lot_metrics.registry)
+    profile_path = os.environ.get("PARKING_PROFILE")
 
     presenter = ParkingPresenter(
         parking_lot,
         RegularVehicleFactory(),
         ElectricVehicleFactory(),
-        ChargingServiceClient()
+        # status polls are answered from a short-lived cache, see services/charging_cache.py
+        CachedChargingClient(ChargingServiceClient(), registry=lot_metrics.registry),
+        AsyncChargingServiceClient()
     )
 
     root = tk.Tk()
     ParkingUI(root, presenter)
-    root.mainloop()
+    try:
+        with capture(profile_path) if profile_path else nullcontext():
+            root.mainloop()
+    finally:
+        parking_lot.close()
+        if cluster is not None:
+            cluster.close()
+        if trace_path:
+            tracing.tracer.write_folded(trace_path)
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,94 @@
+from domain.events import LotResized, VehicleLeft, VehicleParked
+from monitoring.metrics import MetricsRegistry
+
+
+class LotMetrics:
+    """Live arrival, departure and occupancy figures for a lot, per level.
+
+    Kept current by a synchronous EventBus subscriber, so each park or leave
+    costs one O(1) counter update on the calling thread. Like
+    OccupancyAnalytics, attach it while the lot is not changing.
+    """
+
+    def __init__(self, lot, registry=None):
+        self.lot = lot
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self._arrivals = self.registry.rolling(
+            "parking_arrivals", "Vehicles parked", ("level",))
+        self._departures = self.registry.rolling(
+            "parking_departures", "Vehicles that left", ("level",))
+        self._occupancy = self.registry.gauge(
+            "parking_occupancy", "Vehicles currently parked", ("level",))
+        self._levels = {}   # level -> (arrivals, departures, occupancy)
+        for _, _, level in lot.layout():
+            self._level(level)
+        counts = {}
+        for _, level, _ in lot.iter_status():
+            counts[level] = counts.get(level, 0) + 1
+        for level, count in counts.items():
+            self._level(level)[2].set(count)
+        self._subscription = lot.events.subscribe(
+            self._on_event, VehicleParked, VehicleLeft, LotResized
+        )
+
+    def close(self):
+        self._subscription.close()
+
+    def _level(self, level):
+        metrics = self._levels.get(level)
+        if metrics is None:
+            metrics = self._levels[level] = (
+                self._arrivals.labels(level),
+                self._departures.labels(level),
+                self._occupancy.labels(level),
+            )
+        return metrics
+
+    def _on_event(self, event):
+        if isinstance(event, VehicleParked):
+            arrivals, _, occupancy = self._level(event.level)
+            arrivals.add()
+            occupancy.add()
+        elif isinstance(event, VehicleLeft):
+            _, departures, occupancy = self._level(event.level)
+            departures.add()
+            occupancy.add(-1)
+        else:
+            # contents dropped; a restore re-parks them with VehicleParked
+            levels = list(self._levels) if event.level is None else [event.level]
+            for level in levels:
+                self._level(level)[2].set(0)
+            for _, _, level in self.lot.layout():
+                self._level(level)
+
+    # Queries; level None sums over every level
+
+    def _select(self, level):
+        if level is None:
+            return list(self._levels.values())
+        return [self._level(level)]
+
+    def arrivals(self, seconds, level=None):
+        return sum(arrivals.count(seconds) for arrivals, _, _ in self._select(level))
+
+    def departures(self, seconds, level=None):
+        return sum(departures.count(seconds) for _, departures, _ in self._select(level))
+
+    def occupancy(self, level=None):
+        return sum(occupancy.value for _, _, occupancy in self._select(level))
+
+    def peak_today(self, level):
+        return self._level(level)[2].peak_today()
+
+    def summary(self):
+        # {level: {"arrivals": {window: n}, "departures": {...}, "occupancy", "peak_today"}}
+        windows = self.registry.windows
+        return {
+            level: {
+                "arrivals": {w: arrivals.count(w) for w in windows},
+                "departures": {w: departures.count(w) for w in windows},
+                "occupancy": occupancy.value,
+                "peak_today": occupancy.peak_today(),
+            }
+            for level, (arrivals, departures, occupancy) in sorted(self._levels.items())
+        }
@@ -0,0 +1,268 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# trailing windows reported for every rolling counter, in seconds
+WINDOWS = (300, 900, 3600)
+
+# upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RollingCounter:
+    """Counts events over trailing time windows.
+
+    Events land in a ring of fixed-width buckets stamped with the interval
+    they belong to; a bucket left over from an earlier lap of the ring is
+    reset when reused. add() is O(1); count(seconds) sums at most
+    horizon / resolution buckets and is exact to one bucket.
+    """
+
+    def __init__(self, horizon=max(WINDOWS), resolution=10, clock=time.time):
+        self.resolution = resolution
+        self.clock = clock
+        size = math.ceil(horizon / resolution)
+        self._counts = [0] * size
+        self._epochs = [-1] * size
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def add(self, amount=1):
+        epoch = int(self.clock() // self.resolution)
+        i = epoch % len(self._counts)
+        with self._lock:
+            if self._epochs[i] != epoch:
+                self._epochs[i] = epoch
+                self._counts[i] = 0
+            self._counts[i] += amount
+            self.total += amount
+
+    def count(self, seconds):
+        # events in the last `seconds`, current partial bucket included
+        epoch = int(self.clock() // self.resolution)
+        oldest = epoch - min(math.ceil(seconds / self.resolution), len(self._counts))
+        with self._lock:
+            return sum(c for c, e in zip(self._counts, self._epochs) if oldest < e <= epoch)
+
+
+class PeakGauge:
+    """A level that goes up and down, plus the highest it has been today.
+
+    The peak restarts from the current value at local midnight.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.value = 0
+        self._peak = 0
+        self._next_day = self._midnight_after(clock())
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _midnight_after(now):
+        day = time.localtime(now)
+        return time.mktime((day.tm_year, day.tm_mon, day.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+
+    def _roll(self):
+        now = self.clock()
+        if now >= self._next_day:
+            self._next_day = self._midnight_after(now)
+            self._peak = self.value
+
+    def add(self, amount=1):
+        with self._lock:
+            self._roll()
+            self.value += amount
+            if self.value > self._peak:
+                self._peak = self.value
+
+    def set(self, value):
+        with self._lock:
+            self._roll()
+            self.value = value
+            if value > self._peak:
+                self._peak = value
+
+    def peak_today(self):
+        with self._lock:
+            self._roll()
+            return self._peak
+
+
+class Histogram:
+    """Observation counts per bucket, plus their count and sum."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def cumulative(self):
+        # [(upper bound, observations <= bound)], ending with +Inf
+        with self._lock:
+            counts = list(self._counts)
+        total, result = 0, []
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q):
+        # upper bound of the bucket holding the q-quantile; None if empty
+        cumulative = self.cumulative()
+        rank = q * cumulative[-1][1]
+        if not rank:
+            return None
+        return next(bound for bound, total in cumulative if total >= rank)
+
+
+class Family:
+    # one named metric and its children, one per label set
+    def __init__(self, kind, name, help, label_names, factory):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self._factory = factory
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def children(self):
+        with self._lock:
+            return sorted(self._children.items())
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _window_label(seconds):
+    return f"{seconds // 60}m" if seconds % 60 == 0 else f"{seconds}s"
+
+
+def _bound_label(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+class MetricsRegistry:
+    """Named rolling counters, peak gauges and histograms, exported as
+    Prometheus text."""
+
+    def __init__(self, clock=time.time, windows=WINDOWS, resolution=10):
+        self.clock = clock
+        self.windows = windows
+        self.resolution = resolution
+        self._families = {}
+
+    def _family(self, kind, name, help, label_names, factory):
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = Family(kind, name, help, tuple(label_names), factory)
+        elif family.kind != kind:
+            raise ValueError(f"metric {name} is already registered as a {family.kind}")
+        return family
+
+    def rolling(self, name, help, label_names=()):
+        return self._family(
+            "rolling", name, help, label_names,
+            lambda: RollingCounter(max(self.windows), self.resolution, self.clock),
+        )
+
+    def gauge(self, name, help, label_names=()):
+        return self._family("gauge", name, help, label_names, lambda: PeakGauge(self.clock))
+
+    def histogram(self, name, help, label_names=(), buckets=LATENCY_BUCKETS):
+        return self._family("histogram", name, help, label_names, lambda: Histogram(buckets))
+
+    def render(self):
+        # rolling counters export <name>_total and <name>_window{window=...};
+        # gauges export <name> and <name>_peak_today; histograms the usual
+        # <name>_bucket{le=...}, <name>_sum and <name>_count
+        lines = []
+
+        def emit(name, kind, help, samples):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{labels} {value}" for labels, value in samples)
+
+        for family in list(self._families.values()):
+            children = family.children()
+            names = family.label_names
+            if family.kind == "rolling":
+                emit(f"{family.name}_total", "counter", family.help,
+                     [(_labels(names, values), c.total) for values, c in children])
+                emit(f"{family.name}_window", "gauge", f"{family.help}, over trailing windows",
+                     [(_labels(names, values, [("window", _window_label(w))]), c.count(w))
+                      for values, c in children for w in self.windows])
+            elif family.kind == "histogram":
+                samples = []
+                for values, h in children:
+                    samples.extend(
+                        (f"_bucket{_labels(names, values, [('le', _bound_label(bound))])}", total)
+                        for bound, total in h.cumulative()
+                    )
+                    samples.append((f"_sum{_labels(names, values)}", h.sum))
+                    samples.append((f"_count{_labels(names, values)}", h.count))
+                emit(family.name, "histogram", family.help, samples)
+            else:
+                emit(family.name, "gauge", family.help,
+                     [(_labels(names, values), g.value) for values, g in children])
+                emit(f"{family.name}_peak_today", "gauge", f"{family.help}, highest today",
+                     [(_labels(names, values), g.peak_today()) for values, g in children])
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(registry, host="127.0.0.1", port=9108):
+    # serves GET /metrics from a daemon thread; returns the server, whose
+    # shutdown() stops it
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,89 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SamplingProfiler:
+    """Samples the stacks of every other thread every `interval` seconds.
+
+    Cheap enough to leave on in a running app: the profiled threads are not
+    instrumented, only inspected from a daemon thread. Stacks are counted in
+    the folded format (``outer;inner count``) read by flamegraph.pl and
+    speedscope.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = {}   # folded stack -> number of samples
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                key = ";".join(reversed(stack))
+                self.samples[key] = self.samples.get(key, 0) + 1
+
+    def write_folded(self, path):
+        with open(path, "w") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def capture(path, interval=0.005):
+    # profiles the block into path: a path ending in .prof gets cProfile
+    # stats of the calling thread (snakeviz, gprof2dot, flameprof), anything
+    # else folded stacks from the SamplingProfiler covering all threads
+    if path.endswith(".prof"):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+    else:
+        profiler = SamplingProfiler(interval)
+        profiler.start()
+        try:
+            yield profiler
+        finally:
+            profiler.stop()
+            profiler.write_folded(path)
+
+
+def timed_capture(path, seconds, interval=0.005):
+    # samples the whole process for `seconds` in the background, e.g. to
+    # catch a slow spell in a running app without restarting it
+    def run():
+        with capture(path, interval):
+            time.sleep(seconds)
+
+    thread = threading.Thread(target=run, name="profile-capture", daemon=True)
+    thread.start()
+    return thread
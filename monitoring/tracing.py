@@ -0,0 +1,195 @@
+import functools
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+from monitoring.metrics import MetricsRegistry
+
+# (module, class, methods) traced by enable(); each call is recorded as
+# "<component>.<Class>.<method>". Generators are left out, as only their
+# creation would be timed.
+TARGETS = {
+    "presenter": [
+        ("presenter.parking_presenter", "ParkingPresenter", (
+            "create_lot", "park_vehicle", "park_many", "remove_vehicle", "leave_many",
+            "get_status", "get_status_page", "status_snapshot", "watch_status",
+            "get_slots_by_color", "get_slot_by_reg", "get_regs_by_color",
+            "start_charging", "stop_charging", "get_charge_status",
+            "start_charging_many", "stop_charging_many", "get_charge_status_many",
+            "get_ev_charge_statuses", "reserve_slot", "cancel_reservation",
+            "get_available_slots", "get_reservations",
+        )),
+    ],
+    "factory": [
+        ("factory.regular_vehicle_factory", "RegularVehicleFactory", ("create",)),
+        ("factory.electric_vehicle_factory", "ElectricVehicleFactory", ("create",)),
+    ],
+    "domain": [
+        ("domain.parking_lot", "ParkingLot", (
+            "create_lot", "park", "park_at", "leave", "park_many", "leave_many", "restore",
+            "status", "status_page", "status_snapshot",
+            "get_slots_by_color", "get_slot_by_reg", "get_regs_by_color",
+            "reserve", "available_slots", "get_reservations",
+        )),
+        ("domain.facility", "Facility", (
+            "create_lot", "park", "park_at", "leave", "park_many", "leave_many", "restore",
+            "status", "status_page", "status_snapshot",
+            "get_slots_by_color", "get_slot_by_reg", "get_regs_by_color",
+            "reserve", "available_slots", "get_reservations",
+        )),
+        ("persistence.persistent_lot", "PersistentLot", (
+            "create_lot", "park", "leave", "park_many", "leave_many", "snapshot",
+        )),
+    ],
+    "client": [
+        ("services.charging_client", "ChargingServiceClient", (
+            "start_charging", "stop_charging", "get_status",
+            "start_charging_batch", "stop_charging_batch", "get_status_batch",
+        )),
+        ("services.charging_cache", "CachedChargingClient", ("get_status", "get_status_batch")),
+        ("services.async_charging_client", "AsyncChargingServiceClient", ("run",)),
+    ],
+}
+
+
+class Tracer:
+    """Latency histograms, call and error counts for instrumented methods.
+
+    instrument() swaps a class's methods for timing wrappers and
+    uninstrument() puts the originals back, so nothing is paid while tracing
+    is off. Nested traced calls form spans; the self time of each span stack
+    is accumulated for write_folded().
+    """
+
+    def __init__(self, registry=None, clock=time.perf_counter):
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self.clock = clock
+        self._latency = self.registry.histogram(
+            "operation_latency_seconds", "Latency of traced calls", ("operation",))
+        self._errors = self.registry.rolling(
+            "operation_errors", "Traced calls that raised", ("operation",))
+        self._local = threading.local()
+        self._folded = {}   # (outer, ..., inner) span stack -> self seconds
+        self._folded_lock = threading.Lock()
+        self._patched = []  # (owner, name, original attribute)
+
+    def instrument(self, owner, names, component):
+        for name in names:
+            original = owner.__dict__[name]
+            operation = f"{component}.{owner.__name__}.{name}"
+            setattr(owner, name, self._wrap(operation, original))
+            self._patched.append((owner, name, original))
+
+    def uninstrument(self):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _wrap(self, operation, fn):
+        histogram = self._latency.labels(operation)
+        errors = self._errors.labels(operation)
+        clock = self.clock
+
+        @functools.wraps(fn)
+        def traced(*args, **kwargs):
+            stack = self._stack()
+            frame = self._push(stack, operation)
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                errors.add()
+                raise
+            finally:
+                self._finish(stack, frame, clock() - start, histogram)
+
+        return traced
+
+    @staticmethod
+    def _push(stack, operation):
+        # [span stack as a tuple, time spent in nested spans]
+        frame = [stack[-1][0] + (operation,) if stack else (operation,), 0.0]
+        stack.append(frame)
+        return frame
+
+    def _finish(self, stack, frame, elapsed, histogram):
+        stack.pop()
+        histogram.observe(elapsed)
+        if stack:
+            stack[-1][1] += elapsed
+        path = frame[0]
+        with self._folded_lock:
+            self._folded[path] = self._folded.get(path, 0.0) + elapsed - frame[1]
+
+    @contextmanager
+    def span(self, operation):
+        # times an arbitrary block like an instrumented call
+        stack = self._stack()
+        frame = self._push(stack, operation)
+        start = self.clock()
+        try:
+            yield
+        except BaseException:
+            self._errors.labels(operation).add()
+            raise
+        finally:
+            self._finish(stack, frame, self.clock() - start, self._latency.labels(operation))
+
+    def stats(self):
+        # {operation: {"calls", "errors", "mean_ms", "p50_ms", "p99_ms"}};
+        # percentiles are bucket upper bounds
+        errors = dict(self._errors.children())
+        result = {}
+        for (operation,), histogram in self._latency.children():
+            if not histogram.count:
+                continue
+            error_counter = errors.get((operation,))
+            result[operation] = {
+                "calls": histogram.count,
+                "errors": error_counter.total if error_counter else 0,
+                "mean_ms": histogram.sum / histogram.count * 1000,
+                "p50_ms": histogram.quantile(0.5) * 1000,
+                "p99_ms": histogram.quantile(0.99) * 1000,
+            }
+        return result
+
+    def write_folded(self, path):
+        # span stacks in the folded format read by flamegraph.pl and
+        # speedscope, weighted by self time in microseconds
+        with self._folded_lock:
+            folded = sorted(self._folded.items())
+        with open(path, "w") as f:
+            for stack, seconds in folded:
+                f.write(f"{';'.join(stack)} {max(1, round(seconds * 1_000_000))}\n")
+
+
+tracer = None
+
+
+def enable(registry=None, components=None):
+    # instruments TARGETS (or just the named components) and returns the
+    # active Tracer; calling it again returns the one already running
+    global tracer
+    if tracer is None:
+        tracer = Tracer(registry)
+        for component, targets in TARGETS.items():
+            if components is not None and component not in components:
+                continue
+            for module, cls, names in targets:
+                owner = getattr(importlib.import_module(module), cls)
+                tracer.instrument(owner, names, component)
+    return tracer
+
+
+def disable():
+    global tracer
+    if tracer is not None:
+        tracer.uninstrument()
+        tracer = None
@@ -0,0 +1,99 @@
+from factory.regular_vehicle_factory import RegularVehicleFactory
+from factory.electric_vehicle_factory import ElectricVehicleFactory
+from persistence.journal import LotJournal, encode_vehicle
+
+
+class PersistentLot:
+    """Wraps a ParkingLot or Facility and journals every state change.
+
+    On construction the latest snapshot is loaded into the wrapped lot and
+    the journal tail is replayed. Reads are delegated to the wrapped lot.
+    """
+
+    def __init__(self, lot, directory, snapshot_every=50_000, fsync_every=256,
+                 fsync_interval=1.0, regular_factory=None, electric_factory=None):
+        self.lot = lot
+        self.snapshot_every = snapshot_every
+        self.journal = LotJournal(directory, fsync_every, fsync_interval)
+        self.replayed = self.journal.recover(
+            lot,
+            regular_factory or RegularVehicleFactory(),
+            electric_factory or ElectricVehicleFactory(),
+        )
+        self.since_snapshot = self.replayed
+
+    def __getattr__(self, name):
+        return getattr(self.lot, name)
+
+    def _log(self, record):
+        self.journal.append(record)
+        self.since_snapshot += 1
+
+    def _maybe_snapshot(self):
+        # only called once an operation is fully journaled, so the snapshot
+        # never contains changes whose records come after its sequence number
+        if self.since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def _log_park(self, vehicle, ev, level, slot):
+        self._log({
+            "op": "park", "ev": ev, "level": level, "slot": slot,
+            "vehicle": encode_vehicle(vehicle),
+        })
+
+    def snapshot(self):
+        self.journal.write_snapshot(self.lot)
+        self.since_snapshot = 0
+
+    def close(self, snapshot=True):
+        if snapshot and self.since_snapshot:
+            self.snapshot()
+        self.journal.close()
+
+    def create_lot(self, capacity, ev_capacity, level):
+        self.lot.create_lot(capacity, ev_capacity, level)
+        self._log({"op": "create_lot", "capacity": capacity,
+                   "ev_capacity": ev_capacity, "level": level})
+        self._maybe_snapshot()
+
+    def park(self, vehicle, ev=False, level=None):
+        slot = self.lot.park(vehicle, ev=ev, level=level)
+        if slot:
+            self._log_park(vehicle, ev, self.lot.get_level_by_reg(vehicle.regnum), slot)
+            self._maybe_snapshot()
+        return slot
+
+    def park_at(self, vehicle, slot_id, ev=False, level=None):
+        slot = self.lot.park_at(vehicle, slot_id, ev=ev, level=level)
+        if slot:
+            self._log_park(vehicle, ev, self.lot.get_level_by_reg(vehicle.regnum), slot)
+            self._maybe_snapshot()
+        return slot
+
+    def leave(self, slot_id, ev=False, level=None):
+        if level is None:
+            ok = self.lot.leave(slot_id, ev=ev)
+        else:
+            ok = self.lot.leave(slot_id, ev=ev, level=level)
+        if ok:
+            self._log({"op": "leave", "slot": slot_id, "ev": ev, "level": level})
+            self._maybe_snapshot()
+        return ok
+
+    def park_many(self, entries):
+        entries = list(entries)
+        results = self.lot.park_many(entries)
+        for (vehicle, ev, _), (slot, level, _) in zip(entries, results):
+            if slot is not None:
+                self._log_park(vehicle, ev, level, slot)
+        self._maybe_snapshot()
+        return results
+
+    def leave_many(self, entries):
+        entries = list(entries)
+        results = self.lot.leave_many(entries)
+        for (slot_id, ev, level), ok in zip(entries, results):
+            if ok:
+                self._log({"op": "leave", "slot": slot_id, "ev": ev, "level": level})
+        self._maybe_snapshot()
+        return results
@@ -1,19 +1,46 @@
 from dataclasses import dataclass
 
+from domain.events import ChargeUpdated, LotResized, VehicleLeft, VehicleParked
+from domain.reservations import Reservation
+
 
 @dataclass
 class ParkResult:
     success: bool
     slot: int | None = None
     message: str = ""
+    level: int | None = None
+
+
+@dataclass
+class ReserveResult:
+    success: bool
+    reservation: Reservation | None = None
+    message: str = ""
+
+
+@dataclass
+class ParkRequest:
+    vehicle_type: str
+    regnum: str
+    make: str
+    model: str
+    color: str
+    electric: bool = False
+    level: int | None = None
 
 
 class ParkingPresenter:
-    def __init__(self, parking_lot, regular_factory, electric_factory, charging_client):
+    def __init__(self, parking_lot, regular_factory, electric_factory, charging_client,
+                 async_charging_client=None):
         self.parking_lot = parking_lot
         self.regular_factory = regular_factory
         self.electric_factory = electric_factory
         self.charging_client = charging_client
+        # optional AsyncChargingServiceClient used for the *_many calls
+        self.async_charging_client = async_charging_client
+        # a CachedChargingClient, whose cache the async calls must also keep current
+        self._status_cache = charging_client if hasattr(charging_client, "invalidate") else None
 
     # Lot creation
     def create_lot(self, capacity, ev_capacity, level):
@@ -23,20 +50,80 @@ class ParkingPresenter:
     def park_vehicle(self, factory, vehicle_type, regnum, make, model, color, level=None):
         vehicle = factory.create(vehicle_type, regnum, make, model, color)
         ev = hasattr(vehicle, "getCharge")
-        slot = self.parking_lot.park(vehicle, ev=ev, level=level)
+        try:
+            slot = self.parking_lot.park(vehicle, ev=ev, level=level)
+        except ValueError as e:
+            return ParkResult(False, None, str(e))
         if slot:
-            return ParkResult(True, slot, "")
+            return ParkResult(True, slot, "", self.parking_lot.get_level_by_reg(regnum))
         return ParkResult(False, None, "Parking is full")
 
+    def park_many(self, records):
+        # records are ParkRequest objects or tuples in ParkRequest field order
+        entries = []
+        for record in records:
+            if not isinstance(record, ParkRequest):
+                record = ParkRequest(*record)
+            factory = self.electric_factory if record.electric else self.regular_factory
+            vehicle = factory.create(
+                record.vehicle_type, record.regnum, record.make, record.model, record.color
+            )
+            entries.append((vehicle, bool(record.electric), record.level))
+
+        return [
+            ParkResult(slot is not None, slot, error or "", level)
+            for slot, level, error in self.parking_lot.park_many(entries)
+        ]
+
     # Remove
-    def remove_vehicle(self, slot_number):
-        success = self.parking_lot.leave(slot_number)
-        return success
+    def remove_vehicle(self, slot_number, level=None, ev=False):
+        if level is None:
+            return self.parking_lot.leave(slot_number, ev=ev)
+        return self.parking_lot.leave(slot_number, ev=ev, level=level)
+
+    def leave_many(self, slots):
+        # slots are slot numbers or (slot_number, level) pairs
+        entries = []
+        for slot in slots:
+            if isinstance(slot, tuple):
+                slot_number, level = slot
+            else:
+                slot_number, level = slot, None
+            entries.append((slot_number, False, level))
+        return self.parking_lot.leave_many(entries)
 
     # Status
     def get_status(self):
         return self.parking_lot.status()
 
+    def iter_status(self, level=None, vehicle_type=None, ev=None, snapshot=None):
+        # streams status rows without building the whole list
+        return self.parking_lot.iter_status(
+            level=level, ev=ev, vehicle_type=vehicle_type, snapshot=snapshot
+        )
+
+    def get_status_page(self, limit, cursor=None, level=None, vehicle_type=None, ev=None,
+                        snapshot=None):
+        # (rows, next_cursor); next_cursor is None on the last page
+        return self.parking_lot.status_page(
+            limit, cursor, level=level, ev=ev, vehicle_type=vehicle_type, snapshot=snapshot
+        )
+
+    def status_snapshot(self):
+        # isolation token: pages read with it ignore later changes
+        return self.parking_lot.status_snapshot()
+
+    def watch_status(self, maxsize=10_000):
+        # Returns (subscription, status). Subscribing first means the status
+        # plus the subscription's events describe every later change. The
+        # subscription drops events rather than stall the lot when its
+        # consumer falls behind; a consumer that sees dropped > 0 closes it
+        # and watches again.
+        subscription = self.parking_lot.events.subscribe_queue(
+            VehicleParked, VehicleLeft, LotResized, maxsize=maxsize, overflow="drop_newest"
+        )
+        return subscription, self.parking_lot.status()
+
     # Queries
     def get_slots_by_color(self, color):
         return self.parking_lot.get_slots_by_color(color)
@@ -47,6 +134,25 @@ class ParkingPresenter:
     def get_regs_by_color(self, color):
         return self.parking_lot.get_regs_by_color(color)
 
+    # Reservations; times are epoch seconds
+    def reserve_slot(self, regnum, start, end, electric=False, level=None):
+        try:
+            reservation = self.parking_lot.reserve(regnum, start, end, ev=electric, level=level)
+        except ValueError as e:
+            return ReserveResult(False, None, str(e))
+        if reservation is None:
+            return ReserveResult(False, None, "No slot is free for that time")
+        return ReserveResult(True, reservation)
+
+    def cancel_reservation(self, reservation_id):
+        return self.parking_lot.cancel_reservation(reservation_id)
+
+    def get_available_slots(self, start, end, electric=False, level=None):
+        return self.parking_lot.available_slots(start, end, ev=electric, level=level)
+
+    def get_reservations(self, start, end, level=None):
+        return self.parking_lot.get_reservations(start, end, level=level)
+
     # EV / Charging service integration
     def start_charging(self, regnum):
         try:
@@ -63,4 +169,78 @@ class ParkingPresenter:
             return False
 
     def get_charge_status(self, regnum):
-        return self.charging_client.get_status(regnum)
+        status = self.charging_client.get_status(regnum)
+        self._sync_charge(regnum, status)
+        return status
+
+    def _sync_charge(self, regnum, status):
+        # mirror the service's computed charge onto the parked vehicle
+        if not status or "charge" not in status:
+            return
+        set_charge = getattr(self.parking_lot, "set_charge", None)
+        if set_charge is not None:
+            # a ShardedLot: vehicles live in the shard processes
+            updated = set_charge(regnum, status["charge"])
+        else:
+            vehicle = self.parking_lot.get_vehicle_by_reg(regnum)
+            updated = vehicle is not None and hasattr(vehicle, "setCharge")
+            if updated:
+                vehicle.setCharge(status["charge"])
+        if updated:
+            events = self.parking_lot.events
+            if events:
+                events.publish(ChargeUpdated(regnum, status["charge"]))
+
+    # Batch charging: one :batch request per BATCH_SIZE regnums (sent
+    # concurrently when an async client is configured) instead of N round trips
+    def start_charging_many(self, regnums):
+        regnums = list(regnums)
+        if self.async_charging_client is None:
+            return self.charging_client.start_charging_batch(regnums)
+        client = self.async_charging_client
+        try:
+            return client.run(client.start_batch(regnums))
+        finally:
+            # after the change, so a status read meanwhile is not kept
+            if self._status_cache is not None:
+                self._status_cache.invalidate(*regnums)
+
+    def stop_charging_many(self, regnums):
+        regnums = list(regnums)
+        if self.async_charging_client is None:
+            return self.charging_client.stop_charging_batch(regnums)
+        client = self.async_charging_client
+        try:
+            return client.run(client.stop_batch(regnums))
+        finally:
+            # after the change, so a status read meanwhile is not kept
+            if self._status_cache is not None:
+                self._status_cache.invalidate(*regnums)
+
+    def get_charge_status_many(self, regnums):
+        regnums = list(regnums)
+        if self.async_charging_client is None:
+            statuses = self.charging_client.get_status_batch(regnums)
+        elif self._status_cache is None:
+            client = self.async_charging_client
+            statuses = client.run(client.status_batch(regnums))
+        else:
+            # only the regnums missing from the cache go to the service
+            statuses, missing, generation = self._status_cache.cached_statuses(regnums)
+            if missing:
+                client = self.async_charging_client
+                fetched = client.run(client.status_batch(missing))
+                self._status_cache.store(fetched, generation)
+                statuses.update(fetched)
+            statuses = {regnum: statuses.get(regnum) for regnum in regnums}
+        for regnum, status in statuses.items():
+            self._sync_charge(regnum, status)
+        return statuses
+
+    def get_ev_charge_statuses(self):
+        # charge status for every EV currently parked
+        regnums = [
+            vehicle.regnum for _, _, vehicle in self.parking_lot.status()
+            if hasattr(vehicle, "getCharge")
+        ]
+        return self.get_charge_status_many(regnums)
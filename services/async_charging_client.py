@@ -0,0 +1,241 @@
+import asyncio
+import json
+import threading
+from urllib.parse import quote, urlsplit
+
+from services.charging_client import ChargingServiceClient, ClientMetrics
+
+
+class AsyncChargingServiceClient:
+    """asyncio client for the charging service with bounded concurrent fan-out.
+
+    Coroutines can be awaited from any event loop. Synchronous callers (the
+    presenter, UI worker threads) use ``run()``, which executes them on a
+    private background loop so keep-alive connections survive between calls.
+    """
+
+    BASE_URL = ChargingServiceClient.BASE_URL
+
+    def __init__(self, base_url=None, max_concurrency=100, timeout=5.0, pool_size=None):
+        self.base_url = base_url or self.BASE_URL
+        parts = urlsplit(self.base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.pool_size = pool_size or max_concurrency
+        self.metrics = ClientMetrics()
+
+        # connections and the semaphore belong to one event loop
+        self._bound_loop = None
+        self._idle = []
+        self._semaphore = None
+
+        self._runner_loop = None
+        self._runner_lock = threading.Lock()
+
+    # Running from synchronous code
+
+    def run(self, coro):
+        with self._runner_lock:
+            if self._runner_loop is None:
+                self._runner_loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._runner_loop.run_forever,
+                    name="charging-client-loop",
+                    daemon=True,
+                ).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._runner_loop).result()
+
+    def close(self):
+        if self._runner_loop is not None:
+            self.run(self.aclose())
+            self._runner_loop.call_soon_threadsafe(self._runner_loop.stop)
+            self._runner_loop = None
+
+    async def aclose(self):
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+    # Connection handling
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._bound_loop:
+            # streams from another loop cannot be used here; start afresh
+            for _, writer in self._idle:
+                try:
+                    writer.close()
+                except RuntimeError:
+                    pass  # that loop is already closed
+            self._idle = []
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._bound_loop = loop
+
+    async def _acquire(self):
+        if self._idle:
+            reader, writer = self._idle.pop()
+            return reader, writer, True
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        return reader, writer, False
+
+    def _release(self, reader, writer):
+        if len(self._idle) < self.pool_size:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+
+    async def _exchange(self, reader, writer, method, path, body):
+        head = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            f"Content-Length: {len(body)}",
+        ]
+        if body:
+            head.append("Content-Type: application/json")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+        version, status = status_line.split(None, 2)[:2]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get("connection", "").lower() != "close" and version == b"HTTP/1.1"
+        if "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            data = b""
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                chunk = await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                data += chunk[:-2]
+        else:
+            data = await reader.read()
+            keep_alive = False
+        return int(status), data, keep_alive
+
+    async def _request(self, method, path, payload=None, metric=None):
+        # Returns (status, parsed JSON or None); raises OSError/TimeoutError
+        self._bind_loop()
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            start = loop.time()
+            try:
+                status, data = await asyncio.wait_for(
+                    self._send(method, path, body), self.timeout
+                )
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                self.metrics.record(metric or path, loop.time() - start, error=True)
+                raise
+            self.metrics.record(metric or path, loop.time() - start, error=status >= 500)
+        try:
+            return status, json.loads(data) if data else None
+        except ValueError:
+            return status, None
+
+    async def _send(self, method, path, body):
+        while True:
+            reader, writer, reused = await self._acquire()
+            try:
+                status, data, keep_alive = await self._exchange(reader, writer, method, path, body)
+            except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+                writer.close()
+                if reused:
+                    continue  # stale keep-alive connection; retry on a fresh one
+                raise
+            except BaseException:
+                # includes cancellation by the timeout: the stream is mid-response
+                writer.close()
+                raise
+            if keep_alive:
+                self._release(reader, writer)
+            else:
+                writer.close()
+            return status, data
+
+    # Single-vehicle calls
+
+    async def start_charging(self, regnum):
+        try:
+            status, _ = await self._request(
+                "POST", "/charge/start", {"regnum": regnum}, metric="/charge/start"
+            )
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            return False
+        return status < 400
+
+    async def stop_charging(self, regnum):
+        try:
+            status, _ = await self._request(
+                "POST", "/charge/stop", {"regnum": regnum}, metric="/charge/stop"
+            )
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            return False
+        return status < 400
+
+    async def get_status(self, regnum):
+        try:
+            status, data = await self._request(
+                "GET", f"/charge/status/{quote(regnum, safe='')}", metric="/charge/status"
+            )
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            return None
+        return data if status == 200 else None
+
+    # Fan-out; concurrency is bounded by max_concurrency
+
+    async def start_many(self, regnums):
+        return list(await asyncio.gather(*(self.start_charging(r) for r in regnums)))
+
+    async def stop_many(self, regnums):
+        return list(await asyncio.gather(*(self.stop_charging(r) for r in regnums)))
+
+    async def status_many(self, regnums):
+        regnums = list(regnums)
+        results = await asyncio.gather(*(self.get_status(r) for r in regnums))
+        return dict(zip(regnums, results))
+
+    # :batch endpoints; chunks of BATCH_SIZE regnums are sent concurrently
+
+    BATCH_SIZE = ChargingServiceClient.BATCH_SIZE
+
+    async def _batch(self, endpoint, regnums):
+        async def send(chunk):
+            try:
+                status, data = await self._request(
+                    "POST", endpoint, {"regnums": chunk}, metric=endpoint
+                )
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                return [None] * len(chunk)
+            if status == 200 and data:
+                return data["results"]
+            return [None] * len(chunk)
+
+        chunks = [regnums[i:i + self.BATCH_SIZE] for i in range(0, len(regnums), self.BATCH_SIZE)]
+        parts = await asyncio.gather(*(send(chunk) for chunk in chunks))
+        return [result for part in parts for result in part]
+
+    async def start_batch(self, regnums):
+        results = await self._batch("/charge/start:batch", list(regnums))
+        return [bool(r) and "error" not in r for r in results]
+
+    async def stop_batch(self, regnums):
+        results = await self._batch("/charge/stop:batch", list(regnums))
+        return [bool(r) and "error" not in r for r in results]
+
+    async def status_batch(self, regnums):
+        regnums = list(regnums)
+        results = await self._batch("/charge/status:batch", regnums)
+        return {regnum: (r or {}).get("session") for regnum, r in zip(regnums, results)}
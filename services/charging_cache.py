@@ -0,0 +1,223 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    # one get_status call in progress; callers asking for the same regnum
+    # meanwhile wait for it instead of sending their own
+    __slots__ = ("done", "result", "cacheable")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.cacheable = True
+
+
+class CachedChargingClient:
+    """ChargingServiceClient with a TTL + LRU cache in front of get_status.
+
+    Statuses are kept for ttl seconds, at most maxsize of them, least
+    recently used evicted first. Concurrent get_status calls for a regnum
+    that is not cached share one request. start/stop through this client
+    invalidate the regnum before and after the call, and a fetch that was
+    in flight when it was invalidated is not cached. Failed lookups (None)
+    are never cached.
+    Everything else is delegated to the wrapped client. Given a
+    MetricsRegistry, lookups are also counted there by result.
+    """
+
+    def __init__(self, client, ttl=2.0, maxsize=10_000, clock=time.monotonic, registry=None):
+        self.client = client
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries = OrderedDict()   # regnum -> (expires_at, status)
+        self._flights = {}              # regnum -> _Flight
+        self._generation = 0            # bumped by every invalidate()
+        self._invalidated = {}          # regnum -> generation it was last invalidated in
+        self._forgotten = 0             # generations up to here are no longer in _invalidated
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._counters = None
+        if registry is not None:
+            family = registry.rolling(
+                "charging_status_cache", "Charging status lookups by cache result", ("result",))
+            self._counters = {result: family.labels(result) for result in ("hit", "miss", "coalesced")}
+
+    def _count(self, result, amount=1):
+        if self._counters is not None and amount:
+            self._counters[result].add(amount)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
+
+    # Cache
+
+    def _lookup(self, regnum, now):
+        # cached status or None; the caller holds the lock
+        entry = self._entries.get(regnum)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[regnum]
+            return None
+        self._entries.move_to_end(regnum)
+        return entry[1]
+
+    def _store(self, regnum, status, now):
+        # the caller holds the lock
+        if status is None:
+            return
+        self._entries[regnum] = (now + self.ttl, status)
+        self._entries.move_to_end(regnum)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, *regnums):
+        with self._lock:
+            self._generation += 1
+            if len(self._invalidated) + len(regnums) > self.maxsize:
+                # batch fetches that began before now are no longer cached
+                self._invalidated.clear()
+                self._forgotten = self._generation
+            for regnum in regnums:
+                self._invalidated[regnum] = self._generation
+                self._entries.pop(regnum, None)
+                flight = self._flights.pop(regnum, None)
+                if flight is not None:
+                    # its answer may predate the change; later callers start afresh
+                    flight.cacheable = False
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def cached_statuses(self, regnums):
+        # (cached {regnum: status}, regnums to fetch, generation), counting
+        # hits and misses; for callers that fetch the misses themselves, then
+        # store() them with the generation
+        found, missing = {}, []
+        with self._lock:
+            generation = self._generation
+            now = self.clock()
+            for regnum in regnums:
+                status = self._lookup(regnum, now)
+                if status is None:
+                    missing.append(regnum)
+                else:
+                    found[regnum] = status
+            self.hits += len(found)
+            self.misses += len(missing)
+        self._count("hit", len(found))
+        self._count("miss", len(missing))
+        return found, missing, generation
+
+    def store(self, statuses, generation):
+        # statuses of regnums invalidated since `generation` may predate the
+        # change and are skipped
+        with self._lock:
+            if generation < self._forgotten:
+                return
+            now = self.clock()
+            for regnum, status in statuses.items():
+                if regnum not in self._flights and self._invalidated.get(regnum, 0) <= generation:
+                    self._store(regnum, status, now)
+
+    # ChargingServiceClient interface
+
+    def get_status(self, regnum):
+        with self._lock:
+            status = self._lookup(regnum, self.clock())
+            if status is not None:
+                self.hits += 1
+                result = "hit"
+            else:
+                flight = self._flights.get(regnum)
+                if flight is not None:
+                    self.coalesced += 1
+                    result = "coalesced"
+                else:
+                    flight = self._flights[regnum] = _Flight()
+                    self.misses += 1
+                    result = "miss"
+        self._count(result)
+
+        if result == "hit":
+            return status
+        if result == "coalesced":
+            flight.done.wait()
+            return flight.result
+
+        try:
+            flight.result = self.client.get_status(regnum)
+        finally:
+            with self._lock:
+                if self._flights.get(regnum) is flight:
+                    del self._flights[regnum]
+                if flight.cacheable:
+                    self._store(regnum, flight.result, self.clock())
+            flight.done.set()
+        return flight.result
+
+    def get_status_batch(self, regnums):
+        regnums = list(regnums)
+        found, missing, generation = self.cached_statuses(regnums)
+        if missing:
+            fetched = self.client.get_status_batch(missing)
+            self.store(fetched, generation)
+            found.update(fetched)
+        return {regnum: found.get(regnum) for regnum in regnums}
+
+    # Writes invalidate before the call, so fetches already in flight are
+    # not cached, and again after it, so neither is one that started
+    # meanwhile and read the service before the change
+
+    def start_charging(self, regnum):
+        self.invalidate(regnum)
+        try:
+            return self.client.start_charging(regnum)
+        finally:
+            self.invalidate(regnum)
+
+    def stop_charging(self, regnum):
+        self.invalidate(regnum)
+        try:
+            return self.client.stop_charging(regnum)
+        finally:
+            self.invalidate(regnum)
+
+    def start_charging_batch(self, regnums):
+        regnums = list(regnums)
+        self.invalidate(*regnums)
+        try:
+            return self.client.start_charging_batch(regnums)
+        finally:
+            self.invalidate(*regnums)
+
+    def stop_charging_batch(self, regnums):
+        regnums = list(regnums)
+        self.invalidate(*regnums)
+        try:
+            return self.client.stop_charging_batch(regnums)
+        finally:
+            self.invalidate(*regnums)
@@ -1,22 +1,170 @@
+import http.client
 import json
-import urllib.request
-import urllib.error
+import socket
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+
+class ClientMetrics:
+    """Per-endpoint call counts, error counts and latency histograms."""
+
+    # upper bounds of the latency buckets, in milliseconds
+    BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, seconds, error=False):
+        ms = seconds * 1000
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    "count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "buckets": [0] * len(self.BUCKETS_MS),
+                }
+            stats["count"] += 1
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+            if error:
+                stats["errors"] += 1
+            for i, bound in enumerate(self.BUCKETS_MS):
+                if ms <= bound:
+                    stats["buckets"][i] += 1
+                    break
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for endpoint, stats in self._endpoints.items():
+                result[endpoint] = dict(
+                    stats,
+                    buckets=list(stats["buckets"]),
+                    mean_ms=stats["total_ms"] / stats["count"],
+                )
+            return result
+
+
+class ConnectionPool:
+    """Keep-alive HTTP/1.1 connections to one host, reused across calls."""
+
+    def __init__(self, host, port, maxsize=8, connect_timeout=2.0, read_timeout=5.0):
+        self.host = host
+        self.port = port
+        self.maxsize = maxsize
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # returns (connection, reused)
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.connect_timeout)
+        conn.connect()
+        conn.sock.settimeout(self.read_timeout)
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn, False
+
+    def release(self, conn):
+        with self._lock:
+            if len(self._idle) < self.maxsize:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+# a reused keep-alive connection the server already closed fails with one of
+# these before the request is processed, so it is always safe to resend once
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError,
+)
+
 
 class ChargingServiceClient:
     BASE_URL = "http://localhost:5001"
+    # must not exceed MAX_BATCH_SIZE in ev_charging_service.py
+    BATCH_SIZE = 1000
 
-    def _post(self, endpoint, payload):
-        data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(
-            f"{self.BASE_URL}{endpoint}",
-            data=data,
-            headers={"Content-Type": "application/json"},
-            method="POST"
+    def __init__(self, base_url=None, pool_size=8, connect_timeout=2.0,
+                 read_timeout=5.0, retries=2, backoff=0.05):
+        self.base_url = base_url or self.BASE_URL
+        parts = urlsplit(self.base_url)
+        self.pool = ConnectionPool(
+            parts.hostname, parts.port or 80, pool_size, connect_timeout, read_timeout
         )
+        self.retries = retries
+        self.backoff = backoff
+        self.metrics = ClientMetrics()
+
+    def close(self):
+        self.pool.close()
+
+    def _request(self, method, path, payload=None, metric=None, idempotent=False):
+        # Returns (status, parsed JSON body or None). Raises OSError or
+        # http.client.HTTPException once retries are exhausted.
+        body = None
+        headers = {}
+        if payload is not None:
+            body = json.dumps(payload).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+
+        attempts = 1 + (self.retries if idempotent else 0)
+        attempt = 0
+        start = time.perf_counter()
+        while True:
+            conn = None
+            reused = False
+            try:
+                conn, reused = self.pool.acquire()
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                if conn is not None:
+                    conn.close()
+                if reused and isinstance(e, STALE_CONNECTION_ERRORS):
+                    continue  # server dropped an idle connection; not a real attempt
+                attempt += 1
+                if attempt >= attempts:
+                    self.metrics.record(metric or path, time.perf_counter() - start, error=True)
+                    raise
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+                continue
+
+            if response.will_close:
+                conn.close()
+            else:
+                self.pool.release(conn)
+            self.metrics.record(
+                metric or path, time.perf_counter() - start, error=response.status >= 500
+            )
+            try:
+                parsed = json.loads(data) if data else None
+            except ValueError:
+                parsed = None  # e.g. an HTML error page from a proxy
+            return response.status, parsed
+
+    def _post(self, endpoint, payload):
         try:
-            urllib.request.urlopen(req)
-        except urllib.error.URLError as e:
+            status, data = self._request("POST", endpoint, payload, metric=endpoint)
+        except (OSError, http.client.HTTPException) as e:
             print("[Charging Service Error]", e)
+            return None
+        if status >= 400:
+            print("[Charging Service Error]", status, data)
+            return None
+        return data
 
     def start_charging(self, regnum):
         self._post("/charge/start", {"regnum": regnum})
@@ -26,9 +174,49 @@ class ChargingServiceClient:
 
     def get_status(self, regnum):
         try:
-            with urllib.request.urlopen(
-                f"{self.BASE_URL}/charge/status/{regnum}"
-            ) as response:
-                return json.loads(response.read())
-        except urllib.error.URLError:
+            status, data = self._request(
+                "GET", f"/charge/status/{quote(regnum, safe='')}",
+                metric="/charge/status", idempotent=True,
+            )
+        except (OSError, http.client.HTTPException):
+            return None
+        if status != 200:
             return None
+        return data
+
+    # Batch calls: one request per BATCH_SIZE regnums, per-item results
+
+    def _batch(self, endpoint, regnums, idempotent=False):
+        # Returns the service's per-item result dicts, or None for every item
+        # of a chunk whose request failed
+        results = []
+        for i in range(0, len(regnums), self.BATCH_SIZE):
+            chunk = regnums[i:i + self.BATCH_SIZE]
+            try:
+                status, data = self._request(
+                    "POST", endpoint, {"regnums": chunk}, metric=endpoint, idempotent=idempotent
+                )
+            except (OSError, http.client.HTTPException) as e:
+                print("[Charging Service Error]", e)
+                status, data = None, None
+            if status == 200 and data:
+                results.extend(data["results"])
+            else:
+                results.extend([None] * len(chunk))
+        return results
+
+    def start_charging_batch(self, regnums):
+        results = self._batch("/charge/start:batch", list(regnums))
+        return [bool(r) and "error" not in r for r in results]
+
+    def stop_charging_batch(self, regnums):
+        results = self._batch("/charge/stop:batch", list(regnums))
+        return [bool(r) and "error" not in r for r in results]
+
+    def get_status_batch(self, regnums):
+        regnums = list(regnums)
+        results = self._batch("/charge/status:batch", regnums, idempotent=True)
+        return {
+            regnum: (r or {}).get("session")
+            for regnum, r in zip(regnums, results)
+        }
@@ -0,0 +1,165 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import signal
+import socket
+import threading
+import time
+import traceback
+
+from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler
+
+import services.ev_charging_service as service
+from services.session_store import SharedMemoryStore, open_store
+
+
+# Production launcher for the charging service: binds one listening socket,
+# forks worker processes that accept from it, and shares sessions between
+# them through a SessionStore. ev_charging_service.py's __main__ remains the
+# single-process development server.
+
+
+class ProductionRequestHandler(WSGIRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    # idle keep-alive connections are closed after this many seconds, which
+    # also bounds how long a draining worker waits for them
+    timeout = 5.0
+
+    def handle_one_request(self):
+        super().handle_one_request()
+        if self.server.draining:
+            self.close_connection = True
+
+    def log_request(self, code="-", size="-"):
+        if self.server.access_log:
+            super().log_request(code, size)
+
+
+class WorkerServer(ThreadedWSGIServer):
+    # request threads are joined on close so in-flight requests finish
+    daemon_threads = False
+    block_on_close = True
+    draining = False
+    access_log = False
+
+
+def serve_worker(listener, app, access_log=False):
+    host, port = listener.getsockname()[:2]
+    server = WorkerServer(host, port, app, handler=ProductionRequestHandler, fd=listener.fileno())
+    server.access_log = access_log
+
+    def drain(signum, frame):
+        # shutdown() blocks until serve_forever returns, so not from this thread
+        server.draining = True
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, drain)
+    signal.signal(signal.SIGINT, drain)
+    server.serve_forever(poll_interval=0.2)
+    server.server_close()
+
+
+def open_listener(host, port, backlog):
+    listener = socket.create_server((host, port), backlog=backlog)
+    listener.set_inheritable(True)
+    return listener
+
+
+def create_store(spec, workers):
+    if spec == "shm":
+        return SharedMemoryStore(capacity=1 << 18)
+    if spec == "memory" and workers > 1:
+        raise SystemExit("--store memory cannot be shared by several workers; use shm or sqlite:<path>")
+    return open_store(spec)
+
+
+def run(host="127.0.0.1", port=5001, workers=4, store="shm", backlog=4096,
+        graceful_timeout=10.0, access_log=False):
+    if service.engine.scheduler is not None and workers > 1:
+        raise SystemExit("CHARGING_SITE_KW needs a single worker: the power budget is kept in-process")
+    listener = open_listener(host, port, backlog)
+    service.engine.store = create_store(store, workers)
+    print(f"Charging service on http://{host}:{listener.getsockname()[1]} "
+          f"({workers} workers, store={store})", flush=True)
+
+    if workers == 1 or not hasattr(os, "fork"):
+        try:
+            serve_worker(listener, service.app, access_log)
+        finally:
+            service.engine.store.close()
+            listener.close()
+        return
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                serve_worker(listener, service.app, access_log)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        return pid
+
+    children = {spawn() for _ in range(workers)}
+    try:
+        while not stopping:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if pid in children:
+                # a worker died; replace it
+                children.discard(pid)
+                children.add(spawn())
+            else:
+                time.sleep(0.2)
+    finally:
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + graceful_timeout
+        while children and time.monotonic() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                children.discard(pid)
+            else:
+                time.sleep(0.05)
+        for pid in children:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        service.engine.store.close()
+        listener.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the charging service with pre-forked workers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--store", default="shm",
+                        help="shm (default), sqlite:<path>, or memory with a single worker")
+    parser.add_argument("--backlog", type=int, default=4096)
+    parser.add_argument("--graceful-timeout", type=float, default=10.0,
+                        help="seconds workers get to finish in-flight requests on SIGTERM")
+    parser.add_argument("--access-log", action="store_true")
+    args = parser.parse_args()
+    run(args.host, args.port, args.workers, args.store, args.backlog,
+        args.graceful_timeout, args.access_log)
+
+
+if __name__ == "__main__":
+    main()
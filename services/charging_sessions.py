@@ -0,0 +1,112 @@
+import time
+from dataclasses import replace
+
+from services.session_store import ChargingSession, StripedMemoryStore
+
+
+class ChargingSessionEngine:
+    """Charging sessions whose charge level is derived from elapsed time.
+
+    Nothing runs between requests: a session stores when it started, the
+    charger power and the battery size, and ``status()`` computes the charge
+    from those. Sessions live in a SessionStore (lock-striped memory by
+    default), which also answers "which sessions finish next" without
+    looking at every session.
+
+    With a PowerScheduler, sessions share the site's power budget instead:
+    power_kw is then the charger's rating, the scheduler decides what each
+    session actually draws, and charge is read from the energy it reports.
+    """
+
+    DEFAULT_POWER_KW = 7.4
+    DEFAULT_CAPACITY_KWH = 60.0
+
+    def __init__(self, clock=time.time, store=None, scheduler=None):
+        self.clock = clock
+        self.store = store if store is not None else StripedMemoryStore()
+        self.scheduler = scheduler
+
+    def start(self, regnum, power_kw=None, capacity_kwh=None, initial_charge=0.0,
+              departure=None, priority=0):
+        power_kw = float(power_kw or self.DEFAULT_POWER_KW)
+        capacity_kwh = float(capacity_kwh or self.DEFAULT_CAPACITY_KWH)
+        if power_kw <= 0 or capacity_kwh <= 0:
+            raise ValueError("power_kw and capacity_kwh must be positive")
+        departure = None if departure is None else float(departure)
+        priority = int(priority or 0)
+        session = ChargingSession(
+            regnum,
+            self.clock(),
+            power_kw,
+            capacity_kwh,
+            min(100.0, max(0.0, float(initial_charge or 0.0))),
+        )
+        self.store.start(session)
+        if self.scheduler is not None:
+            need_kwh = (100.0 - session.initial_charge) / 100 * capacity_kwh
+            self.scheduler.start(regnum, power_kw, need_kwh, departure, priority,
+                                 now=session.started_at)
+        return session
+
+    def stop(self, regnum):
+        # (session or None, whether this call stopped it), like SessionStore.stop
+        now = self.clock()
+        if self.scheduler is not None:
+            energy = self.scheduler.stop(regnum, now)
+            session = self.store.get(regnum)
+            if energy is not None and session is not None and session.status == "charging":
+                # stored with the average power drawn, so charge_at() gives
+                # the charge reached from here on
+                hours = (now - session.started_at) / 3600
+                if energy > 0 and hours > 0:
+                    self.store.start(replace(session, power_kw=energy / hours))
+                else:
+                    now = session.started_at
+        return self.store.stop(regnum, now)
+
+    def get(self, regnum):
+        return self.store.get(regnum)
+
+    def status(self, regnum):
+        session = self.store.get(regnum)
+        if session is None:
+            return None
+        now = self.clock()
+        if self.scheduler is not None and session.status == "charging":
+            energy = self.scheduler.energy(regnum, now)
+            if energy is not None:
+                return self._describe_scheduled(session, energy, now)
+        return self._describe(session, now)
+
+    def _describe_scheduled(self, session, energy, now):
+        charge = min(100.0, session.initial_charge + energy / session.capacity_kwh * 100)
+        return {
+            "status": "complete" if charge >= 100.0 else "charging",
+            "charge": round(charge, 1),
+            "power_kw": self.scheduler.power(session.regnum, now),
+            "capacity_kwh": session.capacity_kwh,
+            "started_at": session.started_at,
+            "estimated_completion": (
+                self.scheduler.completes_at(session.regnum, now) if charge < 100.0 else None
+            ),
+        }
+
+    def _describe(self, session, now):
+        charge = session.charge_at(now)
+        status = session.status
+        if status == "charging" and charge >= 100.0:
+            status = "complete"
+        return {
+            "status": status,
+            "charge": round(charge, 1),
+            "power_kw": session.power_kw,
+            "capacity_kwh": session.capacity_kwh,
+            "started_at": session.started_at,
+            "estimated_completion": session.completes_at() if status == "charging" else None,
+        }
+
+    def completing_soonest(self, limit=10):
+        # active sessions that have not finished yet, soonest first
+        if self.scheduler is not None:
+            return self.scheduler.completing_soonest(limit, self.clock())
+        return self.store.completing_soonest(self.clock(), limit)
@@ -1,19 +1,83 @@
-from flask import Flask, request, jsonify
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, Response, request, jsonify
+
+from services.charging_sessions import ChargingSessionEngine
+from services.power_scheduler import make_scheduler
+from services.session_store import open_store
+from monitoring.metrics import CONTENT_TYPE, MetricsRegistry
 
 app = Flask(__name__)
 
-# In-memory storage (simulates service DB)
-charging_sessions = {}
+# Session storage (simulates service DB); charge is computed when read.
+# CHARGING_STORE=sqlite:<path> shares sessions between server processes.
+# CHARGING_SITE_KW=<kW> shares that much power between active sessions,
+# allocated by CHARGING_POLICY (fair, priority or edf); single process only.
+site_kw = os.environ.get("CHARGING_SITE_KW")
+engine = ChargingSessionEngine(
+    store=open_store(os.environ.get("CHARGING_STORE", "memory")),
+    scheduler=make_scheduler(os.environ.get("CHARGING_POLICY", "fair"), float(site_kw)) if site_kw else None,
+)
+
+# Rolling counts for GET /metrics; under charging_server each worker
+# process counts the requests it served
+metrics = MetricsRegistry()
+sessions_started = metrics.rolling("charging_sessions_started", "Charging sessions started").labels()
+sessions_stopped = metrics.rolling("charging_sessions_stopped", "Charging sessions stopped").labels()
+
+# Largest number of regnums accepted by one :batch request
+MAX_BATCH_SIZE = 1000
+
+# Request bodies above this are rejected with 413 before being parsed;
+# a full batch of regnums is well under it
+app.config["MAX_CONTENT_LENGTH"] = 256 * 1024
+
+
+@app.errorhandler(413)
+def request_too_large(error):
+    return jsonify({"error": "Request body too large"}), 413
+
+
+def _batch_regnums():
+    # Returns (regnums, None) or (None, error response) for a :batch request
+    data = request.get_json(silent=True) or {}
+    regnums = data.get("regnums")
+    if not isinstance(regnums, list):
+        return None, (jsonify({"error": "Expected a JSON body with a 'regnums' list"}), 400)
+    if len(regnums) > MAX_BATCH_SIZE:
+        return None, (jsonify({
+            "error": f"Batch too large: {len(regnums)} regnums, limit is {MAX_BATCH_SIZE}"
+        }), 413)
+    return regnums, None
+
+def _stop(regnum):
+    # True if a session was found; only the stop that ended a charging one
+    # is counted, however many arrive at once
+    session, stopped = engine.stop(regnum)
+    if stopped:
+        sessions_stopped.add()
+    return session is not None
+
 
 @app.route("/charge/start", methods=["POST"])
 def start_charging():
     data = request.json
     regnum = data.get("regnum")
 
-    charging_sessions[regnum] = {
-        "status": "charging",
-        "charge": 0
-    }
+    try:
+        engine.start(
+            regnum,
+            power_kw=data.get("power_kw"),
+            capacity_kwh=data.get("capacity_kwh"),
+            initial_charge=data.get("initial_charge"),
+            departure=data.get("departure"),
+            priority=data.get("priority"),
+        )
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid charging parameters"}), 400
+    sessions_started.add()
 
     return jsonify({
         "message": f"Charging started for {regnum}"
@@ -22,7 +86,7 @@ def start_charging():
 
 @app.route("/charge/status/<regnum>", methods=["GET"])
 def charging_status(regnum):
-    session = charging_sessions.get(regnum)
+    session = engine.status(regnum)
 
     if not session:
         return jsonify({"error": "Vehicle not found"}), 404
@@ -35,13 +99,107 @@ def stop_charging():
     data = request.json
     regnum = data.get("regnum")
 
-    if regnum in charging_sessions:
-        charging_sessions[regnum]["status"] = "stopped"
+    if not _stop(regnum):
+        return jsonify({"error": "Vehicle not found"}), 404
 
     return jsonify({
         "message": f"Charging stopped for {regnum}"
     }), 200
 
 
+@app.route("/charge/completing", methods=["GET"])
+def completing_soonest():
+    limit = request.args.get("limit", 10, type=int)
+    sessions = engine.completing_soonest(max(0, min(limit, MAX_BATCH_SIZE)))
+    return jsonify({
+        "sessions": [
+            {"regnum": regnum, "estimated_completion": completes_at}
+            for regnum, completes_at in sessions
+        ]
+    }), 200
+
+
+@app.route("/charge/power", methods=["GET"])
+def site_power():
+    scheduler = engine.scheduler
+    if scheduler is None:
+        return jsonify({"error": "No site power budget configured"}), 404
+    scheduler.advance()
+    return jsonify({
+        "policy": scheduler.policy,
+        "budget_kw": scheduler.budget_kw,
+        "allocated_kw": scheduler.allocated_kw,
+        "active_sessions": len(scheduler),
+    }), 200
+
+
+@app.route("/metrics", methods=["GET"])
+def export_metrics():
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+
+@app.route("/charge/start:batch", methods=["POST"])
+def start_charging_batch():
+    regnums, error = _batch_regnums()
+    if error:
+        return error
+
+    results = []
+    for regnum in regnums:
+        if not isinstance(regnum, str):
+            results.append({"regnum": regnum, "error": "Invalid regnum"})
+            continue
+        try:
+            engine.start(regnum)
+        except Exception as e:
+            # one failure (e.g. a full session store) must not lose the other results
+            results.append({"regnum": regnum, "error": f"Could not start charging: {e}"})
+            continue
+        sessions_started.add()
+        results.append({"regnum": regnum, "message": f"Charging started for {regnum}"})
+
+    return jsonify({"results": results}), 200
+
+
+@app.route("/charge/stop:batch", methods=["POST"])
+def stop_charging_batch():
+    regnums, error = _batch_regnums()
+    if error:
+        return error
+
+    results = []
+    for regnum in regnums:
+        if not isinstance(regnum, str):
+            results.append({"regnum": regnum, "error": "Invalid regnum"})
+            continue
+        if not _stop(regnum):
+            results.append({"regnum": regnum, "error": "Vehicle not found"})
+            continue
+        results.append({"regnum": regnum, "message": f"Charging stopped for {regnum}"})
+
+    return jsonify({"results": results}), 200
+
+
+@app.route("/charge/status:batch", methods=["POST"])
+def charging_status_batch():
+    regnums, error = _batch_regnums()
+    if error:
+        return error
+
+    results = []
+    for regnum in regnums:
+        session = engine.status(regnum) if isinstance(regnum, str) else None
+        if not session:
+            results.append({"regnum": regnum, "error": "Vehicle not found"})
+        else:
+            results.append({"regnum": regnum, "session": session})
+
+    return jsonify({"results": results}), 200
+
+
 if __name__ == "__main__":
-    app.run(port=5001)
+    from werkzeug.serving import WSGIRequestHandler
+
+    # HTTP/1.1 lets ChargingServiceClient keep its pooled connections alive
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+    app.run(port=5001, threaded=True)
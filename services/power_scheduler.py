@@ -0,0 +1,447 @@
+import bisect
+import heapq
+import itertools
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+
+# Below this many kW a remainder of the budget is treated as used up
+_EPSILON_KW = 1e-9
+
+
+class _Session:
+    __slots__ = (
+        "regnum", "max_kw", "need_kwh", "departure", "tier", "seq", "active", "done_at",
+        "energy", "group", "joined", "power", "since", "version",
+    )
+
+    def __init__(self, regnum, max_kw, need_kwh, departure, tier, seq):
+        self.regnum = regnum
+        self.max_kw = max_kw
+        self.need_kwh = need_kwh    # energy to a full battery; inf if unknown
+        self.departure = departure
+        self.tier = tier
+        self.seq = seq
+        self.active = True
+        self.done_at = None         # when the battery became full
+        self.energy = 0.0           # kWh delivered, as of `since` while active
+        self.group = None           # fair share: _Group the session draws from
+        self.joined = 0.0           # fair share: the group's `delivered` on joining
+        self.power = 0.0            # earliest departure: kW allocated
+        self.since = 0.0            # earliest departure: when energy was settled
+        self.version = 0            # earliest departure: invalidates completion entries
+
+
+class PowerScheduler(ABC):
+    """Divides a site's power budget between active charging sessions.
+
+    Sessions charge at their allocation until their battery is full, after
+    which their power goes back to the others. Nothing runs in the
+    background: every call first advances the schedule to `now`, handling
+    the completions that fell in between in time order, and a start or stop
+    only adjusts what that event changes. Thread safe; all state lives in
+    this process.
+    """
+
+    policy = None
+
+    def __init__(self, budget_kw, clock=time.time):
+        if budget_kw < 0:
+            raise ValueError("budget_kw must not be negative")
+        self.budget_kw = float(budget_kw)
+        self.clock = clock
+        self.now = None             # time the schedule has been advanced to
+        self.sessions = {}          # regnum -> _Session, until stopped
+        self.active = 0
+        self.allocated_kw = 0.0
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self.active
+
+    def __contains__(self, regnum):
+        return regnum in self.sessions
+
+    # Policy hooks; the scheduler has been advanced to `now` when they run
+
+    @abstractmethod
+    def _add(self, session, now):
+        """Make an active session draw power at the next re-plan."""
+
+    @abstractmethod
+    def _remove(self, session, now):
+        """Forget an active session; its energy has been recorded."""
+
+    @abstractmethod
+    def _replan(self, now):
+        """Reallocate the budget after sessions or the budget changed."""
+
+    @abstractmethod
+    def _settle(self, now):
+        """Account for energy delivered between self.now and now."""
+
+    @abstractmethod
+    def _next_completion(self):
+        """(time, session) of the next battery to fill up, or (inf, None)."""
+
+    @abstractmethod
+    def _delivered(self, session):
+        """kWh delivered to an active session as of self.now."""
+
+    @abstractmethod
+    def _power(self, session):
+        """kW currently allocated to an active session."""
+
+    # Public interface
+
+    def advance(self, now=None):
+        with self._lock:
+            now = self.clock() if now is None else now
+            if self.now is None:
+                self.now = now
+            now = max(now, self.now)  # the schedule never runs backwards
+            while True:
+                when, session = self._next_completion()
+                if session is None or when > now:
+                    break
+                when = max(when, self.now)
+                self._settle(when)
+                self.now = when
+                self._retire(session, when, done=True)
+                self._replan(when)
+            self._settle(now)
+            self.now = now
+            return now
+
+    def _retire(self, session, now, done):
+        session.energy = session.need_kwh if done else self._delivered(session)
+        session.active = False
+        if done:
+            session.done_at = now
+        self.active -= 1
+        self._remove(session, now)
+
+    def start(self, regnum, max_kw, need_kwh=math.inf, departure=None, tier=0, now=None):
+        # a session drawing at most max_kw until need_kwh has been delivered;
+        # replaces any earlier session of regnum
+        if max_kw <= 0:
+            raise ValueError("max_kw must be positive")
+        with self._lock:
+            now = self.advance(now)
+            previous = self.sessions.pop(regnum, None)
+            if previous is not None and previous.active:
+                self._retire(previous, now, done=False)
+            session = _Session(regnum, float(max_kw), float(need_kwh), departure, tier, next(self._seq))
+            self.sessions[regnum] = session
+            if session.need_kwh <= 0:
+                session.active = False
+                session.done_at = now
+            else:
+                self.active += 1
+                session.since = now
+                self._add(session, now)
+                self._replan(now)
+            return session
+
+    def stop(self, regnum, now=None):
+        # kWh delivered to regnum's session, or None if there is none
+        with self._lock:
+            now = self.advance(now)
+            session = self.sessions.pop(regnum, None)
+            if session is None:
+                return None
+            if session.active:
+                self._retire(session, now, done=False)
+                self._replan(now)
+            return session.energy
+
+    def set_budget(self, budget_kw, now=None):
+        if budget_kw < 0:
+            raise ValueError("budget_kw must not be negative")
+        with self._lock:
+            now = self.advance(now)
+            self.budget_kw = float(budget_kw)
+            self._replan(now)
+
+    def energy(self, regnum, now=None):
+        with self._lock:
+            self.advance(now)
+            session = self.sessions.get(regnum)
+            if session is None:
+                return None
+            return self._delivered(session) if session.active else session.energy
+
+    def power(self, regnum, now=None):
+        with self._lock:
+            self.advance(now)
+            session = self.sessions.get(regnum)
+            if session is None:
+                return None
+            return self._power(session) if session.active else 0.0
+
+    def completes_at(self, regnum, now=None):
+        # when regnum's battery fills at its current allocation; None if
+        # unknown, not being charged or never (need_kwh of inf)
+        with self._lock:
+            now = self.advance(now)
+            session = self.sessions.get(regnum)
+            if session is None:
+                return None
+            if not session.active:
+                return session.done_at
+            return self._completes_at(session, now)
+
+    def _completes_at(self, session, now):
+        power = self._power(session)
+        if power <= 0 or math.isinf(session.need_kwh):
+            return None
+        return now + (session.need_kwh - self._delivered(session)) / power * 3600
+
+    def allocations(self, now=None):
+        # {regnum: kW} for every active session; O(n)
+        with self._lock:
+            self.advance(now)
+            return {r: self._power(s) for r, s in self.sessions.items() if s.active}
+
+    def completing_soonest(self, limit, now=None):
+        # [(regnum, completes_at)] of sessions being charged, soonest first; O(n)
+        with self._lock:
+            now = self.advance(now)
+            candidates = (
+                (self._completes_at(s, now), r) for r, s in self.sessions.items() if s.active
+            )
+            soonest = heapq.nsmallest(limit, ((t, r) for t, r in candidates if t is not None))
+            return [(regnum, completes_at) for completes_at, regnum in soonest]
+
+
+class _Group:
+    # sessions of one tier sharing a charger rating: under fair share they
+    # all draw min(cap, level), so one running total covers them all
+    __slots__ = ("tier", "cap", "count", "delivered", "rate", "heap")
+
+    def __init__(self, tier, cap):
+        self.tier = tier
+        self.cap = cap
+        self.count = 0
+        self.delivered = 0.0    # kWh per session since the group was created
+        self.rate = 0.0         # kW per session
+        self.heap = []          # (delivered when full, seq, session); stale entries skipped
+
+
+class _Tier:
+    __slots__ = ("groups", "caps", "count")
+
+    def __init__(self):
+        self.groups = {}        # cap -> _Group
+        self.caps = []          # sorted
+        self.count = 0
+
+
+class FairShareScheduler(PowerScheduler):
+    """Max-min fair shares: every session gets the same power, capped at its
+    charger's rating, with what capped sessions leave spread over the rest.
+
+    Sessions are grouped by charger rating, so a re-plan and finding the
+    next completion cost O(distinct ratings) however many sessions there
+    are, and a session's energy is read off its group's running total.
+    """
+
+    policy = "fair"
+    tiered = False
+
+    def __init__(self, budget_kw, clock=time.time):
+        super().__init__(budget_kw, clock)
+        self.tiers = {}         # tier -> _Tier
+        self._tier_order = []   # sorted tier keys, served first to last
+
+    def _add(self, session, now):
+        key = session.tier if self.tiered else 0
+        tier = self.tiers.get(key)
+        if tier is None:
+            tier = self.tiers[key] = _Tier()
+            bisect.insort(self._tier_order, key)
+        group = tier.groups.get(session.max_kw)
+        if group is None:
+            group = tier.groups[session.max_kw] = _Group(key, session.max_kw)
+            bisect.insort(tier.caps, session.max_kw)
+        group.count += 1
+        tier.count += 1
+        session.group = group
+        session.joined = group.delivered
+        if not math.isinf(session.need_kwh):
+            heapq.heappush(group.heap, (group.delivered + session.need_kwh, session.seq, session))
+
+    def _remove(self, session, now):
+        group = session.group
+        session.group = None
+        tier = self.tiers[group.tier]
+        group.count -= 1
+        tier.count -= 1
+        if len(group.heap) > 2 * group.count + 64:
+            group.heap = [entry for entry in group.heap if entry[2].group is group]
+            heapq.heapify(group.heap)
+        if not group.count:
+            del tier.groups[group.cap]
+            tier.caps.pop(bisect.bisect_left(tier.caps, group.cap))
+        if not tier.count:
+            del self.tiers[group.tier]
+            self._tier_order.pop(bisect.bisect_left(self._tier_order, group.tier))
+
+    def _replan(self, now):
+        budget = self.budget_kw
+        allocated = 0.0
+        for key in self._tier_order:
+            tier = self.tiers[key]
+            # water-filling: ratings that fit under an equal share are met in full
+            level, remaining, sharing = math.inf, budget, tier.count
+            for cap in tier.caps:
+                count = tier.groups[cap].count
+                if cap * sharing > remaining:
+                    level = remaining / sharing
+                    remaining = 0.0
+                    break
+                remaining -= cap * count
+                sharing -= count
+            allocated += budget - max(0.0, remaining)
+            budget = max(0.0, remaining)
+            for group in tier.groups.values():
+                group.rate = min(group.cap, level)
+        self.allocated_kw = allocated
+
+    def _settle(self, now):
+        if self.now is None or now <= self.now:
+            return
+        hours = (now - self.now) / 3600
+        for tier in self.tiers.values():
+            for group in tier.groups.values():
+                group.delivered += group.rate * hours
+
+    def _next_completion(self):
+        best, first = math.inf, None
+        for tier in self.tiers.values():
+            for group in tier.groups.values():
+                heap = group.heap
+                while heap and (heap[0][2].group is not group):
+                    heapq.heappop(heap)
+                if not heap or group.rate <= 0:
+                    continue
+                when = self.now + (heap[0][0] - group.delivered) / group.rate * 3600
+                if when < best:
+                    best, first = when, heap[0][2]
+        return best, first
+
+    def _delivered(self, session):
+        return session.group.delivered - session.joined
+
+    def _power(self, session):
+        return session.group.rate
+
+
+class PriorityScheduler(FairShareScheduler):
+    """Fair shares within priority tiers; lower tier numbers are served
+    first and later tiers share whatever they leave."""
+
+    policy = "priority"
+    tiered = True
+
+
+class EarliestDepartureScheduler(PowerScheduler):
+    """Sessions leaving soonest charge at full rating first; sessions
+    without a departure time come last, in arrival order.
+
+    A re-plan walks only the sessions that are, or were, being powered, so
+    its cost follows the budget rather than the number of sessions.
+    """
+
+    policy = "edf"
+
+    def __init__(self, budget_kw, clock=time.time):
+        super().__init__(budget_kw, clock)
+        self._keys = []         # sorted (departure, seq)
+        self._order = []        # sessions, in _keys order
+        self._powered = []      # sessions given power by the last re-plan
+        self._completions = []  # (time, seq, version, session); stale entries skipped
+
+    @staticmethod
+    def _key(session):
+        departure = session.departure
+        return (math.inf if departure is None else departure, session.seq)
+
+    def _add(self, session, now):
+        key = self._key(session)
+        i = bisect.bisect(self._keys, key)
+        self._keys.insert(i, key)
+        self._order.insert(i, session)
+
+    def _remove(self, session, now):
+        i = bisect.bisect_left(self._keys, self._key(session))
+        del self._keys[i]
+        del self._order[i]
+        session.power = 0.0
+        session.version += 1
+        if len(self._completions) > 2 * self.active + 64:
+            self._completions = [e for e in self._completions if e[3].active and e[3].version == e[2]]
+            heapq.heapify(self._completions)
+
+    def _set_power(self, session, power, now):
+        if power == session.power:
+            return
+        session.energy = self._delivered(session)
+        session.since = now
+        session.power = power
+        session.version += 1
+        if power > 0 and not math.isinf(session.need_kwh):
+            when = now + (session.need_kwh - session.energy) / power * 3600
+            heapq.heappush(self._completions, (when, session.seq, session.version, session))
+
+    def _replan(self, now):
+        remaining = self.budget_kw
+        powered = []
+        for session in self._order:
+            if remaining <= _EPSILON_KW:
+                break
+            power = min(session.max_kw, remaining)
+            remaining -= power
+            self._set_power(session, power, now)
+            powered.append(session)
+        # the powered sessions are a prefix of _order; those that fell out of it stop
+        last = self._key(powered[-1]) if powered else None
+        for session in self._powered:
+            if session.active and (last is None or self._key(session) > last):
+                self._set_power(session, 0.0, now)
+        self._powered = powered
+        self.allocated_kw = self.budget_kw - max(0.0, remaining)
+
+    def _settle(self, now):
+        # energy is settled per session whenever its power changes
+        pass
+
+    def _next_completion(self):
+        heap = self._completions
+        while heap and (heap[0][3].version != heap[0][2] or not heap[0][3].active):
+            heapq.heappop(heap)
+        if not heap:
+            return math.inf, None
+        return heap[0][0], heap[0][3]
+
+    def _delivered(self, session):
+        return session.energy + session.power * (self.now - session.since) / 3600
+
+    def _power(self, session):
+        return session.power
+
+
+POLICIES = {
+    cls.policy: cls
+    for cls in (FairShareScheduler, PriorityScheduler, EarliestDepartureScheduler)
+}
+
+
+def make_scheduler(policy, budget_kw, clock=time.time):
+    try:
+        cls = POLICIES[policy]
+    except KeyError:
+        raise ValueError(f"Unknown power policy: {policy!r}; expected one of {', '.join(POLICIES)}")
+    return cls(budget_kw, clock)
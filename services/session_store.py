@@ -0,0 +1,491 @@
+import heapq
+import itertools
+import math
+import multiprocessing
+import os
+import sqlite3
+import struct
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+
+@dataclass
+class ChargingSession:
+    regnum: str
+    started_at: float
+    power_kw: float
+    capacity_kwh: float
+    initial_charge: float = 0.0
+    status: str = "charging"
+    stopped_at: float | None = None
+    version: int = 0
+
+    def charge_at(self, now):
+        # percent; linear in energy delivered, computed on read
+        end = self.stopped_at if self.stopped_at is not None else now
+        hours = max(0.0, end - self.started_at) / 3600
+        gained = self.power_kw * hours / self.capacity_kwh * 100
+        return min(100.0, self.initial_charge + gained)
+
+    def completes_at(self):
+        remaining_kwh = (100.0 - self.initial_charge) / 100 * self.capacity_kwh
+        return self.started_at + remaining_kwh / self.power_kw * 3600
+
+
+class SessionStore(ABC):
+    """Where ChargingSessionEngine keeps its sessions.
+
+    Each method is atomic with respect to concurrent callers, so handlers
+    never read-modify-write a session themselves.
+    """
+
+    @abstractmethod
+    def start(self, session):
+        """Store session, replacing any earlier session for its regnum."""
+
+    @abstractmethod
+    def stop(self, regnum, now):
+        """Mark an active session stopped at now.
+
+        Returns (session or None if unknown, whether this call stopped it),
+        so concurrent stops of one session report a single stop.
+        """
+
+    @abstractmethod
+    def get(self, regnum):
+        """Returns a copy of the session, or None."""
+
+    @abstractmethod
+    def completing_soonest(self, now, limit):
+        """[(regnum, completes_at)] of active sessions finishing after now, soonest first."""
+
+    def close(self):
+        pass
+
+
+def _stop(session, now):
+    if session.status == "charging":
+        session.stopped_at = min(now, session.completes_at())
+        session.status = "stopped"
+        return True
+    return False
+
+
+class _Stripe:
+    __slots__ = ("lock", "sessions", "heap", "stale")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}
+        # (completes_at, regnum, version); entries for sessions that were
+        # stopped or restarted are skipped lazily
+        self.heap = []
+        self.stale = 0
+
+    def is_current(self, entry):
+        _, regnum, version = entry
+        session = self.sessions.get(regnum)
+        return session is not None and session.version == version and session.status == "charging"
+
+    def compact_if_needed(self):
+        # rebuild once stale entries outnumber live ones, keeping the heap O(active)
+        if self.stale > 64 and self.stale * 2 > len(self.heap):
+            self.heap = [e for e in self.heap if self.is_current(e)]
+            heapq.heapify(self.heap)
+            self.stale = 0
+
+    def soonest(self, now, limit):
+        # Finished sessions are popped off the top for good; the rest is found
+        # by a best-first walk of the heap, O(k log k) for k visited entries.
+        heap = self.heap
+        while heap and (heap[0][0] <= now or not self.is_current(heap[0])):
+            if not self.is_current(heap[0]):
+                self.stale = max(0, self.stale - 1)
+            heapq.heappop(heap)
+
+        results = []
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier and len(results) < limit:
+            entry, i = heapq.heappop(frontier)
+            if self.is_current(entry):
+                results.append((entry[0], entry[1]))
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return results
+
+
+class StripedMemoryStore(SessionStore):
+    """In-process store; regnums are spread over independently locked stripes.
+
+    Threads touching different stripes never contend. Not shared between
+    processes.
+    """
+
+    def __init__(self, stripes=64):
+        self._stripes = [_Stripe() for _ in range(stripes)]
+        self._versions = itertools.count(1)
+
+    def _stripe(self, regnum):
+        return self._stripes[hash(regnum) % len(self._stripes)]
+
+    def start(self, session):
+        stripe = self._stripe(session.regnum)
+        with stripe.lock:
+            previous = stripe.sessions.get(session.regnum)
+            if previous is not None and previous.status == "charging":
+                stripe.stale += 1
+            session.version = next(self._versions)
+            stripe.sessions[session.regnum] = session
+            heapq.heappush(stripe.heap, (session.completes_at(), session.regnum, session.version))
+            stripe.compact_if_needed()
+
+    def stop(self, regnum, now):
+        stripe = self._stripe(regnum)
+        with stripe.lock:
+            session = stripe.sessions.get(regnum)
+            if session is None:
+                return None, False
+            stopped = _stop(session, now)
+            if stopped:
+                stripe.stale += 1
+                stripe.compact_if_needed()
+            return ChargingSession(**vars(session)), stopped
+
+    def get(self, regnum):
+        stripe = self._stripe(regnum)
+        with stripe.lock:
+            session = stripe.sessions.get(regnum)
+            return ChargingSession(**vars(session)) if session is not None else None
+
+    def completing_soonest(self, now, limit):
+        per_stripe = []
+        for stripe in self._stripes:
+            with stripe.lock:
+                per_stripe.append(stripe.soonest(now, limit))
+        merged = itertools.islice(heapq.merge(*per_stripe), limit)
+        return [(regnum, completes_at) for completes_at, regnum in merged]
+
+    def __len__(self):
+        return sum(len(stripe.sessions) for stripe in self._stripes)
+
+
+class SQLiteStore(SessionStore):
+    """Sessions in a SQLite database, shared by every thread and process using the file.
+
+    Each thread gets its own connection; WAL mode lets readers proceed while
+    one writer commits. Stopping is a single conditional UPDATE, so it is
+    atomic without any Python-side lock.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS charging_sessions (
+            regnum TEXT PRIMARY KEY,
+            started_at REAL NOT NULL,
+            power_kw REAL NOT NULL,
+            capacity_kwh REAL NOT NULL,
+            initial_charge REAL NOT NULL,
+            status TEXT NOT NULL,
+            stopped_at REAL,
+            completes_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS charging_sessions_completion
+            ON charging_sessions (status, completes_at);
+    """
+    COLUMNS = "regnum, started_at, power_kw, capacity_kwh, initial_charge, status, stopped_at"
+
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        conn = self._connection()
+        conn.executescript(self.SCHEMA)
+
+    def _connection(self):
+        # connections cannot cross threads, nor survive a fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def start(self, session):
+        self._connection().execute(
+            f"INSERT OR REPLACE INTO charging_sessions ({self.COLUMNS}, completes_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (session.regnum, session.started_at, session.power_kw, session.capacity_kwh,
+             session.initial_charge, session.status, session.stopped_at, session.completes_at()),
+        )
+
+    def stop(self, regnum, now):
+        conn = self._connection()
+        cursor = conn.execute(
+            "UPDATE charging_sessions SET status = 'stopped', stopped_at = MIN(?, completes_at) "
+            "WHERE regnum = ? AND status = 'charging'",
+            (now, regnum),
+        )
+        return self.get(regnum), cursor.rowcount == 1
+
+    def get(self, regnum):
+        row = self._connection().execute(
+            f"SELECT {self.COLUMNS} FROM charging_sessions WHERE regnum = ?", (regnum,)
+        ).fetchone()
+        return ChargingSession(*row) if row else None
+
+    def completing_soonest(self, now, limit):
+        rows = self._connection().execute(
+            "SELECT regnum, completes_at FROM charging_sessions "
+            "WHERE status = 'charging' AND completes_at > ? ORDER BY completes_at, regnum LIMIT ?",
+            (now, limit),
+        ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM charging_sessions").fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SharedMemoryStore(SessionStore):
+    """Fixed-capacity hash table of sessions in a shared memory block.
+
+    The table is split into stripes, each a contiguous run of slots guarded by
+    its own multiprocessing lock and probed linearly within itself. Each
+    stripe also keeps a binary min-heap of (completes_at, record, version)
+    after the table, for completing_soonest; entries of stopped or restarted
+    sessions are skipped lazily and swept out when the heap fills up. Create
+    the store before starting worker processes; children inherit the mapping
+    and the locks through fork. Only the creating process unlinks the block.
+    """
+
+    # used, status, version, started_at, power_kw, capacity_kwh,
+    # initial_charge, stopped_at (NaN while charging), regnum (UTF-8, NUL padded)
+    RECORD = struct.Struct("<BB2xIddddd40s")
+    RECORD_STATE = struct.Struct("<BB2xI")     # used, status, version
+    MAX_REGNUM_BYTES = 40
+    STATUSES = ("charging", "stopped")
+    HEAP_HEADER = struct.Struct("<Q")       # entries in use
+    HEAP_ENTRY = struct.Struct("<dII")      # completes_at, record index, version
+
+    def __init__(self, capacity=65536, stripes=64):
+        self.stripes = stripes
+        self.per_stripe = -(-capacity // stripes)
+        self.capacity = self.per_stripe * stripes
+        # a stripe has at most per_stripe live entries, so after a sweep at
+        # least half of its heap is free again
+        self.heap_slots = 2 * self.per_stripe
+        self._heap_bytes = self.HEAP_HEADER.size + self.heap_slots * self.HEAP_ENTRY.size
+        self._heaps = self.capacity * self.RECORD.size
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=self._heaps + self.stripes * self._heap_bytes)
+        self._shm.buf[:] = bytes(len(self._shm.buf))
+        self._locks = [multiprocessing.Lock() for _ in range(stripes)]
+        self._owner = os.getpid()
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def _key(self, regnum):
+        key = regnum.encode("utf-8")
+        if len(key) > self.MAX_REGNUM_BYTES:
+            raise ValueError(f"regnum longer than {self.MAX_REGNUM_BYTES} bytes: {regnum!r}")
+        return key
+
+    def _find(self, key):
+        # (offset of the matching record or None, offset of the first free record or None)
+        h = zlib.crc32(key)
+        stripe = h % self.stripes
+        base = stripe * self.per_stripe
+        start = (h // self.stripes) % self.per_stripe
+        buf = self._shm.buf
+        size = self.RECORD.size
+        padded = key.ljust(self.MAX_REGNUM_BYTES, b"\0")
+        for i in range(self.per_stripe):
+            offset = (base + (start + i) % self.per_stripe) * size
+            if buf[offset] == 0:
+                return None, offset
+            if buf[offset + size - self.MAX_REGNUM_BYTES:offset + size] == padded:
+                return offset, None
+        return None, None
+
+    def _unpack(self, offset):
+        _, status, version, started, power, capacity, initial, stopped, key = self.RECORD.unpack_from(
+            self._shm.buf, offset
+        )
+        return ChargingSession(
+            key.rstrip(b"\0").decode("utf-8"), started, power, capacity, initial,
+            self.STATUSES[status], None if math.isnan(stopped) else stopped, version,
+        )
+
+    def _pack(self, offset, session):
+        self.RECORD.pack_into(
+            self._shm.buf, offset, 1, self.STATUSES.index(session.status), session.version,
+            session.started_at, session.power_kw, session.capacity_kwh, session.initial_charge,
+            math.nan if session.stopped_at is None else session.stopped_at,
+            session.regnum.encode("utf-8"),
+        )
+
+    # Completion heaps; the caller holds the stripe's lock
+
+    def _heap_base(self, stripe):
+        return self._heaps + stripe * self._heap_bytes
+
+    def _heap_len(self, base):
+        return self.HEAP_HEADER.unpack_from(self._shm.buf, base)[0]
+
+    def _heap_get(self, base, i):
+        return self.HEAP_ENTRY.unpack_from(self._shm.buf, base + self.HEAP_HEADER.size + i * self.HEAP_ENTRY.size)
+
+    def _heap_set(self, base, i, entry):
+        self.HEAP_ENTRY.pack_into(self._shm.buf, base + self.HEAP_HEADER.size + i * self.HEAP_ENTRY.size, *entry)
+
+    def _heap_write(self, base, entries):
+        self.HEAP_HEADER.pack_into(self._shm.buf, base, len(entries))
+        for i, entry in enumerate(entries):
+            self._heap_set(base, i, entry)
+
+    def _is_current(self, entry):
+        _, record, version = entry
+        used, status, current = self.RECORD_STATE.unpack_from(self._shm.buf, record * self.RECORD.size)
+        return used == 1 and status == 0 and current == version
+
+    def _heap_push(self, stripe, entry):
+        base = self._heap_base(stripe)
+        n = self._heap_len(base)
+        if n == self.heap_slots:
+            live = [e for e in (self._heap_get(base, i) for i in range(n)) if self._is_current(e)]
+            heapq.heapify(live)
+            self._heap_write(base, live)
+            n = len(live)
+        i = n
+        while i:
+            parent = (i - 1) >> 1
+            above = self._heap_get(base, parent)
+            if above <= entry:
+                break
+            self._heap_set(base, i, above)
+            i = parent
+        self._heap_set(base, i, entry)
+        self.HEAP_HEADER.pack_into(self._shm.buf, base, n + 1)
+
+    def _heap_pop(self, base):
+        n = self._heap_len(base) - 1
+        self.HEAP_HEADER.pack_into(self._shm.buf, base, n)
+        if not n:
+            return
+        entry = self._heap_get(base, n)
+        i = 0
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            below = self._heap_get(base, child)
+            if child + 1 < n:
+                right = self._heap_get(base, child + 1)
+                if right < below:
+                    child, below = child + 1, right
+            if entry <= below:
+                break
+            self._heap_set(base, i, below)
+            i = child
+        self._heap_set(base, i, entry)
+
+    def _soonest(self, stripe, now, limit):
+        # like _Stripe.soonest: finished and stale entries are popped off the
+        # top, then a best-first walk visits O(k log k) entries for k results
+        base = self._heap_base(stripe)
+        while self._heap_len(base):
+            top = self._heap_get(base, 0)
+            if top[0] > now and self._is_current(top):
+                break
+            self._heap_pop(base)
+
+        n = self._heap_len(base)
+        results = []
+        frontier = [(self._heap_get(base, 0), 0)] if n else []
+        while frontier and len(results) < limit:
+            entry, i = heapq.heappop(frontier)
+            if self._is_current(entry):
+                end = (entry[1] + 1) * self.RECORD.size
+                key = bytes(self._shm.buf[end - self.MAX_REGNUM_BYTES:end])
+                results.append((entry[0], key.rstrip(b"\0").decode("utf-8")))
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < n:
+                    heapq.heappush(frontier, (self._heap_get(base, child), child))
+        results.sort()  # ties on completes_at go by regnum, as in the other stores
+        return results
+
+    # SessionStore
+
+    def start(self, session):
+        key = self._key(session.regnum)
+        stripe = zlib.crc32(key) % self.stripes
+        with self._locks[stripe]:
+            offset, free = self._find(key)
+            if offset is None and free is None:
+                raise RuntimeError("shared session store is full")
+            if offset is None:
+                offset, session.version = free, 1
+            else:
+                # entries of the previous session at this record go stale
+                session.version = (self.RECORD_STATE.unpack_from(self._shm.buf, offset)[2] + 1) & 0xFFFFFFFF
+            self._pack(offset, session)
+            if session.status == "charging":
+                self._heap_push(stripe, (session.completes_at(), offset // self.RECORD.size, session.version))
+
+    def stop(self, regnum, now):
+        key = self._key(regnum)
+        with self._locks[zlib.crc32(key) % self.stripes]:
+            offset, _ = self._find(key)
+            if offset is None:
+                return None, False
+            session = self._unpack(offset)
+            stopped = _stop(session, now)
+            if stopped:
+                self._pack(offset, session)
+            return session, stopped
+
+    def get(self, regnum):
+        key = self._key(regnum)
+        with self._locks[zlib.crc32(key) % self.stripes]:
+            offset, _ = self._find(key)
+            return self._unpack(offset) if offset is not None else None
+
+    def completing_soonest(self, now, limit):
+        per_stripe = []
+        for stripe in range(self.stripes):
+            with self._locks[stripe]:
+                per_stripe.append(self._soonest(stripe, now, limit))
+        merged = itertools.islice(heapq.merge(*per_stripe), limit)
+        return [(regnum, completes_at) for completes_at, regnum in merged]
+
+    def __len__(self):
+        size = self.RECORD.size
+        return sum(1 for offset in range(0, self.capacity * size, size) if self._shm.buf[offset])
+
+    def close(self):
+        self._shm.close()
+        if os.getpid() == self._owner:
+            self._shm.unlink()
+
+
+def open_store(spec):
+    # "memory" or "sqlite:<path>"; shared memory stores are created by the
+    # process that forks the workers, so they have no spec
+    kind, _, arg = spec.partition(":")
+    if kind == "memory":
+        return StripedMemoryStore()
+    if kind == "sqlite" and arg:
+        return SQLiteStore(arg)
+    raise ValueError(f"Unknown session store: {spec!r}")
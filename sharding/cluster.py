@@ -0,0 +1,122 @@
+import multiprocessing
+import os
+
+from sharding.router import ShardedLot
+from sharding.shard import run_shard
+
+
+class ShardCluster:
+    """Shard processes on this machine, with levels spread over them.
+
+    Starts `shards` worker processes (one per core by default) and creates
+    the levels that do not exist yet, spread evenly: each goes to the first
+    shard in ring order from its key that holds fewer than its share.
+    With a directory, every shard journals its levels in a subdirectory
+    and recovers them on the next start. Hand router() to the presenter;
+    each process that talks to the shards needs its own router.
+    """
+
+    def __init__(self, capacity, ev_capacity, levels, shards=None, directory=None, vnodes=64):
+        self.directory = directory
+        self.vnodes = vnodes
+        self.authkey = os.urandom(16)
+        self.processes = {}
+        self.addresses = {}
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+        for i in range(shards or os.cpu_count() or 1):
+            self._spawn(f"shard-{i}")
+        admin = self.router()
+        try:
+            for level in range(1, levels + 1):
+                if level not in admin.owners:
+                    admin.create_lot(capacity, ev_capacity, level)
+            if directory is not None:
+                # directories are not journaled; rebuild them from what was recovered
+                self._rebuild_directories(admin)
+        finally:
+            admin.close()
+
+    def _spawn(self, name):
+        directory = None if self.directory is None else os.path.join(self.directory, name)
+        receive, send = self._context.Pipe(duplex=False)
+        process = self._context.Process(target=run_shard, args=(name, self.authkey, send, directory),
+                                        name=f"parking-{name}", daemon=True)
+        process.start()
+        send.close()
+        try:
+            self.addresses[name] = receive.recv()
+        except EOFError:
+            raise RuntimeError(f"{name} failed to start") from None
+        finally:
+            receive.close()
+        self.processes[name] = process
+
+    def router(self):
+        return ShardedLot(self.addresses, self.authkey, self.vnodes)
+
+    def add_shard(self):
+        """Starts one more shard and moves its share of the levels to it.
+
+        Levels are taken in order of how close the new shard is to them on
+        the ring, and only from shards holding more than their new share.
+
+        Run while nothing else uses the cluster: routers made before this
+        call do not know the new shard and must be replaced. Reservations
+        on moved levels are dropped. Returns the new shard's name.
+        """
+        name = f"shard-{len(self.processes)}"
+        self._spawn(name)
+        admin = self.router()
+        try:
+            loads = {}
+            for shard in admin.owners.values():
+                loads[shard] = loads.get(shard, 0) + 1
+            share = len(admin.owners) // len(admin.names)
+            ranked = sorted(admin.owners.items(),
+                            key=lambda item: (admin.ring.nodes_for(f"level:{item[0]}").index(name), item[0]))
+            moves = []
+            for level, shard in ranked:
+                if len(moves) == share:
+                    break
+                if loads[shard] > share:
+                    loads[shard] -= 1
+                    moves.append((level, shard))
+            for level, shard in moves:
+                exported = admin._call(shard, "export_level", level)
+                admin._call(name, "import_level", *exported[:2], level, exported[2])
+            # the homes of some regnums moved too
+            self._rebuild_directories(admin)
+            admin._all("checkpoint")
+        finally:
+            admin.close()
+        return name
+
+    def _rebuild_directories(self, admin):
+        directories = {shard: [] for shard in admin.names}
+        for shard, regnums in admin._all("regnums").items():
+            for regnum in regnums:
+                home = admin.ring.node_for(regnum)
+                if home != shard:
+                    directories[home].append((regnum, shard))
+        admin._batch({shard: [("set_foreign", (placements,))]
+                      for shard, placements in directories.items()})
+
+    def close(self):
+        # stops the shards; with a directory, each writes a final snapshot
+        admin = self.router()
+        try:
+            admin._all("close")
+        finally:
+            admin.close()
+        for process in self.processes.values():
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self.processes.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
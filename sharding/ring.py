@@ -0,0 +1,74 @@
+import hashlib
+import math
+from bisect import bisect_right, insort
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing of string keys onto named nodes.
+
+    Each node is placed at `vnodes` points on a 64-bit ring and a key
+    belongs to the first point at or after its hash, so adding or removing
+    a node only moves the keys of that node's arcs.
+    """
+
+    def __init__(self, nodes=(), vnodes=64):
+        self.vnodes = vnodes
+        self._points = []   # sorted (hash, node)
+        self._nodes = []
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def __contains__(self, node):
+        return node in self._nodes
+
+    def add(self, node):
+        if node in self._nodes:
+            raise ValueError(f"{node} is already on the ring")
+        self._nodes.append(node)
+        for i in range(self.vnodes):
+            insort(self._points, (_hash(f"{node}#{i}"), node))
+
+    def remove(self, node):
+        self._nodes.remove(node)
+        self._points = [point for point in self._points if point[1] != node]
+
+    def node_for(self, key):
+        if not self._points:
+            raise LookupError("the ring has no nodes")
+        i = bisect_right(self._points, (_hash(key), "")) % len(self._points)
+        return self._points[i][1]
+
+    def node_bounded(self, key, loads, total):
+        # consistent hashing with bounded loads: the first node in ring
+        # order from the key holding fewer than ceil(total / nodes) keys;
+        # loads are each node's current count, total includes the new key
+        cap = math.ceil(total / len(self._nodes))
+        for node in self.nodes_for(key):
+            if loads.get(node, 0) < cap:
+                return node
+        raise LookupError("every node is at capacity")
+
+    def nodes_for(self, key):
+        # every node, in ring order from the key's owner; for fallbacks
+        points = self._points
+        if not points:
+            return []
+        start = bisect_right(points, (_hash(key), ""))
+        seen = []
+        for i in range(start, start + len(points)):
+            node = points[i % len(points)][1]
+            if node not in seen:
+                seen.append(node)
+                if len(seen) == len(self._nodes):
+                    break
+        return seen
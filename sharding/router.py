@@ -0,0 +1,385 @@
+import heapq
+import itertools
+import threading
+import uuid
+from dataclasses import dataclass, replace
+from multiprocessing.connection import Client
+
+from domain.events import EventBus, LotResized, VehicleLeft, VehicleParked
+from sharding.ring import HashRing
+
+FULL = "Parking is full"
+MAX_SHARDS = 1024   # global reservation id = shard's id * MAX_SHARDS + shard position
+PAGE = 1000         # rows fetched per round trip by iter_status
+
+
+@dataclass(frozen=True)
+class ShardedSnapshot:
+    # status_snapshot() of every shard, taken together
+    tokens: dict    # shard -> token
+    levels: tuple   # (level, shard) at the time
+
+
+def _cursor_of(row):
+    # the (level, ev, index) cursor of a status row, from its slot label
+    label, level, _ = row
+    if isinstance(label, str):
+        return (level, True, int(label[3:]) - 1)
+    return (level, False, label - 1)
+
+
+class ShardedLot:
+    """A Facility whose levels are spread over shard processes.
+
+    Drop-in for the lot given to ParkingPresenter. Each level lives on the
+    shard its key hashes to on a HashRing, passing over shards that already
+    hold their share of the levels, and each regnum has a home shard the
+    same way: a vehicle parked without a level goes to its home (then
+    to the next shards on the ring when full), a vehicle with a level
+    preference goes to the shard of the nearest level. Calls touching
+    several shards send to all of them before reading any reply, so the
+    shards work in parallel; cross-shard queries are merged in level order.
+
+    Differences from one Facility: without a level preference a vehicle
+    fills its home shard's lowest level first rather than the lowest level
+    overall; overlapping reservations of a regnum are only detected on the
+    same shard (reserve() tries the home shard first, where park() looks
+    for the hold); and events are published for changes made through this
+    router only. Threads may share a router, whose lock serialises their
+    calls; every process needs its own.
+    """
+
+    def __init__(self, shards, authkey, vnodes=64):
+        # shards: {name: address}, like ShardCluster.addresses
+        self.names = list(shards)
+        self.ring = HashRing(self.names, vnodes)
+        self._position = {name: i for i, name in enumerate(self.names)}
+        self._conns = {name: Client(address, authkey=authkey) for name, address in shards.items()}
+        self._lock = threading.RLock()
+        self._claim_prefix = uuid.uuid4().hex
+        self._claims = itertools.count(1)
+        self.events = EventBus()
+        self.refresh()
+
+    def close(self):
+        for conn in self._conns.values():
+            conn.close()
+
+    # Calls
+
+    def _batch(self, calls):
+        # {shard: [(operation, args)]} -> {shard: [value]}; every shard gets
+        # its message before any reply is read
+        for shard, ops in calls.items():
+            self._conns[shard].send(ops)
+        replies = {shard: self._conns[shard].recv() for shard in calls}
+        results = {}
+        error = None
+        for shard, reply in replies.items():
+            values = results[shard] = []
+            for ok, value in reply:
+                if not ok and error is None:
+                    error = value
+                values.append(value)
+        if error is not None:
+            raise error
+        return results
+
+    def _call(self, shard, operation, *args):
+        return self._batch({shard: [(operation, args)]})[shard][0]
+
+    def _all(self, operation, *args):
+        # {shard: value} from every shard
+        with self._lock:
+            results = self._batch({shard: [(operation, args)] for shard in self.names})
+        return {shard: values[0] for shard, values in results.items()}
+
+    # Placement
+
+    def refresh(self):
+        # re-reads which shard holds which level
+        layouts = self._all("layout")
+        self.owners = {level: shard for shard, layout in layouts.items() for _, _, level in layout}
+        self._layout = sorted((entry for layout in layouts.values() for entry in layout),
+                              key=lambda entry: entry[2])
+        self.levels = [level for _, _, level in self._layout]
+        self._near = {}
+
+    def owner_of(self, level):
+        # the shard holding a level, or the one it would be created on: the
+        # first on the ring from the level's key with fewer than its share
+        owner = self.owners.get(level)
+        if owner is not None:
+            return owner
+        loads = {}
+        for shard in self.owners.values():
+            loads[shard] = loads.get(shard, 0) + 1
+        return self.ring.node_bounded(f"level:{level}", loads, len(self.owners) + 1)
+
+    def _nearest(self, level):
+        # shards in order of their nearest level to `level`, ties to the lower level
+        order = self._near.get(level)
+        if order is None:
+            order = []
+            for number in sorted(self.levels, key=lambda n: (abs(n - level), n)):
+                if self.owners[number] not in order:
+                    order.append(self.owners[number])
+            self._near[level] = order
+        return order
+
+    def _candidates(self, regnum, level):
+        if level is not None:
+            return self._nearest(level)
+        holding = set(self.owners.values())
+        return [shard for shard in self.ring.nodes_for(regnum) if shard in holding]
+
+    # Lot
+
+    @property
+    def capacity(self):
+        return sum(capacity for capacity, _, _ in self._layout)
+
+    @property
+    def ev_capacity(self):
+        return sum(ev_capacity for _, ev_capacity, _ in self._layout)
+
+    def layout(self):
+        return list(self._layout)
+
+    def create_lot(self, capacity, ev_capacity, level):
+        with self._lock:
+            owner = self.owner_of(level)
+            dropped = self._call(owner, "create_lot", capacity, ev_capacity, level)
+            self._forget(owner, dropped)
+            self.refresh()
+        if self.events:
+            self.events.publish(LotResized(level, capacity, ev_capacity))
+
+    def park(self, vehicle, ev=False, level=None):
+        slot, _, error = self.park_many([(vehicle, ev, level)])[0]
+        if error is not None and error != FULL:
+            raise ValueError(error)
+        return slot
+
+    def park_many(self, entries):
+        # like Facility.park_many: a (slot, level, error) triple per entry
+        entries = list(entries)
+        with self._lock:
+            results = self._park(entries)
+        if self.events:
+            for (vehicle, ev, _), (slot, level, _) in zip(entries, results):
+                if slot is not None:
+                    self.events.publish(VehicleParked(level, f"EV-{slot}" if ev else slot, vehicle))
+        return results
+
+    def _park(self, entries):
+        results = [None] * len(entries)
+        homes = [self.ring.node_for(vehicle.regnum) for vehicle, _, _ in entries]
+        candidates = [self._candidates(vehicle.regnum, level) for vehicle, _, level in entries]
+        token = f"{self._claim_prefix}:{next(self._claims)}"
+        claimed = set()
+        attempt = dict.fromkeys(range(len(entries)), 0)
+        while attempt:
+            for i, tried in list(attempt.items()):
+                if tried == len(candidates[i]):
+                    results[i] = (None, None, FULL)
+                    del attempt[i]
+
+            # a vehicle parking away from home is claimed there first
+            claims = {}
+            for i, tried in attempt.items():
+                if i not in claimed and candidates[i][tried] != homes[i]:
+                    claims.setdefault(homes[i], []).append(i)
+            if claims:
+                replies = self._batch({home: [("claim", ([entries[i][0].regnum for i in items], token))]
+                                       for home, items in claims.items()})
+                for home, items in claims.items():
+                    for i, error in zip(items, replies[home][0]):
+                        if error is None:
+                            claimed.add(i)
+                        else:
+                            results[i] = (None, None, error)
+                            del attempt[i]
+
+            parks = {}
+            for i, tried in attempt.items():
+                parks.setdefault(candidates[i][tried], []).append(i)
+            if not parks:
+                break
+            replies = self._batch({shard: [("park_many", ([entries[i] for i in items], token))]
+                                   for shard, items in parks.items()})
+            placed = {}
+            for shard, items in parks.items():
+                for i, result in zip(items, replies[shard][0]):
+                    if result[2] == FULL:
+                        attempt[i] += 1
+                        continue
+                    results[i] = result
+                    del attempt[i]
+                    if result[2] is None and shard != homes[i]:
+                        placed.setdefault(homes[i], []).append((entries[i][0].regnum, shard))
+            if placed:
+                self._batch({home: [("register", (items, token))] for home, items in placed.items()})
+
+        failed = {}
+        for i in claimed:
+            if results[i][2] is not None:
+                failed.setdefault(homes[i], []).append(entries[i][0].regnum)
+        if failed:
+            self._batch({home: [("release", (regnums, token))] for home, regnums in failed.items()})
+        return results
+
+    def leave(self, slot_id, ev=False, level=None):
+        return self.leave_many([(slot_id, ev, level)])[0]
+
+    def leave_many(self, entries):
+        # entries are (slot_id, ev, level) like Facility.leave_many
+        entries = list(entries)
+        results = [False] * len(entries)
+        left = []
+        with self._lock:
+            takes = {}
+            for i, (slot_id, ev, level) in enumerate(entries):
+                if level is None and self.levels:
+                    level = self.levels[0]
+                if level in self.owners:
+                    takes.setdefault(self.owners[level], []).append((i, (slot_id, ev, level)))
+            if not takes:
+                return results
+            replies = self._batch({shard: [("take_many", ([entry for _, entry in items],))]
+                                   for shard, items in takes.items()})
+            for shard, items in takes.items():
+                gone = []
+                for (i, (slot_id, ev, level)), vehicle in zip(items, replies[shard][0]):
+                    if vehicle is None:
+                        continue
+                    results[i] = True
+                    left.append((level, f"EV-{slot_id}" if ev else slot_id, vehicle))
+                    gone.append(vehicle.regnum)
+                self._forget(shard, gone)
+        if self.events:
+            for level, slot, vehicle in left:
+                self.events.publish(VehicleLeft(level, slot, vehicle))
+        return results
+
+    def _forget(self, shard, regnums):
+        # vehicles that left `shard`; their homes elsewhere drop them
+        forget = {}
+        for regnum in regnums:
+            home = self.ring.node_for(regnum)
+            if home != shard:
+                forget.setdefault(home, []).append(regnum)
+        if forget:
+            self._batch({home: [("forget", (regnums,))] for home, regnums in forget.items()})
+
+    # Lookups go to the regnum's home, which knows where it is parked
+
+    def _locate(self, regnum, what):
+        with self._lock:
+            found = self._call(self.ring.node_for(regnum), "locate", regnum, what)
+            if found is None:
+                return None
+            where, value = found
+            if where == "here":
+                return value
+            found = self._call(value, "locate", regnum, what)
+        return found[1] if found is not None and found[0] == "here" else None
+
+    def get_slot_by_reg(self, regnum):
+        return self._locate(regnum, "slot")
+
+    def get_vehicle_by_reg(self, regnum):
+        # a copy; use set_charge() to change a parked EV's charge
+        return self._locate(regnum, "vehicle")
+
+    def get_level_by_reg(self, regnum):
+        return self._locate(regnum, "level")
+
+    def set_charge(self, regnum, charge):
+        level = self.get_level_by_reg(regnum)
+        if level is None:
+            return False
+        with self._lock:
+            return self._call(self.owners[level], "set_charge", regnum, charge)
+
+    # Cross-shard queries, merged in level order
+
+    def status(self):
+        return list(heapq.merge(*self._all("status").values(), key=lambda row: row[1]))
+
+    def get_slots_by_color(self, color):
+        return list(heapq.merge(*self._all("get_slots_by_color", color).values(),
+                                key=lambda row: row[0]))
+
+    def get_regs_by_color(self, color):
+        per_level = heapq.merge(*self._all("regs_by_color", color).values(), key=lambda row: row[0])
+        return [regnum for _, regs in per_level for regnum in regs]
+
+    def status_snapshot(self):
+        return ShardedSnapshot(self._all("snapshot"), tuple(self.owners.items()))
+
+    def status_page(self, limit, cursor=None, level=None, ev=None, vehicle_type=None, snapshot=None):
+        # pages walk the levels in order, asking each level's shard in turn;
+        # one row more than needed is fetched to know whether any follow
+        owners = dict(snapshot.levels) if snapshot is not None else self.owners
+        levels = sorted(owners) if level is None else [level] if level in owners else []
+        if cursor is not None:
+            levels = [number for number in levels if number >= cursor[0]]
+        rows = []
+        with self._lock:
+            for number in levels:
+                shard = owners[number]
+                token = snapshot.tokens[shard] if snapshot is not None else None
+                lot_cursor = cursor if cursor is not None and cursor[0] == number else None
+                found, _ = self._call(shard, "status_page", limit + 1 - len(rows), lot_cursor,
+                                      number, ev, vehicle_type, token)
+                rows += found
+                if len(rows) > limit:
+                    rows.pop()
+                    return rows, _cursor_of(rows[-1])
+        return rows, None
+
+    def iter_status(self, level=None, ev=None, vehicle_type=None, cursor=None, snapshot=None):
+        while True:
+            rows, cursor = self.status_page(PAGE, cursor, level, ev, vehicle_type, snapshot)
+            yield from rows
+            if cursor is None:
+                return
+
+    # Reservations; ids are made unique across shards
+
+    def _global(self, shard, reservation):
+        if reservation is None:
+            return None
+        return replace(reservation, id=reservation.id * MAX_SHARDS + self._position[shard])
+
+    def reserve(self, regnum, start, end, ev=False, level=None):
+        # like Facility.reserve; without a level the home shard is tried first
+        with self._lock:
+            for shard in self._candidates(regnum, level):
+                reservation = self._call(shard, "reserve", regnum, start, end, ev, level)
+                if reservation is not None:
+                    return self._global(shard, reservation)
+        return None
+
+    def cancel_reservation(self, reservation_id):
+        local_id, position = divmod(reservation_id, MAX_SHARDS)
+        if position >= len(self.names):
+            return False
+        with self._lock:
+            return self._call(self.names[position], "cancel_reservation", local_id)
+
+    def available_slots(self, start, end, ev=False, level=None):
+        if level is not None:
+            if level not in self.owners:
+                return []
+            with self._lock:
+                return self._call(self.owners[level], "available_slots", start, end, ev, level)
+        return list(heapq.merge(*self._all("available_slots", start, end, ev).values(),
+                                key=lambda row: row[1]))
+
+    def get_reservations(self, start, end, ev=None, level=None):
+        found = [self._global(shard, reservation)
+                 for shard, reservations in self._all("get_reservations", start, end, ev, level).items()
+                 for reservation in reservations]
+        return sorted(found, key=lambda r: (r.start, r.id))
@@ -0,0 +1,278 @@
+import itertools
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+from domain.facility import Facility
+
+# Facility methods a router may call directly
+FORWARDED = frozenset({
+    "layout", "status", "get_slots_by_color", "get_slot_by_reg",
+    "reserve", "cancel_reservation", "available_slots", "get_reservations",
+})
+MAX_SNAPSHOTS = 64  # status snapshots kept per shard; older tokens expire
+
+
+class ShardServer:
+    """One shard: a Facility holding some of the levels, served to routers.
+
+    Requests are lists of (operation, args) answered with a list of
+    (ok, value) pairs, so a router sends one message per shard per call.
+    Operations run one at a time, under a lock; shards run in parallel.
+
+    Every regnum has a home shard (see ShardedLot). A shard's `foreign`
+    directory records which other shard holds each of its home vehicles
+    that parked elsewhere, so duplicates and lookups need only the home.
+    """
+
+    def __init__(self, name, lot):
+        self.name = name
+        self.lot = lot
+        self.foreign = {}   # home regnum -> shard it is parked on
+        self.claims = {}    # home regnum -> token of the router call parking it
+        self._lock = threading.Lock()
+        self._snapshots = OrderedDict()
+        self._tokens = itertools.count(1)
+        self.closing = False
+        self.closed = threading.Event()
+
+    def handle(self, calls):
+        replies = []
+        with self._lock:
+            for operation, args in calls:
+                try:
+                    if operation in FORWARDED:
+                        value = getattr(self.lot, operation)(*args)
+                    elif operation in OPERATIONS:
+                        value = getattr(self, operation)(*args)
+                    else:
+                        raise LookupError(f"unknown shard operation {operation!r}")
+                    replies.append((True, value))
+                except (ValueError, LookupError, TypeError) as e:
+                    replies.append((False, e))
+                except Exception as e:
+                    # may not pickle; the router re-raises it as a RuntimeError
+                    replies.append((False, RuntimeError(f"{type(e).__name__}: {e}")))
+        return replies
+
+    def _occupant(self, slot_id, ev, level):
+        lot = self.lot.levels.get(level)
+        if lot is None:
+            return None
+        slots = lot.ev_slots if ev else lot.slots
+        return slots[slot_id - 1] if 0 < slot_id <= len(slots) else None
+
+    # Parking
+
+    def park_many(self, entries, token=None):
+        # like Facility.park_many, also refusing home vehicles parked on
+        # other shards or claimed by another call than `token`'s
+        entries = list(entries)
+        if not self.foreign and not self.claims:
+            return self.lot.park_many(entries)
+        results = [None] * len(entries)
+        allowed = []
+        for i, entry in enumerate(entries):
+            regnum = entry[0].regnum
+            if regnum in self.foreign or self.claims.get(regnum, token) != token:
+                results[i] = (None, None, f"Vehicle {regnum} is already parked")
+            else:
+                allowed.append(i)
+        for i, result in zip(allowed, self.lot.park_many([entries[i] for i in allowed])):
+            results[i] = result
+            if result[2] is None:
+                self.claims.pop(entries[i][0].regnum, None)
+        return results
+
+    def take_many(self, entries):
+        # like Facility.leave_many, but returns the vehicle that left (or None)
+        entries = list(entries)
+        vehicles = [self._occupant(slot_id, ev, level) for slot_id, ev, level in entries]
+        results = self.lot.leave_many(entries)
+        return [vehicle if ok else None for vehicle, ok in zip(vehicles, results)]
+
+    def create_lot(self, capacity, ev_capacity, level):
+        # like Facility.create_lot; returns the regnums of the vehicles it
+        # removed, whose homes must forget them
+        old = self.lot.levels.get(level)
+        dropped = [vehicle.regnum for _, _, vehicle in old.status()] if old is not None else []
+        self.lot.create_lot(capacity, ev_capacity, level)
+        return dropped
+
+    def set_charge(self, regnum, charge):
+        vehicle = self.lot.get_vehicle_by_reg(regnum)
+        if vehicle is None or not hasattr(vehicle, "setCharge"):
+            return False
+        vehicle.setCharge(charge)
+        return True
+
+    # Directory of home vehicles
+
+    def claim(self, regnums, token):
+        # holds home regnums for a router call parking them on another
+        # shard; an error message for each one already parked (or being
+        # parked), else None
+        errors = []
+        for regnum in regnums:
+            if (regnum in self.foreign or regnum in self.claims
+                    or self.lot.get_level_by_reg(regnum) is not None):
+                errors.append(f"Vehicle {regnum} is already parked")
+            else:
+                self.claims[regnum] = token
+                errors.append(None)
+        return errors
+
+    def register(self, placements, token):
+        # claimed regnums were parked: (regnum, shard) pairs
+        for regnum, shard in placements:
+            if self.claims.get(regnum) == token:
+                del self.claims[regnum]
+            self.foreign[regnum] = shard
+
+    def release(self, regnums, token):
+        # claimed regnums that could not be parked
+        for regnum in regnums:
+            if self.claims.get(regnum) == token:
+                del self.claims[regnum]
+
+    def forget(self, regnums):
+        # home regnums that left their shard
+        for regnum in regnums:
+            self.foreign.pop(regnum, None)
+
+    def locate(self, regnum, what):
+        # ("here", value) for a vehicle on this shard, where `what` is
+        # "slot", "vehicle" or "level"; ("at", shard) for one of ours parked
+        # elsewhere; None if not parked
+        level = self.lot.get_level_by_reg(regnum)
+        if level is not None:
+            if what == "slot":
+                return "here", self.lot.get_slot_by_reg(regnum)
+            if what == "vehicle":
+                return "here", self.lot.get_vehicle_by_reg(regnum)
+            return "here", level
+        shard = self.foreign.get(regnum)
+        return None if shard is None else ("at", shard)
+
+    def regnums(self):
+        return list(self.lot.reg_level)
+
+    def set_foreign(self, placements):
+        # replaces the directory; used after the shard set changes
+        self.foreign = dict(placements)
+
+    # Reads
+
+    def regs_by_color(self, color):
+        # [(level, regnums)], so a router can merge shards in level order
+        levels = self.lot.levels
+        return [(level, regs) for level in self.lot.level_numbers
+                if (regs := levels[level].get_regs_by_color(color))]
+
+    def snapshot(self):
+        token = next(self._tokens)
+        self._snapshots[token] = self.lot.status_snapshot()
+        if len(self._snapshots) > MAX_SNAPSHOTS:
+            self._snapshots.popitem(last=False)
+        return token
+
+    def status_page(self, limit, cursor=None, level=None, ev=None, vehicle_type=None, token=None):
+        snapshot = None
+        if token is not None:
+            snapshot = self._snapshots.get(token)
+            if snapshot is None:
+                raise LookupError("status snapshot has expired; take a new one")
+        return self.lot.status_page(limit, cursor, level=level, ev=ev,
+                                    vehicle_type=vehicle_type, snapshot=snapshot)
+
+    # Rebalancing
+
+    def export_level(self, level):
+        # removes a level and returns (capacity, ev_capacity, entries) for
+        # import_level on its new shard; reservations on it are dropped
+        lot = self.lot.drop_level(level)
+        if lot is None:
+            return None
+        entries = []
+        for label, _, vehicle in lot.status():
+            ev = isinstance(label, str)
+            entries.append((vehicle, int(label[3:]) if ev else label, ev, level))
+        return lot.capacity, lot.ev_capacity, entries
+
+    def import_level(self, capacity, ev_capacity, level, entries):
+        self.lot.create_lot(capacity, ev_capacity, level)
+        self.lot.restore(entries)
+
+    def checkpoint(self):
+        # level moves are not journaled; a snapshot makes them durable
+        if hasattr(self.lot, "snapshot"):
+            self.lot.snapshot()
+
+    def close(self):
+        if hasattr(self.lot, "close"):
+            self.lot.close()
+        self.closing = True
+
+
+OPERATIONS = frozenset({
+    "create_lot", "park_many", "take_many", "set_charge", "claim", "register", "release", "forget", "locate",
+    "regnums", "set_foreign", "regs_by_color", "snapshot", "status_page",
+    "export_level", "import_level", "checkpoint", "close",
+})
+
+
+def _address():
+    if hasattr(os, "fork"):     # AF_UNIX where available
+        return os.path.join(tempfile.mkdtemp(prefix="parking-shard-"), "socket")
+    return ("127.0.0.1", 0)
+
+
+def _serve_connection(server, conn):
+    with conn:
+        while not server.closed.is_set():
+            try:
+                calls = conn.recv()
+            except (EOFError, OSError):
+                return
+            conn.send(server.handle(calls))
+            if server.closing:
+                server.closed.set()
+
+
+def _wake_on_close(server, address, authkey):
+    # accept() cannot be interrupted portably; a last connection ends it
+    server.closed.wait()
+    Client(address, authkey=authkey).close()
+
+
+def run_shard(name, authkey, ready, directory=None):
+    """Process entry point: serves a shard until a router sends close.
+
+    With a directory, the shard's levels are journaled there and recovered
+    on start. The listening address is sent back through `ready`.
+    """
+    lot = Facility(0, 0, 0)
+    if directory is not None:
+        from persistence.persistent_lot import PersistentLot
+        lot = PersistentLot(lot, directory)
+    server = ShardServer(name, lot)
+    address = _address()
+    with Listener(address, authkey=authkey) as listener:
+        ready.send(listener.address)
+        ready.close()
+        threading.Thread(target=_wake_on_close, args=(server, listener.address, authkey),
+                         daemon=True).start()
+        while True:
+            try:
+                conn = listener.accept()
+            except AuthenticationError:
+                continue
+            if server.closed.is_set():
+                conn.close()
+                break
+            threading.Thread(target=_serve_connection, args=(server, conn), daemon=True).start()
+    if isinstance(address, str):
+        os.rmdir(os.path.dirname(address))
@@ -0,0 +1,51 @@
+import heapq
+import itertools
+
+
+class Simulator:
+    """Discrete-event loop over simulated time.
+
+    Callbacks are kept in a heap by due time and run in that order, ties in
+    the order they were scheduled; `now` jumps straight from one event to
+    the next. Pass `sim.clock` wherever a component takes a clock, so it
+    sees simulated time too.
+    """
+
+    def __init__(self, start=0.0):
+        self.now = start
+        self.processed = 0
+        self._queue = []    # (time, seq, callback, args)
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def clock(self):
+        return self.now
+
+    def schedule(self, at, callback, *args):
+        if at < self.now:
+            raise ValueError(f"cannot schedule at {at}, before now ({self.now})")
+        heapq.heappush(self._queue, (at, next(self._seq), callback, args))
+
+    def after(self, delay, callback, *args):
+        self.schedule(self.now + delay, callback, *args)
+
+    def peek(self):
+        # time of the next event, or None
+        return self._queue[0][0] if self._queue else None
+
+    def run(self, until=None):
+        # processes events due up to `until` (all of them for None); now ends at until
+        queue = self._queue
+        pop = heapq.heappop
+        processed = 0
+        while queue and (until is None or queue[0][0] <= until):
+            at, _, callback, args = pop(queue)
+            self.now = at
+            callback(*args)
+            processed += 1
+        self.processed += processed
+        if until is not None and until > self.now:
+            self.now = until
+        return processed
@@ -0,0 +1,230 @@
+import math
+from array import array
+from collections import deque
+
+from simulation.engine import Simulator
+
+
+class LocalChargingClient:
+    """ChargingServiceClient stand-in calling a ChargingSessionEngine in
+    process, so a simulation charges through the service's own session and
+    power-allocation code without HTTP. Give the engine the simulator's clock.
+    """
+
+    def __init__(self, engine, initial_charge=20.0):
+        self.engine = engine
+        self.initial_charge = initial_charge
+
+    def start_charging(self, regnum):
+        self.engine.start(regnum, initial_charge=self.initial_charge)
+        return {"message": f"Charging started for {regnum}"}
+
+    def stop_charging(self, regnum):
+        self.engine.stop(regnum)
+        return {"message": f"Charging stopped for {regnum}"}
+
+    def get_status(self, regnum):
+        return self.engine.status(regnum)
+
+
+class _Pool:
+    # regular or EV slots: occupancy and queue, integrated over time
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.occupied = 0
+        self.queue = deque()    # [arrival, queued at, still waiting]
+        self.waiting = 0
+        self.reset(0.0)
+
+    def reset(self, now):
+        self.since = self.last = now
+        self.arrivals = self.parked = self.balked = self.reneged = self.errors = 0
+        self.slot_seconds = self.queue_seconds = self.full_seconds = 0.0
+        self.peak = self.occupied
+        self.queue_peak = self.waiting
+        self.waits = array("d")  # seconds queued, for those who got a slot after queueing
+
+    def touch(self, now):
+        elapsed = now - self.last
+        if elapsed > 0:
+            self.slot_seconds += self.occupied * elapsed
+            self.queue_seconds += self.waiting * elapsed
+            if self.occupied >= self.capacity:
+                self.full_seconds += elapsed
+            self.last = now
+
+    def report(self, now):
+        self.touch(now)
+        span = now - self.since
+        waits = sorted(self.waits)
+        rejected = self.balked + self.reneged + self.errors
+
+        def wait_at(q):
+            return waits[min(len(waits) - 1, int(q * len(waits)))] if waits else 0.0
+
+        return {
+            "capacity": self.capacity,
+            "arrivals": self.arrivals,
+            "parked": self.parked,
+            "rejected": rejected,
+            "balked": self.balked,      # queue full on arrival
+            "reneged": self.reneged,    # gave up waiting
+            "errors": self.errors,      # refused by the lot, e.g. regnum already parked
+            "rejection_rate": rejected / self.arrivals if self.arrivals else 0.0,
+            "mean_occupancy": self.slot_seconds / span if span else float(self.occupied),
+            "occupancy_rate": (self.slot_seconds / span / self.capacity
+                               if span and self.capacity else 0.0),
+            "peak_occupancy": self.peak,
+            "full_share": self.full_seconds / span if span else 0.0,
+            "mean_queue": self.queue_seconds / span if span else float(self.waiting),
+            "peak_queue": self.queue_peak,
+            "queued_share": len(waits) / self.parked if self.parked else 0.0,
+            "mean_wait": sum(waits) / len(waits) if waits else 0.0,
+            "p95_wait": wait_at(0.95),
+            "max_wait": waits[-1] if waits else 0.0,
+        }
+
+
+class LotSimulation:
+    """Replays an arrival stream through a ParkingPresenter on a Simulator.
+
+    Arrivals park through presenter.park_vehicle() and leave through
+    remove_vehicle() after their dwell time; EVs start charging when parked
+    and stop before leaving. EVs use EV slots only. When a pool is full,
+    arrivals queue (up to `queue_limit`, 0 for none) and give up after
+    `patience` seconds; freed slots go to the queue in arrival order.
+    Statistics cover the time after `warmup`.
+    """
+
+    def __init__(self, presenter, arrivals, sim=None, queue_limit=0, patience=900.0,
+                 charging=True, warmup=0.0):
+        self.presenter = presenter
+        self.sim = sim if sim is not None else Simulator()
+        self.queue_limit = queue_limit
+        self.patience = patience
+        self.charging = charging
+        self.warmup = warmup
+        layout = presenter.parking_lot.layout()
+        self.regular = _Pool(sum(capacity for capacity, _, _ in layout))
+        self.ev = _Pool(sum(ev_capacity for _, ev_capacity, _ in layout))
+        # a single-level ParkingLot takes no level on leave()
+        self._levelled = len(layout) > 1
+        self.final_charges = array("d")
+        self._arrivals = iter(arrivals)
+        self._spare = []    # regnums of vehicles that left, reused for new arrivals
+        self._minted = 0
+        self._scheduled = False
+
+    def run(self, until=math.inf):
+        if not self._scheduled:
+            self._scheduled = True
+            if self.warmup:
+                self.sim.schedule(self.sim.now + self.warmup, self._reset)
+            self._next_arrival()
+        return self.sim.run(None if math.isinf(until) else until)
+
+    def _reset(self):
+        now = self.sim.now
+        for pool in (self.regular, self.ev):
+            pool.touch(now)
+            pool.reset(now)
+        self.final_charges = array("d")
+
+    def _next_arrival(self):
+        arrival = next(self._arrivals, None)
+        if arrival is not None:
+            self.sim.schedule(max(arrival.time, self.sim.now), self._arrive, arrival)
+
+    def _arrive(self, arrival):
+        self._next_arrival()
+        now = self.sim.now
+        pool = self.ev if arrival.electric else self.regular
+        pool.touch(now)
+        pool.arrivals += 1
+        if not pool.waiting and self._park(arrival, pool):
+            return
+        if pool.waiting < self.queue_limit:
+            entry = [arrival, now, True]
+            pool.queue.append(entry)
+            pool.waiting += 1
+            pool.queue_peak = max(pool.queue_peak, pool.waiting)
+            self.sim.after(self.patience, self._renege, pool, entry)
+        else:
+            pool.balked += 1
+
+    def _renege(self, pool, entry):
+        if entry[2]:
+            pool.touch(self.sim.now)
+            entry[2] = False
+            pool.waiting -= 1
+            pool.reneged += 1
+
+    def _park(self, arrival, pool):
+        presenter = self.presenter
+        regnum = arrival.regnum
+        if regnum is None:
+            if self._spare:
+                regnum = self._spare.pop()
+            else:
+                self._minted += 1
+                regnum = f"SIM{self._minted:08d}"
+        factory = presenter.electric_factory if arrival.electric else presenter.regular_factory
+        result = presenter.park_vehicle(factory, arrival.vehicle_type, regnum, arrival.make,
+                                        "Model", arrival.color)
+        if not result.success:
+            if arrival.regnum is None:
+                self._spare.append(regnum)
+            if result.message == "Parking is full":
+                return False
+            # refused for another reason; queueing would not help
+            pool.errors += 1
+            return True
+        pool.occupied += 1
+        pool.parked += 1
+        pool.peak = max(pool.peak, pool.occupied)
+        if arrival.electric and self.charging:
+            presenter.start_charging(regnum)
+        self.sim.after(arrival.dwell, self._depart, arrival, regnum, result.slot, result.level, pool)
+        return True
+
+    def _depart(self, arrival, regnum, slot, level, pool):
+        presenter = self.presenter
+        if arrival.electric and self.charging:
+            presenter.stop_charging(regnum)
+            status = presenter.get_charge_status(regnum)
+            if status:
+                self.final_charges.append(status["charge"])
+        presenter.remove_vehicle(slot, level if self._levelled else None, ev=arrival.electric)
+        pool.touch(self.sim.now)
+        pool.occupied -= 1
+        if arrival.regnum is None:
+            self._spare.append(regnum)
+        while pool.queue:
+            entry = pool.queue.popleft()
+            if not entry[2]:
+                continue    # reneged
+            parked = pool.parked
+            if not self._park(entry[0], pool):
+                pool.queue.appendleft(entry)
+                break
+            entry[2] = False
+            pool.waiting -= 1
+            if pool.parked > parked:
+                pool.waits.append(self.sim.now - entry[1])
+                break
+            # refused for another reason; the slot is still free for the next in line
+
+    def report(self):
+        now = self.sim.now
+        charges = self.final_charges
+        return {
+            "simulated_days": (now - self.regular.since) / 86400,
+            "events": self.sim.processed,
+            "regular": self.regular.report(now),
+            "ev": self.ev.report(now),
+            "charging": {
+                "sessions": len(charges),
+                "mean_final_charge": sum(charges) / len(charges) if charges else 0.0,
+                "fully_charged": sum(1 for c in charges if c >= 100.0),
+            },
+        }
@@ -0,0 +1,112 @@
+import csv
+import math
+import random
+from dataclasses import dataclass
+
+# Relative arrival rate for each hour of the day, with commuter peaks
+DIURNAL = (
+    0.2, 0.1, 0.1, 0.1, 0.2, 0.5, 1.2, 2.2, 2.6, 1.8, 1.3, 1.3,
+    1.5, 1.4, 1.2, 1.2, 1.4, 1.6, 1.3, 0.9, 0.7, 0.5, 0.4, 0.3,
+)
+WEEKEND = 0.6   # Saturday and Sunday rates relative to weekdays
+
+COLORS = ("White", "Black", "Grey", "Silver", "Blue", "Red", "Green", "Yellow")
+MAKES = ("Toyota", "Volkswagen", "Ford", "Honda", "BMW", "Tesla", "Nissan", "Kia")
+
+
+@dataclass(slots=True)
+class Arrival:
+    time: float         # simulated seconds
+    dwell: float        # seconds parked once a slot is found
+    electric: bool = False
+    vehicle_type: str = "Car"
+    color: str = "White"
+    make: str = "Toyota"
+    regnum: str | None = None   # None: the simulation assigns one
+
+
+class SyntheticTraffic:
+    """Seeded arrivals: a Poisson process whose rate follows `profile` hour
+    by hour, with log-normally distributed dwell times.
+
+    Simulated time 0 is midnight at the start of a Monday. The same seed
+    gives the same stream.
+    """
+
+    def __init__(self, arrivals_per_day, dwell_hours=3.0, dwell_sigma=0.8, ev_share=0.1,
+                 motorcycle_share=0.05, profile=DIURNAL, weekend=WEEKEND, seed=None):
+        if arrivals_per_day < 0 or dwell_hours <= 0:
+            raise ValueError("arrivals_per_day must not be negative and dwell_hours must be positive")
+        self.rng = random.Random(seed)
+        # weekday arrivals per second for each hour
+        scale = arrivals_per_day / sum(profile) / 3600
+        self.hourly = [weight * scale for weight in profile]
+        self.weekend = weekend
+        self.ev_share = ev_share
+        self.motorcycle_share = motorcycle_share
+        # log-normal parameters giving a mean of dwell_hours
+        self.dwell_mu = math.log(dwell_hours * 3600) - dwell_sigma ** 2 / 2
+        self.dwell_sigma = dwell_sigma
+
+    def rate(self, t):
+        # arrivals per second at simulated time t
+        day, second = divmod(t, 86400)
+        rate = self.hourly[int(second // 3600)]
+        return rate * self.weekend if day % 7 >= 5 else rate
+
+    def dwell(self):
+        return self.rng.lognormvariate(self.dwell_mu, self.dwell_sigma)
+
+    def arrivals(self, start=0.0, end=math.inf):
+        # the rate is constant within an hour and gaps are memoryless, so a
+        # gap running past the hour simply restarts at the next one
+        rng = self.rng
+        t = start
+        while t < end:
+            hour_end = (t // 3600 + 1) * 3600
+            rate = self.rate(t)
+            if rate > 0:
+                gap = rng.expovariate(rate)
+                if t + gap < hour_end:
+                    t += gap
+                    if t >= end:
+                        return
+                    yield Arrival(
+                        t,
+                        self.dwell(),
+                        rng.random() < self.ev_share,
+                        "Motorcycle" if rng.random() < self.motorcycle_share else "Car",
+                        rng.choice(COLORS),
+                        rng.choice(MAKES),
+                    )
+                    continue
+            t = hour_end
+
+
+def read_arrivals(path):
+    """Arrivals recorded in a CSV file, in time order.
+
+    Columns: `arrival` (seconds) and either `dwell` (seconds) or
+    `departure`; optionally `electric` (1/true), `vehicle_type`, `color`,
+    `make` and `regnum`.
+    """
+    with open(path, newline="") as f:
+        last = -math.inf
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                arrival = float(row["arrival"])
+                dwell = float(row["dwell"]) if row.get("dwell") else float(row["departure"]) - arrival
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"{path}:{line}: needs an arrival and a dwell or departure time")
+            if arrival < last:
+                raise ValueError(f"{path}:{line}: arrivals must be in time order")
+            last = arrival
+            yield Arrival(
+                arrival,
+                max(0.0, dwell),
+                (row.get("electric") or "").strip().lower() in ("1", "true", "yes"),
+                row.get("vehicle_type") or "Car",
+                row.get("color") or "White",
+                row.get("make") or "Toyota",
+                row.get("regnum") or None,
+            )
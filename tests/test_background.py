@@ -0,0 +1,57 @@
+import threading
+
+from ui.background import BackgroundWorker
+
+
+class FakeRoot:
+    # stands in for Tk: after() callbacks are run by the test
+    def after(self, ms, callback):
+        self.callback = callback
+        return "poll"
+
+    def after_cancel(self, poll_id):
+        pass
+
+
+def poll_until_idle(worker, root):
+    for _ in range(200):
+        root.callback()
+        if not worker._in_flight:
+            return
+        threading.Event().wait(0.01)
+
+
+def test_results_are_delivered_on_poll():
+    root = FakeRoot()
+    busy = []
+    worker = BackgroundWorker(root, max_workers=1, on_busy=busy.append)
+    done, failed = [], []
+    worker.submit(lambda: 42, on_done=done.append)
+    worker.submit(lambda: 1 / 0, on_error=failed.append)
+
+    poll_until_idle(worker, root)
+    assert done == [42]
+    assert isinstance(failed[0], ZeroDivisionError)
+    assert busy[-1] == []
+    worker.shutdown(wait=True)
+
+
+def test_task_cancelled_after_pickup_leaves_in_flight():
+    root = FakeRoot()
+    worker = BackgroundWorker(root, max_workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait()
+
+    worker.submit(blocker)
+    started.wait()
+    # queued behind the blocker; cancel it once the pool has picked it up
+    task = worker.submit(lambda: None, on_done=lambda value: None)
+    task.cancelled = True
+    release.set()
+
+    poll_until_idle(worker, root)
+    assert worker._in_flight == []
+    worker.shutdown(wait=True)
@@ -0,0 +1,137 @@
+import threading
+import time
+
+from services.charging_cache import CachedChargingClient
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+        self.charge = {}
+        self.gate = None   # an Event get_status waits on, to hold a request open
+
+    def get_status(self, regnum):
+        self.calls.append(regnum)
+        if self.gate is not None:
+            self.gate.wait(5)
+        return {"charge": self.charge.get(regnum, 0)} if regnum != "MISSING" else None
+
+    def get_status_batch(self, regnums):
+        self.calls.append(tuple(regnums))
+        if self.gate is not None:
+            self.gate.wait(5)
+        return {regnum: {"charge": self.charge.get(regnum, 0)} for regnum in regnums}
+
+    def start_charging(self, regnum):
+        return True
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_and_lru():
+    client, clock = FakeClient(), Clock()
+    cache = CachedChargingClient(client, ttl=2.0, maxsize=2, clock=clock)
+    cache.get_status("A")
+    cache.get_status("A")
+    clock.now = 2.0
+    cache.get_status("A")
+    assert client.calls == ["A", "A"]
+
+    cache.get_status("B")
+    cache.get_status("A")      # A is now the most recently used
+    cache.get_status("C")      # evicts B
+    cache.get_status("A")
+    cache.get_status("B")
+    assert client.calls == ["A", "A", "B", "C", "B"]
+    assert cache.stats()["evictions"] == 2
+
+
+def test_failures_are_not_cached():
+    client = FakeClient()
+    cache = CachedChargingClient(client, clock=Clock())
+    assert cache.get_status("MISSING") is None
+    assert cache.get_status("MISSING") is None
+    assert client.calls == ["MISSING", "MISSING"]
+
+
+def test_concurrent_misses_share_one_request():
+    client = FakeClient()
+    client.gate = threading.Event()
+    cache = CachedChargingClient(client, clock=Clock())
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_status("A"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()["coalesced"] < 4:
+        time.sleep(0.001)
+    client.gate.set()
+    for thread in threads:
+        thread.join()
+    assert client.calls == ["A"]
+    assert results == [{"charge": 0}] * 5
+
+
+def test_invalidation_drops_entries_and_in_flight_answers():
+    client = FakeClient()
+    cache = CachedChargingClient(client, clock=Clock())
+    cache.get_status("A")
+    cache.start_charging("A")
+    client.charge["A"] = 10
+    assert cache.get_status("A") == {"charge": 10}
+
+    client.gate = threading.Event()
+    thread = threading.Thread(target=cache.get_status, args=("B",))
+    thread.start()
+    while "B" not in client.calls:
+        time.sleep(0.001)
+    cache.invalidate("B")          # the change lands while B is being fetched
+    client.gate.set()
+    thread.join()
+    cache.get_status("B")
+    assert client.calls.count("B") == 2
+
+
+def test_invalidation_during_a_batch_fetch():
+    client = FakeClient()
+    client.gate = threading.Event()
+    cache = CachedChargingClient(client, clock=Clock())
+    thread = threading.Thread(target=cache.get_status_batch, args=(["B", "C"],))
+    thread.start()
+    while not client.calls:
+        time.sleep(0.001)
+    cache.invalidate("B")
+    client.gate.set()
+    thread.join()
+    cache.get_status_batch(["B", "C"])
+    assert client.calls == [("B", "C"), ("B",)]
+
+
+def test_batch_fetches_only_the_misses():
+    client = FakeClient()
+    cache = CachedChargingClient(client, clock=Clock())
+    cache.get_status("A")
+    assert cache.get_status_batch(["A", "B", "C"]) == {r: {"charge": 0} for r in "ABC"}
+    assert client.calls == ["A", ("B", "C")]
+    cache.get_status_batch(["B", "C"])
+    assert len(client.calls) == 2
+
+
+def test_a_status_read_during_a_write_is_not_kept():
+    client = FakeClient()
+    cache = CachedChargingClient(client, clock=Clock())
+
+    def start_charging(regnum):
+        # another caller reads the status before the change is applied
+        assert cache.get_status(regnum) == {"charge": 0}
+        client.charge[regnum] = 10
+        return True
+
+    client.start_charging = start_charging
+    assert cache.start_charging("A")
+    assert cache.get_status("A") == {"charge": 10}
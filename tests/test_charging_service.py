@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from services import ev_charging_service as service
+from services.charging_sessions import ChargingSessionEngine
+from services.session_store import StripedMemoryStore
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(service, "engine", ChargingSessionEngine())
+    return service.app.test_client()
+
+
+def test_batch_start_reports_failures_per_regnum(client, monkeypatch):
+    start = service.engine.start
+
+    def failing_start(regnum, **kwargs):
+        if regnum == "FULL":
+            raise RuntimeError("shared session store is full")
+        return start(regnum, **kwargs)
+
+    monkeypatch.setattr(service.engine, "start", failing_start)
+    response = client.post("/charge/start:batch", json={"regnums": ["A", "FULL", 7, "B"]})
+
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [r["regnum"] for r in results] == ["A", "FULL", 7, "B"]
+    assert "message" in results[0] and "message" in results[3]
+    assert "store is full" in results[1]["error"]
+    assert results[2]["error"] == "Invalid regnum"
+    assert service.engine.status("B")["status"] == "charging"
+
+
+def test_batch_size_limit(client):
+    too_many = [f"R{i}" for i in range(service.MAX_BATCH_SIZE + 1)]
+    response = client.post("/charge/status:batch", json={"regnums": too_many})
+    assert response.status_code == 413
+    assert "limit is" in response.get_json()["error"]
+
+
+def test_body_size_limit(client):
+    response = client.post("/charge/start:batch", data=b"x" * (service.app.config["MAX_CONTENT_LENGTH"] + 1),
+                           content_type="application/json")
+    assert response.status_code == 413
+    assert response.get_json() == {"error": "Request body too large"}
+
+
+def test_batch_needs_a_regnum_list(client):
+    response = client.post("/charge/stop:batch", json={"regnums": "A"})
+    assert response.status_code == 400
+
+
+def test_only_stopping_a_charging_session_is_counted(client):
+    stopped = service.sessions_stopped.count(60)
+    client.post("/charge/start", json={"regnum": "A"})
+
+    assert client.post("/charge/stop", json={"regnum": "A"}).status_code == 200
+    assert client.post("/charge/stop", json={"regnum": "A"}).status_code == 200
+    response = client.post("/charge/stop", json={"regnum": "NOPE"})
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Vehicle not found"}
+
+    results = client.post("/charge/stop:batch", json={"regnums": ["A", "NOPE"]}).get_json()["results"]
+    assert "message" in results[0]
+    assert results[1] == {"regnum": "NOPE", "error": "Vehicle not found"}
+    assert service.sessions_stopped.count(60) == stopped + 1
+
+
+class RacingStore(StripedMemoryStore):
+    # holds each stop() until a second one arrives, so both are in flight
+    def __init__(self):
+        super().__init__()
+        self.barrier = threading.Barrier(2, timeout=5)
+
+    def stop(self, regnum, now):
+        self.barrier.wait()
+        return super().stop(regnum, now)
+
+
+def test_concurrent_stops_are_counted_once(monkeypatch):
+    monkeypatch.setattr(service, "engine", ChargingSessionEngine(store=RacingStore()))
+    service.engine.start("A")
+    stopped = service.sessions_stopped.count(60)
+    threads = [threading.Thread(target=service._stop, args=("A",)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert service.sessions_stopped.count(60) == stopped + 1
@@ -0,0 +1,71 @@
+import random
+
+from domain.facility import Facility, LevelIndex
+from domain.vehicle import Car
+
+
+def car(regnum):
+    return Car(regnum, "Make", "Model", "Red")
+
+
+def test_level_index_matches_a_scan():
+    rng = random.Random(3)
+    counts = [rng.randint(0, 2) for _ in range(13)]
+    index = LevelIndex(counts)
+    for _ in range(500):
+        pos = rng.randrange(len(counts))
+        counts[pos] = rng.randint(0, 2)
+        index.update(pos, counts[pos])
+        at = rng.randrange(len(counts))
+        above = [i for i in range(at, len(counts)) if counts[i]]
+        below = [i for i in range(at + 1) if counts[i]]
+        assert index.first_from(at) == (above[0] if above else None)
+        assert index.last_until(at) == (below[-1] if below else None)
+
+
+def test_find_level_prefers_the_nearest_with_space():
+    facility = Facility(1, 0, 5)
+    facility.park(car("A"), level=3)
+    assert facility.find_level(level=3) == 2   # 2 and 4 tie; the lower wins
+    facility.park(car("B"), level=2)
+    assert facility.find_level(level=3) == 4
+    facility.park(car("C"), level=4)
+    facility.park(car("D"), level=5)
+    assert facility.find_level(level=5) == 1
+    assert facility.find_level() == 1
+    facility.park(car("E"))
+    assert facility.find_level() is None
+    assert facility.park(car("F")) is None
+
+
+def test_index_follows_leaves_and_new_levels():
+    facility = Facility(1, 1, 2)
+    facility.park(car("A"), level=1)
+    facility.park(car("B"), level=2)
+    assert facility.find_level() is None
+    assert facility.find_level(ev=True) == 1
+    facility.create_lot(1, 0, 7)
+    assert facility.find_level(level=1) == 7
+    assert facility.leave(1, level=1)
+    assert facility.find_level(level=2) == 1
+    facility.create_lot(2, 0, 2)   # reconfiguring drops its vehicle
+    assert facility.get_slot_by_reg("B") is None
+    assert facility.find_level(level=2) == 2
+
+
+def test_batches_agree_with_single_calls():
+    single, batched = Facility(3, 1, 3), Facility(3, 1, 3)
+    entries = [(car(f"V{i}"), i % 4 == 0, i % 3 + 1) for i in range(14)]
+    expected = []
+    for vehicle, ev, level in entries:
+        slot = single.park(vehicle, ev, level)
+        expected.append(slot and (slot, single.get_level_by_reg(vehicle.regnum)))
+    results = batched.park_many(entries)
+    assert [slot and (slot, level) for slot, level, _ in results] == expected
+    assert [(s, l, v.regnum) for s, l, v in batched.status()] == \
+        [(s, l, v.regnum) for s, l, v in single.status()]
+
+    leaving = [(slot, ev, level) for (slot, level, _), (_, ev, _) in zip(results, entries) if slot][::2]
+    assert batched.leave_many(leaving) == [True] * len(leaving)
+    assert batched.leave_many(leaving) == [False] * len(leaving)
+    assert len(batched.status()) == len(single.status()) - len(leaving)
@@ -0,0 +1,56 @@
+import pytest
+
+from domain.parking_lot import ParkingLot
+from domain.vehicle import Car
+from factory.electric_vehicle_factory import ElectricVehicleFactory
+from tools.bench_allocator import run
+
+
+def car(regnum, color="Grey"):
+    return Car(regnum, "Make", "Model", color)
+
+
+def test_lookups_by_regnum_and_color():
+    lot = ParkingLot(3, 2, 1)
+    lot.park(car("A", "Red"))
+    lot.park(car("B", "Blue"))
+    lot.park(ElectricVehicleFactory().create("Car", "E", "Make", "Model", "red"), ev=True)
+
+    assert lot.get_slot_by_reg("B") == 2
+    assert lot.get_slot_by_reg("E") == "EV-1"
+    assert lot.get_vehicle_by_reg("A").regnum == "A"
+    assert lot.get_slots_by_color("RED") == [1, "EV-1"]
+    assert lot.get_regs_by_color("red") == ["A", "E"]
+
+    assert lot.leave(1)
+    assert lot.get_slot_by_reg("A") is None
+    assert lot.get_regs_by_color("red") == ["E"]
+
+
+def test_a_regnum_parks_only_once():
+    lot = ParkingLot(2, 1, 1)
+    lot.park(car("A"))
+    with pytest.raises(ValueError, match="already parked"):
+        lot.park(car("A"))
+    with pytest.raises(ValueError, match="already parked"):
+        lot.park(car("A"), ev=True)
+
+
+def test_allocator_benchmark_parks_unique_vehicles():
+    elapsed, operations = run(ParkingLot, 100, seed=1)
+    assert operations == 400
+
+
+def test_freed_slots_are_reused_lowest_first():
+    lot = ParkingLot(5, 2, 1)
+    for i in range(5):
+        assert lot.park(car(f"C{i}")) == i + 1
+    assert lot.park(car("FULL")) is None
+    for slot in (4, 2, 5):
+        assert lot.leave(slot)
+    assert not lot.leave(2)
+    assert [lot.park(car(f"N{i}")) for i in range(4)] == [2, 4, 5, None]
+    assert lot.park(car("E0"), ev=True) == 1
+    assert lot.get_slot_by_reg("E0") == "EV-1"
+    assert lot.leave(1, ev=True)
+    assert lot.park(car("E1"), ev=True) == 1
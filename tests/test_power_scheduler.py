@@ -0,0 +1,66 @@
+import pytest
+
+from services.power_scheduler import make_scheduler
+
+HOUR = 3600
+
+
+def scheduler(policy, budget_kw):
+    return make_scheduler(policy, budget_kw, clock=lambda: 0.0)
+
+
+def test_fair_share_fills_small_chargers_first():
+    site = scheduler("fair", 30)
+    site.start("A", 7, need_kwh=7, now=0)
+    site.start("B", 22, now=0)
+    site.start("C", 22, now=0)
+    assert site.allocations(now=0) == {"A": 7, "B": 11.5, "C": 11.5}
+
+    # A is full after an hour and its share goes to the others
+    assert site.completes_at("A", now=0) == pytest.approx(HOUR)
+    assert site.allocations(now=HOUR + 1) == {"B": 15, "C": 15}
+    assert site.energy("A", now=2 * HOUR) == pytest.approx(7)
+    assert site.energy("B", now=2 * HOUR) == pytest.approx(26.5)
+    assert site.stop("B", now=2 * HOUR) == pytest.approx(26.5)
+    assert site.power("C", now=2 * HOUR) == 22
+    assert site.allocated_kw == 22
+
+
+def test_priority_serves_lower_tiers_first():
+    site = scheduler("priority", 20)
+    site.start("A", 11, tier=0, now=0)
+    site.start("B", 11, tier=0, now=0)
+    site.start("C", 11, tier=1, now=0)
+    assert site.allocations(now=0) == {"A": 10, "B": 10, "C": 0}
+    site.stop("A", now=HOUR)
+    assert site.allocations(now=HOUR) == {"B": 11, "C": 9}
+    assert site.energy("C", now=2 * HOUR) == pytest.approx(9)
+
+
+def test_edf_charges_the_earliest_departure_first():
+    site = scheduler("edf", 22)
+    site.start("LATE", 11, departure=3 * HOUR, now=0)
+    site.start("NONE", 11, now=0)
+    site.start("SOON", 11, need_kwh=11, departure=HOUR, now=0)
+    assert site.allocations(now=0) == {"SOON": 11, "LATE": 11, "NONE": 0}
+    assert site.completing_soonest(5, now=0) == [("SOON", pytest.approx(HOUR))]
+    assert site.allocations(now=HOUR) == {"LATE": 11, "NONE": 11}
+    assert site.energy("NONE", now=2 * HOUR) == pytest.approx(11)
+    assert site.energy("LATE", now=2 * HOUR) == pytest.approx(22)
+
+
+def test_budget_changes_and_restarts():
+    site = scheduler("fair", 10)
+    site.start("A", 22, now=0)
+    site.set_budget(4, now=HOUR)
+    assert site.energy("A", now=2 * HOUR) == pytest.approx(14)
+    site.start("A", 22, now=2 * HOUR)         # replaces the earlier session
+    assert site.energy("A", now=2 * HOUR) == 0
+    assert len(site) == 1
+    site.start("FULL", 22, need_kwh=0, now=2 * HOUR)
+    assert site.power("FULL", now=2 * HOUR) == 0.0 and len(site) == 1
+    assert site.stop("MISSING") is None
+    with pytest.raises(ValueError):
+        site.start("B", 0)
+    with pytest.raises(ValueError):
+        make_scheduler("round-robin", 10)
@@ -0,0 +1,111 @@
+import random
+
+import pytest
+
+from domain.facility import Facility
+from domain.parking_lot import ParkingLot
+from domain.reservations import IntervalTree, Reservation
+from domain.vehicle import Car
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def lot_with_clock(capacity, ev_capacity=0, now=1000.0):
+    lot = ParkingLot(capacity, ev_capacity, 1)
+    lot.reservations.clock = Clock(now)
+    return lot
+
+
+def test_interval_tree_matches_brute_force():
+    rng = random.Random(7)
+    tree = IntervalTree(seed=1)
+    live = {}
+    for i in range(2000):
+        if live and rng.random() < 0.4:
+            reservation = live.pop(rng.choice(list(live)))
+            assert tree.remove(reservation)
+        else:
+            start = rng.uniform(0, 1000)
+            reservation = Reservation(i, f"R{i}", 1, False, i, start, start + rng.uniform(1, 50))
+            tree.insert(reservation)
+            live[i] = reservation
+        if i % 50 == 0:
+            lo = rng.uniform(0, 1000)
+            hi = lo + rng.uniform(0, 100)
+            expected = {r.id for r in live.values() if r.start < hi and r.end > lo}
+            assert {r.id for r in tree.overlapping(lo, hi)} == expected
+    assert len(tree) == len(live)
+    assert [r.start for r in tree] == sorted(r.start for r in live.values())
+
+
+def test_inclusive_overlap_takes_reservations_starting_at_the_end():
+    tree = IntervalTree()
+    tree.insert(Reservation(1, "A", 1, False, 0, 10.0, 20.0))
+    assert tree.overlapping(0.0, 10.0) == []
+    assert len(tree.overlapping(0.0, 10.0, inclusive=True)) == 1
+
+
+def test_reserve_takes_the_lowest_slot_free_over_the_window():
+    lot = lot_with_clock(3)
+    first = lot.reserve("A", 2000, 3000)
+    second = lot.reserve("B", 2500, 3500)
+    third = lot.reserve("C", 3000, 4000)
+    assert (first.index, second.index, third.index) == (0, 1, 0)
+    assert lot.available_slots(2500, 2600) == [(3, 1)]
+    with pytest.raises(ValueError, match="already has a reservation"):
+        lot.reserve("A", 2900, 3100)
+    assert lot.cancel_reservation(first.id)
+    assert lot.available_slots(2500, 2600) == [(1, 1), (3, 1)]
+
+
+def test_started_windows_skip_occupied_slots():
+    lot = lot_with_clock(4, now=1000.0)
+    for regnum in ("A", "B"):
+        lot.park(Car(regnum, "Make", "Model", "Grey"))
+    assert lot.available_slots(900, 1100) == [(3, 1), (4, 1)]
+    assert lot.reserve("Y", 900, 1100).index == 2
+    # a future window ignores who is parked now
+    assert lot.reserve("X", 1500, 2000).index == 0
+    assert lot.available_slots(1200, 1600) == [(2, 1), (3, 1), (4, 1)]
+
+
+def test_available_slots_matches_brute_force():
+    rng = random.Random(3)
+    lot = lot_with_clock(40, 10, now=1000.0)
+    for i in range(30):
+        if rng.random() < 0.5:
+            lot.park(Car(f"P{i}", "Make", "Model", "Grey"), ev=rng.random() < 0.2)
+        start = rng.uniform(500, 3000)
+        lot.reserve(f"R{i}", start, start + rng.uniform(10, 500), ev=rng.random() < 0.2)
+    now = lot.reservations.clock()
+    for _ in range(200):
+        ev = rng.random() < 0.3
+        start = rng.uniform(500, 3000)
+        end = start + rng.uniform(1, 300)
+        slots = lot.ev_slots if ev else lot.slots
+        booked = {r.index for r in lot.reservations.by_id.values()
+                  if r.ev == ev and r.start < end and r.end > start}
+        expected = [i for i in range(len(slots))
+                    if i not in booked and not (start <= now and slots[i] is not None)]
+        got = lot.available_slots(start, end, ev)
+        assert [lot._slot_label(ev, i) for i in expected] == [slot for slot, _ in got]
+
+
+def test_holder_gets_the_reserved_slot_and_others_do_not():
+    facility = Facility(2, 0, 2)
+    clock = facility.reservations.clock = Clock(1000.0)
+    reservation = facility.reserve("HOLDER", 1000.0, 2000.0, level=2)
+    facility.park(Car("A", "Make", "Model", "Grey"), level=2)
+    facility.park(Car("B", "Make", "Model", "Grey"), level=2)
+    # level 2 keeps its held slot, so B went to level 1
+    assert facility.get_level_by_reg("B") == 1
+    facility.park(Car("HOLDER", "Make", "Model", "Grey"))
+    assert facility.get_slot_by_reg("HOLDER") == (2, reservation.slot)
+    clock.now = 2500.0
+    assert facility.get_reservations(0, 5000) == [reservation]
@@ -0,0 +1,68 @@
+import multiprocessing
+import random
+
+import pytest
+
+from services.session_store import ChargingSession, SharedMemoryStore, SQLiteStore, StripedMemoryStore
+
+
+def session(regnum, started_at, power_kw):
+    return ChargingSession(regnum, started_at, power_kw, capacity_kwh=50.0)
+
+
+@pytest.fixture(params=["shared", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "shared":
+        store = SharedMemoryStore(capacity=64, stripes=4)
+    else:
+        store = SQLiteStore(str(tmp_path / "sessions.db"))
+    yield store
+    store.close()
+
+
+def test_matches_the_memory_store(store):
+    rng = random.Random(7)
+    reference = StripedMemoryStore(stripes=4)
+    regnums = [f"R{i}" for i in range(40)]
+    now = 0.0
+    for _ in range(3000):
+        now += rng.random() * 60
+        regnum = rng.choice(regnums)
+        if rng.random() < 0.6:
+            started = session(regnum, now, rng.choice([3.7, 7.4, 11.0, 22.0]))
+            store.start(started)
+            reference.start(session(regnum, now, started.power_kw))
+        else:
+            (got, got_stopped), (expected, stopped) = store.stop(regnum, now), reference.stop(regnum, now)
+            assert got_stopped == stopped
+            assert (got and (got.status, got.stopped_at)) == (expected and (expected.status, expected.stopped_at))
+        if rng.random() < 0.2:
+            assert store.completing_soonest(now, 5) == reference.completing_soonest(now, 5)
+    assert len(store) == len(reference)
+
+
+def test_restart_replaces_the_completion():
+    store = SharedMemoryStore(capacity=8, stripes=1)
+    try:
+        store.start(session("A", 0.0, 50.0))     # full after an hour
+        store.start(session("B", 0.0, 25.0))
+        store.start(session("A", 0.0, 10.0))      # restarted, five hours
+        assert store.completing_soonest(0.0, 5) == [("B", 7200.0), ("A", 18000.0)]
+        store.stop("B", 60.0)
+        assert store.completing_soonest(60.0, 5) == [("A", 18000.0)]
+        assert store.completing_soonest(18000.0, 5) == []
+    finally:
+        store.close()
+
+
+def test_completions_are_shared_across_processes():
+    store = SharedMemoryStore(capacity=64, stripes=4)
+    try:
+        context = multiprocessing.get_context("fork")
+        child = context.Process(target=store.start, args=(session("CHILD", 0.0, 50.0),))
+        child.start()
+        child.join()
+        store.start(session("PARENT", 0.0, 25.0))
+        assert store.completing_soonest(0.0, 5) == [("CHILD", 3600.0), ("PARENT", 7200.0)]
+    finally:
+        store.close()
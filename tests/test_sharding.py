@@ -0,0 +1,119 @@
+import pytest
+
+from domain.facility import Facility
+from domain.vehicle import Car
+from sharding.cluster import ShardCluster
+from sharding.ring import HashRing
+
+
+def car(regnum, color="Red"):
+    return Car(regnum, "Make", "Model", color)
+
+
+@pytest.fixture
+def cluster():
+    with ShardCluster(4, 2, 4, shards=2) as cluster:
+        yield cluster
+
+
+def test_ring_moves_only_the_new_nodes_keys():
+    ring = HashRing(["a", "b"])
+    keys = [f"key{i}" for i in range(1000)]
+    before = {key: ring.node_for(key) for key in keys}
+    ring.add("c")
+    moved = [key for key in keys if ring.node_for(key) != before[key]]
+    assert moved and all(ring.node_for(key) == "c" for key in moved)
+    assert ring.nodes_for("key0")[0] == ring.node_for("key0")
+    assert sorted(ring.nodes_for("key0")) == ["a", "b", "c"]
+
+
+def test_ring_bounded_skips_full_nodes():
+    ring = HashRing(["a", "b"])
+    first, second = ring.nodes_for("level:1")
+    assert ring.node_bounded("level:1", {first: 1, second: 1}, 3) == first
+    assert ring.node_bounded("level:1", {first: 1, second: 0}, 2) == second
+    with pytest.raises(LookupError):
+        ring.node_bounded("level:1", {first: 2, second: 2}, 3)
+
+
+def test_levels_are_spread_evenly(cluster):
+    lot = cluster.router()
+    try:
+        counts = {}
+        for shard in lot.owners.values():
+            counts[shard] = counts.get(shard, 0) + 1
+        assert sorted(counts.values()) == [2, 2]
+    finally:
+        lot.close()
+
+
+def test_add_shard_rebalances_and_keeps_vehicles(cluster):
+    lot = cluster.router()
+    for i in range(12):
+        lot.park(car(f"X{i}"))
+    before = sorted(lot.status(), key=lambda row: row[2].regnum)
+    lot.close()
+
+    name = cluster.add_shard()
+    lot = cluster.router()
+    try:
+        counts = {}
+        for shard in lot.owners.values():
+            counts[shard] = counts.get(shard, 0) + 1
+        assert counts[name] == 1 and max(counts.values()) == 2
+        after = sorted(lot.status(), key=lambda row: row[2].regnum)
+        assert [(s, l, v.regnum) for s, l, v in after] == [(s, l, v.regnum) for s, l, v in before]
+        for _, level, vehicle in after:
+            assert lot.get_level_by_reg(vehicle.regnum) == level
+    finally:
+        lot.close()
+
+
+def test_regnum_is_unique_across_routers(cluster):
+    first, second = cluster.router(), cluster.router()
+    try:
+        assert first.park(car("DUP")) is not None
+        with pytest.raises(ValueError):
+            second.park(car("DUP"), level=4)
+        level, slot = second.get_slot_by_reg("DUP")
+        assert second.leave(slot, level=level)
+        assert second.get_slot_by_reg("DUP") is None
+        assert second.park(car("DUP"), level=4) is not None
+    finally:
+        first.close()
+        second.close()
+
+
+def test_recreated_level_releases_its_vehicles(cluster):
+    lot = cluster.router()
+    try:
+        # pick a regnum whose home is not the shard holding level 1
+        regnum = next(f"X{i}" for i in range(100)
+                      if lot.ring.node_for(f"X{i}") != lot.owner_of(1))
+        assert lot.park(car(regnum), level=1) is not None
+        lot.create_lot(2, 1, 1)
+        assert lot.get_slot_by_reg(regnum) is None
+        assert lot.park(car(regnum), level=1) is not None
+    finally:
+        lot.close()
+
+
+def test_status_pages_match_a_facility(cluster):
+    lot = cluster.router()
+    facility = Facility(4, 2, 4)
+    try:
+        for i in range(14):
+            vehicle, ev, level = car(f"P{i}", "Red" if i % 2 else "Blue"), i % 5 == 0, i % 4 + 1
+            assert (lot.park(vehicle, ev, level) is None) == (facility.park(vehicle, ev, level) is None)
+        expected = [(slot, level, v.regnum) for slot, level, v in facility.status()]
+
+        rows, cursor = [], None
+        while True:
+            page, cursor = lot.status_page(3, cursor)
+            rows += page
+            if cursor is None:
+                break
+        assert [(slot, level, v.regnum) for slot, level, v in rows] == expected
+        assert sorted(lot.get_regs_by_color("Blue")) == sorted(facility.get_regs_by_color("Blue"))
+    finally:
+        lot.close()
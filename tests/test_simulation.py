@@ -0,0 +1,28 @@
+from domain.facility import Facility
+from factory.electric_vehicle_factory import ElectricVehicleFactory
+from factory.regular_vehicle_factory import RegularVehicleFactory
+from presenter.parking_presenter import ParkingPresenter
+from simulation.lot import LotSimulation
+from simulation.traffic import Arrival
+
+
+def simulation(arrivals, capacity=1, ev_capacity=1):
+    presenter = ParkingPresenter(Facility(capacity, ev_capacity, 1), RegularVehicleFactory(),
+                                 ElectricVehicleFactory(), None)
+    return LotSimulation(presenter, arrivals, queue_limit=10, patience=1000, charging=False)
+
+
+def test_a_refused_queued_arrival_does_not_hold_up_the_queue():
+    run = simulation([
+        Arrival(0, 100, regnum="FIRST"),
+        Arrival(1, 100, regnum="DUP"),              # queued: the lot is full
+        Arrival(2, 500, electric=True, regnum="DUP"),
+        Arrival(3, 100, regnum="NEXT"),             # queued behind DUP
+    ])
+    run.run()
+    # DUP is refused when FIRST leaves (it is parked on the EV pool), so
+    # NEXT takes the freed slot straight away
+    assert run.regular.errors == 1
+    assert run.regular.parked == 2
+    assert run.regular.reneged == 0
+    assert list(run.regular.waits) == [100 - 3]
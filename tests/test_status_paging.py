@@ -0,0 +1,75 @@
+import gc
+
+from domain.facility import Facility
+from domain.parking_lot import ParkingLot
+from domain.vehicle import Car, Motorcycle
+
+
+def regnums(rows):
+    return [vehicle.regnum for _, _, vehicle in rows]
+
+
+def all_pages(lot, limit, **filters):
+    rows, cursor = [], None
+    while True:
+        page, cursor = lot.status_page(limit, cursor, **filters)
+        assert len(page) <= limit
+        rows += page
+        if cursor is None:
+            return rows
+
+
+def populated():
+    facility = Facility(4, 2, 3)
+    for i in range(11):
+        vehicle = (Motorcycle if i % 3 == 0 else Car)(f"R{i}", "Make", "Model", "Red")
+        facility.park(vehicle, ev=i % 4 == 0, level=i % 3 + 1)
+    return facility
+
+
+def test_pages_cover_status_in_order():
+    facility = populated()
+    for limit in (1, 2, 5, 100):
+        assert all_pages(facility, limit) == facility.status()
+    assert regnums(all_pages(facility, 2, level=2)) == regnums(facility.levels[2].status())
+    assert all(isinstance(slot, str) for slot, _, _ in all_pages(facility, 2, ev=True))
+    bikes = [row for row in facility.status() if row[2].getType() == "Motorcycle"]
+    assert bikes and all_pages(facility, 3, vehicle_type="Motorcycle") == bikes
+
+
+def test_snapshot_hides_later_changes():
+    lot = ParkingLot(4, 1, 1)
+    for i in range(4):
+        lot.park(Car(f"S{i}", "Make", "Model", "Red"))
+    snapshot = lot.status_snapshot()
+    before = regnums(lot.status())
+
+    first, cursor = lot.status_page(2, snapshot=snapshot)
+    lot.leave(1)
+    lot.leave(4)
+    lot.park(Car("NEW", "Make", "Model", "Red"))
+    rest, _ = lot.status_page(10, cursor, snapshot=snapshot)
+    assert regnums(first + rest) == before
+    assert regnums(lot.status()) == ["NEW", "S1", "S2"]
+
+
+def test_copies_stop_once_the_snapshot_is_gone():
+    lot = ParkingLot(2, 0, 1)
+    lot.park(Car("A", "Make", "Model", "Red"))
+    snapshot = lot.status_snapshot()
+    lot.leave(1)
+    assert list(snapshot.overrides) == [(False, 0)]
+    del snapshot
+    gc.collect()
+    assert not lot._snapshots
+    lot.park(Car("B", "Make", "Model", "Red"))
+    assert regnums(lot.status()) == ["B"]
+
+
+def test_facility_snapshot_survives_a_replaced_level():
+    facility = populated()
+    snapshot = facility.status_snapshot()
+    before = regnums(facility.status())
+    facility.create_lot(1, 0, 2)
+    facility.park(Car("LATE", "Make", "Model", "Red"), level=1)
+    assert regnums(all_pages(facility, 3, snapshot=snapshot)) == before
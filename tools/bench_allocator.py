@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import random
+import time
+
+from domain.parking_lot import ParkingLot
+from domain.vehicle import Car
+
+
+class LinearScanParkingLot(ParkingLot):
+    # Reproduces the original allocator: scan from slot 0 on every park()
+    def get_empty_slot(self, ev=False):
+        slots = self.ev_slots if ev else self.slots
+        for i, slot in enumerate(slots):
+            if slot is None:
+                return i
+        return None
+
+    def park(self, vehicle, ev=False, level=None):
+        slot = self.get_empty_slot(ev)
+        if slot is None:
+            return None
+        slots = self.ev_slots if ev else self.slots
+        slots[slot] = vehicle
+        return slot + 1
+
+    def leave(self, slot_id, ev=False):
+        slots = self.ev_slots if ev else self.slots
+        index = slot_id - 1
+        if 0 <= index < len(slots) and slots[index] is not None:
+            slots[index] = None
+            return True
+        return False
+
+
+def run(lot_class, count, seed):
+    lot = lot_class(count, 0, 1)
+    # regnums are unique per lot, so every park needs its own vehicle
+    vehicles = [Car(f"BENCH{i}", "Make", "Model", "Grey") for i in range(count)]
+    order = list(range(1, count + 1))
+    random.Random(seed).shuffle(order)
+
+    start = time.perf_counter()
+    for vehicle in vehicles:
+        lot.park(vehicle)
+    # unpark in random order, then refill the holes
+    for slot in order:
+        lot.leave(slot)
+    for vehicle in vehicles:
+        lot.park(vehicle)
+    for slot in order:
+        lot.leave(slot)
+    elapsed = time.perf_counter() - start
+    return elapsed, 4 * count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Park/unpark allocator benchmark")
+    parser.add_argument("--vehicles", type=int, default=1_000_000)
+    parser.add_argument("--baseline-vehicles", type=int, default=20_000,
+                        help="lot size for the linear-scan baseline (it is quadratic)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    base_time, base_ops = run(LinearScanParkingLot, args.baseline_vehicles, args.seed)
+    print(f"linear scan : {args.baseline_vehicles:>9,} vehicles  {base_time:8.3f}s  "
+          f"{base_ops / base_time:12,.0f} ops/s")
+
+    heap_small, _ = run(ParkingLot, args.baseline_vehicles, args.seed)
+    print(f"heap        : {args.baseline_vehicles:>9,} vehicles  {heap_small:8.3f}s  "
+          f"{base_ops / heap_small:12,.0f} ops/s  ({base_time / heap_small:,.0f}x faster)")
+
+    heap_time, heap_ops = run(ParkingLot, args.vehicles, args.seed)
+    print(f"heap        : {args.vehicles:>9,} vehicles  {heap_time:8.3f}s  "
+          f"{heap_ops / heap_time:12,.0f} ops/s")
+
+    # the linear scan grows with the square of the lot size
+    projected = base_time * (args.vehicles / args.baseline_vehicles) ** 2
+    print(f"linear scan projected for {args.vehicles:,} vehicles: {projected:,.0f}s")
+
+
+if __name__ == "__main__":
+    main()
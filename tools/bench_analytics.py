@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+
+import numpy as np
+
+from analytics.occupancy import OccupancyAnalytics
+
+
+def measure(label, fn, repeat=5):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    print(f"  {label:<40} {(time.perf_counter() - start) / repeat * 1000:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Occupancy analytics queries over synthetic history")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--stays-per-day", type=int, default=20_000)
+    parser.add_argument("--levels", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    stays = args.days * args.stays_per_day
+    now = 1_700_000_000.0
+    since = now - args.days * 86400
+    arrived = np.sort(rng.uniform(since, now, stays))
+    left = arrived + rng.lognormal(8, 1, stays)
+    makes = [f"Make{i}" for i in range(20)]
+    colors = ["Red", "Blue", "White", "Black", "Grey"]
+
+    analytics = OccupancyAnalytics(clock=lambda: now, reserve=stays)
+    analytics.capacity = {level: (2000, 200) for level in range(1, args.levels + 1)}
+    start = time.perf_counter()
+    levels = rng.integers(1, args.levels + 1, stays)
+    ev = rng.random(stays) < 0.1
+    kinds = rng.integers(0, 2, stays)
+    make_codes = rng.integers(0, len(makes), stays)
+    color_codes = rng.integers(0, len(colors), stays)
+    for i in range(stays):
+        analytics.record_stay(arrived[i], left[i] if left[i] < now else None, int(levels[i]),
+                              bool(ev[i]), ("car", "motorcycle")[kinds[i]],
+                              colors[color_codes[i]], makes[make_codes[i]])
+    print(f"{stays:,} stays over {args.days} days, loaded in {time.perf_counter() - start:.1f} s")
+
+    measure("occupancy by level", lambda: analytics.occupancy("level"))
+    measure("occupancy by make", lambda: analytics.occupancy("make"))
+    measure("occupancy_rate", analytics.occupancy_rate)
+    measure("dwell p50/p90/p99, all", lambda: analytics.dwell_percentiles())
+    measure("dwell p50/p90/p99 by make", lambda: analytics.dwell_percentiles(by="make"))
+    measure("dwell, last 7 days", lambda: analytics.dwell_percentiles(since=now - 7 * 86400))
+    measure("hourly turnover, whole history", lambda: analytics.hourly_turnover(since, now))
+    measure("EV utilisation, whole history", lambda: analytics.ev_utilisation(since, now))
+
+
+if __name__ == "__main__":
+    main()
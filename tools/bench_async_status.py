@@ -0,0 +1,47 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+
+from services.async_charging_client import AsyncChargingServiceClient
+from services.charging_client import ChargingServiceClient
+from tools.charging_standin import start_standin
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs concurrent charge status polling")
+    parser.add_argument("--evs", type=int, default=5_000)
+    parser.add_argument("--latency-ms", type=float, default=20.0,
+                        help="service time the stand-in adds to every request")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--sequential-sample", type=int, default=100,
+                        help="EVs polled sequentially; the full run is extrapolated")
+    args = parser.parse_args()
+
+    server, base_url = start_standin(delay=args.latency_ms / 1000)
+    regnums = [f"EV{i:05d}" for i in range(args.evs)]
+    for regnum in regnums:
+        server.sessions[regnum] = {"status": "charging", "charge": 0}
+
+    sync_client = ChargingServiceClient(base_url)
+    start = time.perf_counter()
+    for regnum in regnums[:args.sequential_sample]:
+        sync_client.get_status(regnum)
+    per_call = (time.perf_counter() - start) / args.sequential_sample
+    print(f"sequential : {per_call * 1000:6.1f} ms/call -> {per_call * args.evs:7.2f}s "
+          f"for {args.evs:,} EVs (extrapolated)")
+
+    client = AsyncChargingServiceClient(base_url, max_concurrency=args.concurrency, timeout=30)
+    start = time.perf_counter()
+    statuses = client.run(client.status_many(regnums))
+    elapsed = time.perf_counter() - start
+    ok = sum(1 for status in statuses.values() if status is not None)
+    print(f"status_many: {elapsed:7.2f}s for {args.evs:,} EVs ({ok:,} ok, "
+          f"concurrency {args.concurrency}, ~{elapsed / (args.latency_ms / 1000):.0f} round trips)")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
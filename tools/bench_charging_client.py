@@ -0,0 +1,71 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+
+from services.charging_client import ChargingServiceClient
+from tools.charging_standin import start_standin
+
+
+class UrlopenChargingClient:
+    # The original transport: a fresh urlopen() (and TCP connection) per call
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def start_charging(self, regnum):
+        req = urllib.request.Request(
+            f"{self.base_url}/charge/start",
+            data=json.dumps({"regnum": regnum}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        urllib.request.urlopen(req).read()
+
+    def get_status(self, regnum):
+        try:
+            with urllib.request.urlopen(f"{self.base_url}/charge/status/{regnum}") as response:
+                return json.loads(response.read())
+        except urllib.error.URLError:
+            return None
+
+
+def run(client, requests):
+    regnums = [f"EV{i:05d}" for i in range(requests // 2)]
+    start = time.perf_counter()
+    for regnum in regnums:
+        client.start_charging(regnum)
+    for regnum in regnums:
+        client.get_status(regnum)
+    return 2 * len(regnums) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Charging client transport benchmark")
+    parser.add_argument("--requests", type=int, default=4_000)
+    parser.add_argument("--url", help="benchmark a running service instead of the stand-in")
+    args = parser.parse_args()
+
+    base_url = args.url
+    if base_url is None:
+        _, base_url = start_standin()
+
+    before = run(UrlopenChargingClient(base_url), args.requests)
+    print(f"urlopen per call : {before:10,.0f} req/s")
+
+    pooled = ChargingServiceClient(base_url)
+    after = run(pooled, args.requests)
+    print(f"pooled keep-alive: {after:10,.0f} req/s  ({after / before:.1f}x)")
+
+    for endpoint, stats in pooled.metrics.snapshot().items():
+        print(f"  {endpoint:<16} calls={stats['count']:<6} errors={stats['errors']:<3} "
+              f"mean={stats['mean_ms']:.2f}ms max={stats['max_ms']:.2f}ms")
+    pooled.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import random
+import time
+
+from domain.facility import Facility
+from domain.vehicle import Car
+
+
+class ScanFacility(Facility):
+    # Baseline: try levels nearest-first and probe each level's slot array
+    def find_level(self, ev=False, level=None):
+        start = self.level_numbers[0] if level is None else level
+        for candidate in sorted(self.level_numbers, key=lambda n: (abs(n - start), n)):
+            lot = self.levels[candidate]
+            slots = lot.ev_slots if ev else lot.slots
+            if any(slot is None for slot in slots):
+                return candidate
+        return None
+
+
+def run(facility_class, levels, capacity, seed):
+    facility = facility_class(capacity, 0, levels)
+    rng = random.Random(seed)
+    total = levels * capacity
+    vehicles = [Car(f"R{i}", "Make", "Model", "Grey") for i in range(total)]
+
+    start = time.perf_counter()
+    # morning fill: every arrival asks for a random level, gets the nearest one with space
+    parked = []
+    for vehicle in vehicles:
+        slot = facility.park(vehicle, level=rng.randint(1, levels))
+        parked.append((slot, facility.get_level_by_reg(vehicle.regnum)))
+    # churn on a full site: one leaves, another arrives
+    rng.shuffle(parked)
+    for (slot, level), vehicle in zip(parked, vehicles):
+        facility.leave(slot, level=level)
+        facility.park(Car(vehicle.regnum + "x", "Make", "Model", "Grey"),
+                      level=rng.randint(1, levels))
+    elapsed = time.perf_counter() - start
+    return elapsed, 3 * total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-level facility allocation benchmark")
+    parser.add_argument("--levels", type=int, default=50)
+    parser.add_argument("--capacity", type=int, default=2_000)
+    parser.add_argument("--baseline-levels", type=int, default=5,
+                        help="levels used for the scanning baseline")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for label, cls, levels in (
+        ("level scan  ", ScanFacility, args.baseline_levels),
+        ("level index ", Facility, args.baseline_levels),
+        ("level index ", Facility, args.levels),
+    ):
+        elapsed, ops = run(cls, levels, args.capacity, args.seed)
+        print(f"{label}: {levels:>3} levels x {args.capacity:,} slots  "
+              f"{elapsed:8.3f}s  {ops / elapsed:12,.0f} ops/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import shutil
+import tempfile
+import time
+
+from domain.facility import Facility
+from persistence.persistent_lot import PersistentLot
+from presenter.parking_presenter import ParkingPresenter
+from factory.regular_vehicle_factory import RegularVehicleFactory
+from factory.electric_vehicle_factory import ElectricVehicleFactory
+
+
+def new_lot(directory, levels, capacity, ev_capacity):
+    return PersistentLot(Facility(capacity, ev_capacity, levels), directory,
+                         snapshot_every=10**9)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot + journal recovery benchmark")
+    parser.add_argument("--vehicles", type=int, default=1_000_000)
+    parser.add_argument("--levels", type=int, default=10)
+    parser.add_argument("--tail", type=int, default=20_000,
+                        help="journal records written after the snapshot")
+    args = parser.parse_args()
+
+    capacity = args.vehicles // args.levels
+    ev_capacity = capacity // 10
+    directory = tempfile.mkdtemp(prefix="lot-recovery-")
+    try:
+        lot = new_lot(directory, args.levels, capacity, ev_capacity)
+        presenter = ParkingPresenter(lot, RegularVehicleFactory(), ElectricVehicleFactory(), None)
+
+        start = time.perf_counter()
+        results = presenter.park_many(
+            ("Car", f"REG{i:07d}", "Toyota", "Corolla", "Blue", i % 11 == 0)
+            for i in range(args.vehicles)
+        )
+        print(f"parked {sum(r.success for r in results):,} vehicles (journaled) "
+              f"in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        lot.snapshot()
+        print(f"snapshot written in {time.perf_counter() - start:.2f}s "
+              f"({os.path.getsize(lot.journal.snapshot_path) / 2**20:.1f} MiB)")
+
+        parked = [(r.slot, r.level) for r in results if r.success and r.slot]
+        presenter.leave_many(parked[:args.tail // 2])
+        presenter.park_many(
+            ("Car", f"NEW{i:07d}", "Tesla", "Model3", "Red") for i in range(args.tail // 2)
+        )
+        expected = len(lot.status())
+        lot.close(snapshot=False)
+
+        start = time.perf_counter()
+        recovered = new_lot(directory, args.levels, capacity, ev_capacity)
+        elapsed = time.perf_counter() - start
+        print(f"recovered {len(recovered.status()):,} vehicles (expected {expected:,}), "
+              f"replayed {recovered.replayed:,} journal records in {elapsed:.2f}s")
+        recovered.close(snapshot=False)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
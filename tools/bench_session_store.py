@@ -0,0 +1,103 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import multiprocessing
+import queue
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from services.charging_sessions import ChargingSessionEngine
+from services.session_store import SharedMemoryStore, SQLiteStore, StripedMemoryStore
+
+
+def worker(engine, ops, regnums, seed, errors):
+    # 40% status, 30% start, 30% stop, on regnums shared by all workers
+    rng = random.Random(seed)
+    try:
+        for _ in range(ops):
+            regnum = rng.choice(regnums)
+            roll = rng.random()
+            if roll < 0.4:
+                status = engine.status(regnum)
+                if status is not None and status["status"] not in ("charging", "complete", "stopped"):
+                    raise AssertionError(f"corrupt session {regnum}: {status}")
+            elif roll < 0.7:
+                engine.start(regnum, power_kw=rng.choice((3.7, 7.4, 22.0, 50.0)))
+            else:
+                engine.stop(regnum)
+    except Exception as e:
+        errors.put(repr(e))
+
+
+def run(make_store, workers, ops, regnums, processes):
+    store = make_store()
+    engine = ChargingSessionEngine(store=store)
+    for regnum in regnums[::2]:
+        engine.start(regnum)
+
+    if processes:
+        # fork, so children inherit the store (shared memory and locks included)
+        context = multiprocessing.get_context("fork")
+        errors = context.Queue()
+        runners = [context.Process(target=worker, args=(engine, ops, regnums, i, errors))
+                   for i in range(workers)]
+    else:
+        errors = queue.Queue()
+        runners = [threading.Thread(target=worker, args=(engine, ops, regnums, i, errors))
+                   for i in range(workers)]
+
+    start = time.perf_counter()
+    for runner in runners:
+        runner.start()
+    for runner in runners:
+        runner.join()
+    elapsed = time.perf_counter() - start
+
+    found = []
+    while not errors.empty():
+        found.append(errors.get())
+    soonest = engine.completing_soonest(5)
+    store.close()
+    return workers * ops / elapsed, found, soonest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent start/stop/status throughput per session store")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=20_000, help="operations per worker")
+    parser.add_argument("--regnums", type=int, default=10_000)
+    args = parser.parse_args()
+
+    regnums = [f"EV{i:06d}" for i in range(args.regnums)]
+    directory = tempfile.mkdtemp(prefix="session-store-")
+    counter = iter(range(10**6))
+    backends = [
+        ("memory (striped)", StripedMemoryStore, False),
+        ("sqlite", lambda: SQLiteStore(os.path.join(directory, f"{next(counter)}.db")), False),
+        ("sqlite", lambda: SQLiteStore(os.path.join(directory, f"{next(counter)}.db")), True),
+        ("shared memory", lambda: SharedMemoryStore(capacity=2 * args.regnums), False),
+        ("shared memory", lambda: SharedMemoryStore(capacity=2 * args.regnums), True),
+    ]
+    try:
+        print(f"{args.workers} workers x {args.ops:,} ops on {args.regnums:,} regnums "
+              f"(40% status / 30% start / 30% stop)")
+        for name, make_store, processes in backends:
+            if processes and "fork" not in multiprocessing.get_all_start_methods():
+                continue
+            throughput, errors, soonest = run(make_store, args.workers, args.ops, regnums, processes)
+            kind = "processes" if processes else "threads"
+            print(f"  {name:<17} {kind:<9} {throughput:12,.0f} ops/s  "
+                  f"errors={len(errors)}  soonest={soonest[0][0] if soonest else '-'}")
+            for error in errors[:3]:
+                print(f"    {error}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import multiprocessing
+import time
+
+from domain.facility import Facility
+from domain.vehicle import Car
+from sharding.cluster import ShardCluster
+from sharding.router import ShardedLot
+
+
+def churn(lot, client, batch, seconds):
+    # park a batch, then let it leave, until time is up; returns operations done
+    operations = 0
+    round_no = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        vehicles = [Car(f"C{client}-{round_no}-{i}", "Make", "Model", "Grey") for i in range(batch)]
+        round_no += 1
+        results = lot.park_many((vehicle, False, None) for vehicle in vehicles)
+        lot.leave_many((slot, False, level) for slot, level, error in results if error is None)
+        operations += 2 * batch
+    return operations
+
+
+def client(addresses, authkey, number, batch, seconds, start, done):
+    lot = ShardedLot(addresses, authkey)
+    start.wait()
+    done.put(churn(lot, number, batch, seconds))
+    lot.close()
+
+
+def run_sharded(shards, clients, args):
+    with ShardCluster(args.capacity, 0, args.levels, shards=shards) as cluster:
+        start = multiprocessing.Event()
+        done = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=client, args=(cluster.addresses, cluster.authkey, i,
+                                                         args.batch, args.seconds, start, done))
+            for i in range(clients)
+        ]
+        for process in processes:
+            process.start()
+        start.set()
+        operations = sum(done.get() for _ in processes)
+        for process in processes:
+            process.join()
+    return operations / args.seconds
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Throughput of the sharded lot by number of shards")
+    parser.add_argument("--shards", default=",".join(str(2 ** i) for i in range(cpus.bit_length())),
+                        help="comma-separated shard counts (default: powers of two up to the cores)")
+    parser.add_argument("--clients", type=int, help="client processes (default: one per shard)")
+    parser.add_argument("--levels", type=int, default=64)
+    parser.add_argument("--capacity", type=int, default=2_000, help="slots per level")
+    parser.add_argument("--batch", type=int, default=100, help="vehicles per park_many/leave_many")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{cpus} CPUs; {args.levels} levels of {args.capacity} slots; "
+          f"batches of {args.batch}; operations are parks plus leaves")
+    facility = Facility(args.capacity, 0, args.levels)
+    local = churn(facility, 0, args.batch, args.seconds) / args.seconds
+    print(f"in process       {local:12,.0f} ops/s")
+    base = None
+    for shards in (int(n) for n in args.shards.split(",")):
+        rate = run_sharded(shards, args.clients or shards, args)
+        base = base or rate
+        print(f"{shards:3d} shard(s)     {rate:12,.0f} ops/s  x{rate / base:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+import tracemalloc
+
+from domain.facility import Facility
+from factory.regular_vehicle_factory import RegularVehicleFactory
+
+
+def measure(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<34} {elapsed * 1000:9.1f} ms  peak {peak / 1024:10,.0f} KiB  rows {count:,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialized status() vs streamed/paged status")
+    parser.add_argument("--vehicles", type=int, default=500_000)
+    parser.add_argument("--levels", type=int, default=10)
+    parser.add_argument("--page", type=int, default=100)
+    args = parser.parse_args()
+
+    facility = Facility(args.vehicles // args.levels, 0, args.levels)
+    factory = RegularVehicleFactory()
+    facility.park_many(
+        (factory.create("car", f"REG{i:07d}", "Make", "Model", "Red"), False, None)
+        for i in range(args.vehicles)
+    )
+    print(f"{args.vehicles:,} vehicles on {args.levels} levels")
+
+    measure("status()", lambda: len(facility.status()))
+    measure("iter_status() streamed", lambda: sum(1 for _ in facility.iter_status()))
+    measure(f"status_page({args.page}), first page",
+            lambda: len(facility.status_page(args.page)[0]))
+
+    def page_through():
+        snapshot = facility.status_snapshot()
+        count, cursor = 0, None
+        while True:
+            rows, cursor = facility.status_page(1000, cursor, snapshot=snapshot)
+            count += len(rows)
+            if cursor is None:
+                return count
+
+    measure("all pages of 1000, with snapshot", page_through)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import signal
+import statistics
+import subprocess
+import time
+
+from domain.facility import Facility
+from domain.vehicle import Car
+
+SCENARIOS = {}  # name -> (function, {parameter: values})
+
+COLORS = ("Red", "Blue", "White", "Black", "Grey", "Green", "Silver", "Yellow")
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+QUICK = {"size": (1_000, 10_000), "concurrency": (1, 8)}
+
+SERVER = os.path.join(os.path.dirname(__file__), '..', 'services', 'charging_server.py')
+
+
+def scenario(name, **grid):
+    # fn(context, **params) -> (operations, seconds, extra dict or None);
+    # results are reported in operations per second, higher is better
+    def register(fn):
+        SCENARIOS[name] = (fn, grid)
+        return fn
+    return register
+
+
+def vehicles(count):
+    return [Car(f"REG{i:07d}", "Make", "Model", COLORS[i % len(COLORS)]) for i in range(count)]
+
+
+def filled_lot(size, fill):
+    # vehicle i ends up in slot i + 1
+    lot = Facility(size, 0, 1)
+    parked = vehicles(int(size * fill))
+    lot.park_many((vehicle, False, None) for vehicle in parked)
+    return lot, parked
+
+
+@scenario("park", size=SIZES, fill=(0.5, 0.9, 1.0))
+def bench_park(context, size, fill):
+    lot = Facility(size, 0, 1)
+    parked = vehicles(int(size * fill))
+    start = time.perf_counter()
+    for vehicle in parked:
+        lot.park(vehicle)
+    return len(parked), time.perf_counter() - start, None
+
+
+@scenario("churn", size=SIZES, fill=(0.5, 0.9))
+def bench_churn(context, size, fill):
+    # a random parked vehicle leaves and parks again, i.e. one leave + one park
+    lot, parked = filled_lot(size, fill)
+    slots = list(range(1, len(parked) + 1))
+    rng = random.Random(1)
+    picks = [rng.randrange(len(parked)) for _ in range(min(size, 100_000))]
+    start = time.perf_counter()
+    for i in picks:
+        lot.leave(slots[i], False, 1)
+        slots[i] = lot.park(parked[i])
+    return 2 * len(picks), time.perf_counter() - start, None
+
+
+@scenario("query", size=SIZES, mix=("lookup", "color", "page", "status", "mixed"))
+def bench_query(context, size, mix):
+    # lookup: get_slot_by_reg; color: get_regs_by_color; page: walk
+    # status_page(100); status: full status(); mixed: 80/15/5 lookup/page/color
+    lot, parked = filled_lot(size, 0.9)
+    rng = random.Random(1)
+    regnums = [v.regnum for v in parked]
+
+    def lookup():
+        lot.get_slot_by_reg(rng.choice(regnums))
+
+    def color():
+        lot.get_regs_by_color(rng.choice(COLORS))
+
+    cursor = None
+
+    def page():
+        nonlocal cursor
+        cursor = lot.status_page(100, cursor)[1]
+
+    def status():
+        lot.status()
+
+    if mix == "mixed":
+        calls = rng.choices((lookup, page, color), weights=(80, 15, 5), k=20_000)
+    else:
+        # roughly the same amount of work whatever the lot size
+        fn = {"lookup": lookup, "color": color, "page": page, "status": status}[mix]
+        scans = {"lookup": 0, "color": 1, "page": 0.01, "status": 1}[mix]
+        calls = [fn] * (100_000 if not scans else max(5, int(2_000_000 / (size * scans))))
+    start = time.perf_counter()
+    for call in calls:
+        call()
+    return len(calls), time.perf_counter() - start, None
+
+
+@scenario("charging", concurrency=(1, 8, 32, 128))
+def bench_charging(context, concurrency):
+    # start, status polls and stop against a local charging_server.py
+    from tools.load_charging_service import phase
+
+    client = context.charging_client(concurrency)
+    regnums = [f"EV{i:06d}" for i in range(1_000)]
+    rng = random.Random(1)
+
+    async def run():
+        latencies, operations, elapsed = [], 0, 0.0
+        for calls in (
+            (lambda r=r: client.start_charging(r) for r in regnums),
+            (lambda: client.get_status(rng.choice(regnums)) for _ in range(4_000)),
+            (lambda r=r: client.stop_charging(r) for r in regnums),
+        ):
+            phase_latencies, phase_elapsed, errors = await phase(calls, concurrency)
+            if errors:
+                raise RuntimeError(f"{errors} charging requests failed")
+            latencies += phase_latencies
+            operations += len(phase_latencies)
+            elapsed += phase_elapsed
+        return operations, elapsed, latencies
+
+    operations, elapsed, latencies = client.run(run())
+    latencies.sort()
+    return operations, elapsed, {
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+class Context:
+    # resources shared by the cases of one run; the charging server is only
+    # started if a charging case is selected. Clients live for one case, so
+    # its warm-up opens their connections and every timed run reuses them.
+    def __init__(self, args):
+        self.args = args
+        self.server = None
+        self.base_url = args.url
+        self.clients = {}   # concurrency -> client of the current case
+
+    def charging_client(self, concurrency):
+        from services.async_charging_client import AsyncChargingServiceClient
+        from tools.load_charging_service import free_port, wait_until_listening
+
+        client = self.clients.get(concurrency)
+        if client is not None:
+            return client
+        if self.base_url is None:
+            port = free_port()
+            self.server = subprocess.Popen([sys.executable, SERVER, "--port", str(port),
+                                            "--workers", str(self.args.workers)])
+            wait_until_listening(port)
+            self.base_url = f"http://127.0.0.1:{port}"
+        client = self.clients[concurrency] = AsyncChargingServiceClient(
+            self.base_url, max_concurrency=concurrency, timeout=30)
+        return client
+
+    def end_case(self):
+        for client in self.clients.values():
+            client.close()
+        self.clients.clear()
+
+    def close(self):
+        self.end_case()
+        if self.server is not None:
+            self.server.send_signal(signal.SIGTERM)
+            self.server.wait()
+
+
+def cases(selected, overrides):
+    for name, (fn, grid) in SCENARIOS.items():
+        if selected and name not in selected:
+            continue
+        names = list(grid)
+        values = [overrides.get(n, grid[n]) for n in names]
+        for combination in itertools.product(*values):
+            params = dict(zip(names, combination))
+            case = name + "[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]"
+            yield case, name, fn, params
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    overrides = {}
+    if args.quick:
+        overrides.update(QUICK)
+    if args.sizes:
+        overrides["size"] = [int(s) for s in args.sizes.split(",")]
+    if args.concurrency:
+        overrides["concurrency"] = [int(c) for c in args.concurrency.split(",")]
+    selected = set(args.scenario.split(",")) if args.scenario else None
+    if selected and selected - set(SCENARIOS):
+        raise SystemExit(f"unknown scenario(s): {', '.join(sorted(selected - set(SCENARIOS)))}")
+
+    results = {}
+    context = Context(args)
+    try:
+        for case, name, fn, params in cases(selected, overrides):
+            try:
+                fn(context, **params)  # warm-up, discarded
+                runs = []
+                for _ in range(args.repeat):
+                    # short cases are repeated until min_time of timed work adds up
+                    operations, seconds = 0, 0.0
+                    while seconds < args.min_time:
+                        case_operations, case_seconds, extra = fn(context, **params)
+                        operations += case_operations
+                        seconds += case_seconds
+                    runs.append(operations / seconds)
+            finally:
+                context.end_case()
+            results[case] = {
+                "scenario": name,
+                "params": params,
+                "unit": "ops/s",
+                "runs": runs,
+                "median": statistics.median(runs),
+                "stdev": statistics.stdev(runs) if len(runs) > 1 else 0.0,
+                "extra": extra,
+            }
+            detail = "".join(f"  {k} {v:.2f}" for k, v in (extra or {}).items())
+            print(f"  {case:<40} {results[case]['median']:>14,.0f} ops/s{detail}", flush=True)
+    finally:
+        context.close()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+def compare(args):
+    # a case regresses when its median drops by more than --threshold percent
+    # and every new run is slower than every old one
+    with open(args.baseline) as f:
+        old = json.load(f)
+    with open(args.current) as f:
+        new = json.load(f)
+    print(f"{args.baseline} ({old['meta'].get('commit')}) -> "
+          f"{args.current} ({new['meta'].get('commit')})")
+    regressions = 0
+    for case in sorted(set(old["results"]) | set(new["results"])):
+        before, after = old["results"].get(case), new["results"].get(case)
+        if before is None or after is None:
+            print(f"  {case:<40} {'only in ' + (args.current if before is None else args.baseline)}")
+            continue
+        change = (after["median"] - before["median"]) / before["median"] * 100
+        verdict = ""
+        if abs(change) > args.threshold:
+            if change < 0 and max(after["runs"]) < min(before["runs"]):
+                verdict = "REGRESSION"
+                regressions += 1
+            elif change > 0 and min(after["runs"]) > max(before["runs"]):
+                verdict = "faster"
+            else:
+                verdict = "noisy"
+        print(f"  {case:<40} {before['median']:>14,.0f} {after['median']:>14,.0f} "
+              f"{change:>+7.1f}%  {verdict}")
+    print(f"{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parking domain and charging service benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run scenarios and write results as JSON")
+    run_parser.add_argument("--scenario", help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    run_parser.add_argument("--sizes", help="lot sizes, e.g. 1000,100000")
+    run_parser.add_argument("--concurrency", help="charging concurrency levels, e.g. 1,32")
+    run_parser.add_argument("--quick", action="store_true", help="small sizes and concurrency only")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--min-time", type=float, default=0.5,
+                            help="seconds of timed work per run")
+    run_parser.add_argument("--url", help="charging service to use instead of starting one")
+    run_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="workers for the charging server started by the suite")
+    run_parser.add_argument("-o", "--output", default="bench_results.json")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=10.0,
+                                help="percent change below which differences are ignored")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import gc
+import tracemalloc
+
+from domain.parking_lot import ParkingLot
+from factory.electric_vehicle_factory import ElectricCar
+from domain.vehicle import Car
+
+
+class DictCar:
+    # The original dict-backed layout, for comparison
+    def __init__(self, regnum, make, model, color):
+        self.regnum = regnum
+        self.make = make
+        self.model = model
+        self.color = color
+
+    def getType(self):
+        return "Car"
+
+
+class DictElectricCar(DictCar):
+    def __init__(self, regnum, make, model, color):
+        DictCar.__init__(self, regnum, make, model, color)
+        self.charge = 0
+
+
+MAKES = [("Toyota", "Corolla"), ("Tesla", "Model3"), ("Nissan", "Leaf"), ("Ford", "Focus")]
+COLORS = ["Red", "Blue", "White", "Black", "Grey", "Silver"]
+
+
+def measure(car_class, ev_class, count):
+    gc.collect()
+    tracemalloc.start()
+    lot = ParkingLot(count, count // 10, 1)
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    for i in range(count):
+        make, model = MAKES[i % len(MAKES)]
+        # build the strings at runtime like input from the UI or a feed would be
+        color = "".join(COLORS[i % len(COLORS)])
+        ev = i % 10 == 0
+        cls = ev_class if ev else car_class
+        lot.park(cls(f"REG{i:07d}", "".join(make), "".join(model), color), ev=ev)
+
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return used
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory per parked vehicle")
+    parser.add_argument("--vehicles", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    before = measure(DictCar, DictElectricCar, args.vehicles)
+    after = measure(Car, ElectricCar, args.vehicles)
+    for label, used in (("dict-backed", before), ("__slots__  ", after)):
+        print(f"{label}: {used / 2**20:8.1f} MiB for {args.vehicles:,} parked vehicles "
+              f"({used / args.vehicles:6.1f} bytes/vehicle incl. slot and index entries)")
+    print(f"saved {(before - after) / 2**20:.1f} MiB ({1 - after / before:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Dependency-free stand-in for services/ev_charging_service.py, with the same
+# routes and responses, for benchmarks that should not need Flask installed.
+
+STATUS_ROUTE = re.compile(r"^/charge/status/([^/]+)$")
+
+
+class ChargingStandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive response stalls on Nagle + delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        match = STATUS_ROUTE.match(self.path)
+        if not match:
+            return self._send(404, {"error": "Not found"})
+        session = self.server.sessions.get(match.group(1))
+        if not session:
+            return self._send(404, {"error": "Vehicle not found"})
+        self._send(200, session)
+
+    def do_POST(self):
+        data = self._read_json()
+        if self.path.endswith(":batch"):
+            return self._batch(data.get("regnums") or [])
+        regnum = data.get("regnum")
+        if self.path == "/charge/start":
+            self.server.sessions[regnum] = {"status": "charging", "charge": 0}
+            return self._send(200, {"message": f"Charging started for {regnum}"})
+        if self.path == "/charge/stop":
+            if regnum not in self.server.sessions:
+                return self._send(404, {"error": "Vehicle not found"})
+            self.server.sessions[regnum]["status"] = "stopped"
+            return self._send(200, {"message": f"Charging stopped for {regnum}"})
+        self._send(404, {"error": "Not found"})
+
+    def _batch(self, regnums):
+        sessions = self.server.sessions
+        results = []
+        for regnum in regnums:
+            if self.path == "/charge/start:batch":
+                sessions[regnum] = {"status": "charging", "charge": 0}
+                results.append({"regnum": regnum, "message": f"Charging started for {regnum}"})
+            elif self.path == "/charge/stop:batch":
+                if regnum not in sessions:
+                    results.append({"regnum": regnum, "error": "Vehicle not found"})
+                    continue
+                sessions[regnum]["status"] = "stopped"
+                results.append({"regnum": regnum, "message": f"Charging stopped for {regnum}"})
+            elif regnum in sessions:
+                results.append({"regnum": regnum, "session": sessions[regnum]})
+            else:
+                results.append({"regnum": regnum, "error": "Vehicle not found"})
+        self._send(200, {"results": results})
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # fan-out benchmarks open hundreds of connections at once
+    request_queue_size = 1024
+
+
+def start_standin(port=0, delay=0.0):
+    # Serves on a background thread; returns (server, base_url).
+    # delay adds a fixed service time per request to mimic a remote service.
+    server = StandInServer(("127.0.0.1", port), ChargingStandInHandler)
+    server.sessions = {}
+    server.delay = delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,119 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import random
+import signal
+import socket
+import subprocess
+import time
+
+from services.async_charging_client import AsyncChargingServiceClient
+
+SERVER = os.path.join(os.path.dirname(__file__), '..', 'services', 'charging_server.py')
+
+
+async def phase(calls, concurrency):
+    # closed loop: `concurrency` callers each send their next request as soon
+    # as the previous one answers, so latencies exclude client-side queueing
+    calls = iter(calls)
+    latencies = []
+    errors = 0
+
+    async def caller():
+        nonlocal errors
+        for call in calls:
+            start = time.perf_counter()
+            result = await call()
+            latencies.append(time.perf_counter() - start)
+            if result is None or result is False:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start, errors
+
+
+def report(route, latencies, elapsed, errors):
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"  {route:<24} {len(latencies):>7,} req  {len(latencies) / elapsed:9,.0f} req/s  "
+          f"p50 {p50:7.2f}ms  p99 {p99:7.2f}ms  errors {errors}")
+
+
+async def load(client, concurrency, evs, polls, batches, batch_size):
+    regnums = [f"EV{i:06d}" for i in range(evs)]
+    rng = random.Random(1)
+    report("POST /charge/start", *await phase(
+        (lambda r=r: client.start_charging(r) for r in regnums), concurrency
+    ))
+    report("GET /charge/status", *await phase(
+        (lambda: client.get_status(rng.choice(regnums)) for _ in range(polls)), concurrency
+    ))
+    report("POST /charge/status:batch", *await phase(
+        (lambda: client.status_batch(rng.sample(regnums, batch_size)) for _ in range(batches)),
+        concurrency,
+    ))
+    report("POST /charge/stop", *await phase(
+        (lambda r=r: client.stop_charging(r) for r in regnums), concurrency
+    ))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_listening(port, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f"charging server did not start on port {port}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the charging service")
+    parser.add_argument("--url", help="load a running service instead of starting one")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="workers for the server started by this tool")
+    parser.add_argument("--concurrency", type=int, default=1000,
+                        help="requests (and connections) in flight at once")
+    parser.add_argument("--evs", type=int, default=5_000)
+    parser.add_argument("--polls", type=int, default=20_000)
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        port = free_port()
+        server = subprocess.Popen([sys.executable, SERVER, "--port", str(port),
+                                   "--workers", str(args.workers)])
+        wait_until_listening(port)
+        base_url = f"http://127.0.0.1:{port}"
+
+    client = AsyncChargingServiceClient(base_url, max_concurrency=args.concurrency, timeout=30)
+    print(f"{base_url}, {args.concurrency} concurrent requests")
+    try:
+        client.run(load(client, args.concurrency, args.evs, args.polls, args.batches,
+                        min(args.batch_size, args.evs)))
+    finally:
+        client.close()
+        if server is not None:
+            start = time.perf_counter()
+            server.send_signal(signal.SIGTERM)
+            code = server.wait()
+            print(f"server stopped gracefully in {time.perf_counter() - start:.2f}s (exit {code})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import time
+
+from domain.facility import Facility
+from factory.electric_vehicle_factory import ElectricVehicleFactory
+from factory.regular_vehicle_factory import RegularVehicleFactory
+from presenter.parking_presenter import ParkingPresenter
+from services.charging_sessions import ChargingSessionEngine
+from services.power_scheduler import POLICIES, make_scheduler
+from simulation.engine import Simulator
+from simulation.lot import LocalChargingClient, LotSimulation
+from simulation.traffic import SyntheticTraffic, read_arrivals
+
+
+def print_report(report, wall):
+    print(f"{report['simulated_days']:.1f} simulated days, {report['events']:,} events "
+          f"in {wall:.1f} s ({report['events'] / wall:,.0f} events/s)")
+    for name in ("regular", "ev"):
+        pool = report[name]
+        if not pool["capacity"]:
+            continue
+        print(f"\n{name} slots: {pool['capacity']:,}")
+        print(f"  arrivals {pool['arrivals']:,}, parked {pool['parked']:,}, rejected {pool['rejected']:,} "
+              f"({pool['rejection_rate']:.2%}: {pool['balked']:,} queue full, "
+              f"{pool['reneged']:,} gave up, {pool['errors']:,} refused)")
+        print(f"  occupancy mean {pool['mean_occupancy']:,.0f} ({pool['occupancy_rate']:.1%}), "
+              f"peak {pool['peak_occupancy']:,}, full {pool['full_share']:.2%} of the time")
+        print(f"  queue mean {pool['mean_queue']:.2f}, peak {pool['peak_queue']:,}; "
+              f"{pool['queued_share']:.2%} of parked vehicles queued first, waiting "
+              f"mean {pool['mean_wait'] / 60:.1f} min, p95 {pool['p95_wait'] / 60:.1f} min, "
+              f"max {pool['max_wait'] / 60:.1f} min")
+    charging = report["charging"]
+    if charging["sessions"]:
+        print(f"\ncharging: {charging['sessions']:,} sessions, mean charge on leaving "
+              f"{charging['mean_final_charge']:.1f}%, {charging['fully_charged']:,} full")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Discrete-event simulation of a facility through the real presenter and domain code")
+    parser.add_argument("--slots", type=int, default=10_000, help="regular slots in total")
+    parser.add_argument("--ev-slots", type=int, default=1_000, help="EV slots in total")
+    parser.add_argument("--levels", type=int, default=10)
+    parser.add_argument("--days", type=float, default=365.0)
+    parser.add_argument("--warmup-days", type=float, default=1.0, help="excluded from the statistics")
+    parser.add_argument("--arrivals-per-day", type=float, default=25_000.0, help="on weekdays")
+    parser.add_argument("--dwell-hours", type=float, default=6.0, help="mean time parked")
+    parser.add_argument("--dwell-sigma", type=float, default=0.8, help="log-normal shape of dwell times")
+    parser.add_argument("--ev-share", type=float, default=0.1)
+    parser.add_argument("--queue", type=int, default=50, help="vehicles that may wait for each pool")
+    parser.add_argument("--patience-minutes", type=float, default=10.0)
+    parser.add_argument("--site-kw", type=float, help="share this much charging power (default: none)")
+    parser.add_argument("--policy", default="fair", choices=list(POLICIES))
+    parser.add_argument("--no-charging", action="store_true")
+    parser.add_argument("--recorded", help="CSV of recorded arrivals instead of synthetic traffic")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the report here")
+    args = parser.parse_args()
+
+    sim = Simulator()
+    engine = ChargingSessionEngine(
+        clock=sim.clock,
+        scheduler=make_scheduler(args.policy, args.site_kw, sim.clock) if args.site_kw else None,
+    )
+    lot = Facility(args.slots // args.levels, args.ev_slots // args.levels, args.levels)
+    lot.reservations.clock = sim.clock
+    presenter = ParkingPresenter(lot, RegularVehicleFactory(), ElectricVehicleFactory(),
+                                 LocalChargingClient(engine))
+
+    if args.recorded:
+        arrivals = read_arrivals(args.recorded)
+    else:
+        traffic = SyntheticTraffic(args.arrivals_per_day, args.dwell_hours, args.dwell_sigma,
+                                   args.ev_share, seed=args.seed)
+        arrivals = traffic.arrivals(0.0, args.days * 86400)
+    simulation = LotSimulation(presenter, arrivals, sim, queue_limit=args.queue,
+                               patience=args.patience_minutes * 60, charging=not args.no_charging,
+                               warmup=args.warmup_days * 86400)
+
+    start = time.perf_counter()
+    simulation.run(args.days * 86400)
+    wall = time.perf_counter() - start
+    report = simulation.report()
+    print_report(report, wall)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import heapq
+import random
+import time
+
+from services.power_scheduler import POLICIES, make_scheduler
+
+RATINGS_KW = (3.7, 7.4, 11.0, 22.0, 50.0)
+TIER_WEIGHTS = (0.1, 0.3, 0.6)  # share of sessions in tiers 0 (served first), 1, 2
+
+
+def sessions(args):
+    # (arrival, departure, regnum, rating kW, kWh to full, tier), arrivals at
+    # a Poisson rate that keeps about --active vehicles plugged in
+    rng = random.Random(args.seed)
+    mean_dwell = args.dwell_hours * 3600
+    rate = args.active / mean_dwell
+    t, i, horizon = 0.0, 0, args.days * 86400
+    while True:
+        t += rng.expovariate(rate)
+        if t >= horizon:
+            return
+        capacity = rng.uniform(40, 100)
+        need = capacity * (1 - rng.uniform(0.1, 0.6))
+        tier = rng.choices(range(len(TIER_WEIGHTS)), TIER_WEIGHTS)[0]
+        yield t, t + rng.expovariate(1 / mean_dwell), f"EV{i:07d}", rng.choice(RATINGS_KW), need, tier
+        i += 1
+
+
+def simulate(policy, args):
+    scheduler = make_scheduler(policy, args.budget)
+    events = []     # (time, order, regnum, session or None for a departure)
+    order = 0
+    for session in sessions(args):
+        heapq.heappush(events, (session[0], order, session[2], session))
+        heapq.heappush(events, (session[1], order, session[2], None))
+        order += 1
+
+    latencies, needs = [], {}
+    full = delivered = unmet = peak = 0.0
+    unmet_by_tier = [0.0] * len(TIER_WEIGHTS)
+    while events:
+        now, _, regnum, session = heapq.heappop(events)
+        start = time.perf_counter()
+        if session is not None:
+            _, departure, _, rating, need, tier = session
+            scheduler.start(regnum, rating, need, departure, tier, now=now)
+            needs[regnum] = (need, tier)
+        else:
+            energy = scheduler.stop(regnum, now=now)
+        latencies.append(time.perf_counter() - start)
+        if scheduler.allocated_kw > args.budget + 1e-6:
+            raise AssertionError(f"{policy}: {scheduler.allocated_kw} kW allocated at t={now}")
+        peak = max(peak, scheduler.allocated_kw)
+        if session is None:
+            need, tier = needs.pop(regnum)
+            delivered += energy
+            unmet_by_tier[tier] += need - energy
+            unmet += need - energy
+            full += energy >= need - 1e-9
+
+    latencies.sort()
+    count = len(latencies) // 2
+    print(f"  {policy:<9} {count:>8,} {delivered / 1000:>10,.1f} {full / count * 100:>8.1f}% "
+          + " ".join(f"{u / 1000:>9,.1f}" for u in unmet_by_tier)
+          + f" {peak:>8,.0f} {latencies[len(latencies) // 2] * 1e6:>8.0f} "
+          f"{latencies[int(len(latencies) * 0.99)] * 1e6:>8.0f} {latencies[-1] * 1e3:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay synthetic charging sessions through each power policy")
+    parser.add_argument("--budget", type=float, default=2000.0, help="site power budget, kW")
+    parser.add_argument("--active", type=int, default=2000, help="vehicles plugged in on average")
+    parser.add_argument("--dwell-hours", type=float, default=4.0, help="mean time plugged in")
+    parser.add_argument("--days", type=float, default=1.0)
+    parser.add_argument("--policies", default=",".join(POLICIES))
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.budget:,.0f} kW for ~{args.active:,} plugged-in vehicles over {args.days:g} day(s)")
+    print(f"  {'policy':<9} {'sessions':>8} {'MWh':>10} {'full':>9} "
+          + " ".join(f"{'unmet t' + str(t):>9}" for t in range(len(TIER_WEIGHTS)))
+          + f" {'peak kW':>8} {'p50 us':>8} {'p99 us':>8} {'max ms':>8}")
+    for policy in args.policies.split(","):
+        simulate(policy, args)
+
+
+if __name__ == "__main__":
+    main()
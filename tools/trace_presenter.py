@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+
+from domain.facility import Facility
+from factory.electric_vehicle_factory import ElectricVehicleFactory
+from factory.regular_vehicle_factory import RegularVehicleFactory
+from monitoring import tracing
+from monitoring.profiling import capture
+from presenter.parking_presenter import ParkingPresenter
+from services.charging_client import ChargingServiceClient
+from tools.charging_standin import start_standin
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Where park_vehicle spends its time")
+    parser.add_argument("--vehicles", type=int, default=50_000)
+    parser.add_argument("--levels", type=int, default=5)
+    parser.add_argument("--ev-every", type=int, default=10,
+                        help="every n-th vehicle is an EV and gets a charging status call")
+    parser.add_argument("--folded", default="park_vehicle.folded",
+                        help="span stacks, for flamegraph.pl or speedscope")
+    parser.add_argument("--profile", help="also profile into this file (.prof for cProfile)")
+    parser.add_argument("--service", help="charging service URL (default: an in-process stand-in, "
+                                          "so the trace is not dominated by connection retries)")
+    args = parser.parse_args()
+
+    base_url = args.service
+    if base_url is None:
+        server, base_url = start_standin()
+        if args.ev_every:
+            for i in range(0, args.vehicles, args.ev_every):
+                server.sessions[f"REG{i:07d}"] = {"status": "charging", "charge": 0}
+
+    presenter = ParkingPresenter(
+        Facility(args.vehicles // args.levels + 1, args.vehicles // args.levels + 1, args.levels),
+        RegularVehicleFactory(),
+        ElectricVehicleFactory(),
+        ChargingServiceClient(base_url),
+    )
+    tracer = tracing.enable()
+    with capture(args.profile) if args.profile else tracer.span("run"):
+        for i in range(args.vehicles):
+            regnum = f"REG{i:07d}"
+            if args.ev_every and i % args.ev_every == 0:
+                presenter.park_vehicle(presenter.electric_factory, "car", regnum, "Make", "Model", "Red")
+                presenter.get_charge_status(regnum)
+            else:
+                presenter.park_vehicle(presenter.regular_factory, "car", regnum, "Make", "Model", "Red")
+    tracing.disable()
+
+    print(f"{'operation':<48} {'calls':>8} {'errors':>6} {'mean ms':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for operation, stats in sorted(tracer.stats().items()):
+        print(f"{operation:<48} {stats['calls']:>8,} {stats['errors']:>6} {stats['mean_ms']:>9.4f} "
+              f"{stats['p50_ms']:>8.3f} {stats['p99_ms']:>8.3f}")
+    tracer.write_folded(args.folded)
+    print(f"span stacks written to {args.folded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ import tkinter as tk
 from tkinter import messagebox
 from factory.regular_vehicle_factory import RegularVehicleFactory
 from factory.electric_vehicle_factory import ElectricVehicleFactory
+from ui.background import BackgroundWorker
+from ui.status_view import StatusView
 
 
 class ParkingUI:
@@ -15,6 +17,18 @@ class ParkingUI:
         self.root.geometry("800x850")
         self.root.resizable(False, False)
 
+        # Presenter calls never run on the Tk thread. Charging calls go to a
+        # pool; domain calls go to a single thread so they stay serialized.
+        self._busy = {}
+        self.network = BackgroundWorker(
+            root, max_workers=4, on_busy=lambda labels: self._set_busy("network", labels)
+        )
+        self.domain = BackgroundWorker(
+            root, max_workers=1, on_busy=lambda labels: self._set_busy("domain", labels)
+        )
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.status_view = None
+
         self._build_ui()
 
     def _build_ui(self):
@@ -102,6 +116,9 @@ class ParkingUI:
         tk.Label(self.root, text="Slot Number").grid(row=18, column=0)
         self.remove_slot = tk.StringVar()
         tk.Entry(self.root, textvariable=self.remove_slot).grid(row=18, column=1)
+        tk.Label(self.root, text="Level").grid(row=18, column=2)
+        self.remove_level = tk.StringVar(value=self.level.get())
+        tk.Entry(self.root, textvariable=self.remove_level, width=10).grid(row=18, column=3)
         
         tk.Button(
             self.root,
@@ -154,6 +171,39 @@ class ParkingUI:
         self.output = tk.Text(self.root, width=90, height=15)
         self.output.grid(row=30, column=0, columnspan=2, pady=5)
 
+        self.busy_text = tk.StringVar()
+        tk.Label(self.root, textvariable=self.busy_text, fg="gray").grid(row=31, column=0, columnspan=2)
+        self.cancel_button = tk.Button(
+            self.root, text="Cancel", command=self.cancel_pending, state=tk.DISABLED
+        )
+        self.cancel_button.grid(row=31, column=2)
+
+    # Background work
+
+    def _set_busy(self, lane, labels):
+        self._busy[lane] = labels
+        labels = [label for lane_labels in self._busy.values() for label in lane_labels]
+        if labels:
+            self.busy_text.set(f"Working: {', '.join(labels)}")
+            self.cancel_button.config(state=tk.NORMAL)
+        else:
+            self.busy_text.set("")
+            self.cancel_button.config(state=tk.DISABLED)
+
+    def cancel_pending(self):
+        self.network.cancel_all()
+        self.domain.cancel_all()
+
+    def close(self):
+        self.network.shutdown()
+        # let a running domain call finish so the lot is not closed mid-write
+        self.domain.shutdown(wait=True)
+        self.root.destroy()
+
+    @staticmethod
+    def _show_error(error):
+        messagebox.showerror("Error", str(error))
+
     def create_parking_lot(self):
         try:
             capacity = int(self.capacity.get())
@@ -163,11 +213,16 @@ class ParkingUI:
             if capacity <= 0 or ev_capacity < 0 or level <= 0:
                 messagebox.showerror("Error", "Capacity and Level must be positive numbers")
                 return
-            
-            self.presenter.create_lot(capacity, ev_capacity, level)
-            messagebox.showinfo("Success", f"Parking lot created:\n- Regular Slots: {capacity}\n- EV Slots: {ev_capacity}\n- Level: {level}")
         except ValueError:
             messagebox.showerror("Error", "Please enter valid numbers for capacity and level")
+            return
+
+        self.domain.submit(
+            self.presenter.create_lot, capacity, ev_capacity, level,
+            on_done=lambda _: messagebox.showinfo("Success", f"Parking lot created:\n- Regular Slots: {capacity}\n- EV Slots: {ev_capacity}\n- Level: {level}"),
+            on_error=self._show_error,
+            label="create lot",
+        )
 
     def park_vehicle(self):
         factory = (
@@ -182,34 +237,41 @@ class ParkingUI:
             park_level_val = self.park_level.get()
             if park_level_val:
                 level = int(park_level_val)
-
-            result = self.presenter.park_vehicle(
-                factory,
-                self.vehicle_category.get(),
-                self.reg.get(),
-                self.make.get(),
-                self.model.get(),
-                self.color.get(),
-                level
-            )
         except ValueError as e:
             messagebox.showerror("Error", str(e))
             return
 
+        self.domain.submit(
+            self.presenter.park_vehicle,
+            factory,
+            self.vehicle_category.get(),
+            self.reg.get(),
+            self.make.get(),
+            self.model.get(),
+            self.color.get(),
+            level,
+            on_done=self._parked,
+            on_error=self._show_error,
+            label="park",
+        )
+
+    def _parked(self, result):
         if result.success:
-            messagebox.showinfo("Success", f"Vehicle parked at slot {result.slot}")
+            messagebox.showinfo("Success", f"Vehicle parked at slot {result.slot} on level {result.level}")
         else:
             messagebox.showerror("Error", result.message)
 
     def show_status(self):
-        self.output.delete("1.0", tk.END)
-        self.output.insert(
-            tk.END,
-            "Slot\tLevel\tType\tRegNo\tColor\tMake\tModel\n"
+        # the status window keeps itself up to date, so it is opened only once
+        if self.status_view is not None:
+            self.status_view.lift()
+            return
+        self.status_view = StatusView(
+            self.root, self.presenter, self.domain, on_close=self._status_closed
         )
-        for slot, lvl, vehicle in self.presenter.get_status():
-            line = f"{slot}\t{lvl}\t{vehicle.getType()}\t{vehicle.regnum}\t{vehicle.color}\t{vehicle.make}\t{vehicle.model}"
-            self.output.insert(tk.END, line + "\n")
+
+    def _status_closed(self):
+        self.status_view = None
 
     def remove_vehicle(self):
         try:
@@ -217,88 +279,135 @@ class ParkingUI:
             if slot_number <= 0:
                 messagebox.showerror("Error", "Slot number must be positive")
                 return
-            
-            success = self.presenter.remove_vehicle(slot_number)
+            level = int(self.remove_level.get()) if self.remove_level.get() else None
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid slot number")
+            return
+
+        def removed(success):
             if success:
                 messagebox.showinfo("Success", f"Vehicle removed from slot {slot_number}")
-                self.show_status()
             else:
                 messagebox.showerror("Error", "Slot is empty or invalid")
-        except ValueError:
-            messagebox.showerror("Error", "Please enter a valid slot number")
+
+        self.domain.submit(
+            self.presenter.remove_vehicle, slot_number, level,
+            on_done=removed, on_error=self._show_error, label="remove",
+        )
 
     def get_slots_by_color(self):
         color = self.query_color.get()
         if not color:
             messagebox.showerror("Error", "Please enter a color")
             return
-        
-        slots = self.presenter.get_slots_by_color(color)
-        self.output.delete("1.0", tk.END)
-        if slots:
-            self.output.insert(tk.END, f"Slots with {color} vehicles:\n")
-            for slot in slots:
-                self.output.insert(tk.END, f"  Slot {slot}\n")
-        else:
-            self.output.insert(tk.END, f"No vehicles found with color: {color}")
+
+        def render(slots):
+            self.output.delete("1.0", tk.END)
+            if slots:
+                self.output.insert(tk.END, f"Slots with {color} vehicles:\n")
+                for slot in slots:
+                    self.output.insert(tk.END, f"  {self._format_slot(slot)}\n")
+            else:
+                self.output.insert(tk.END, f"No vehicles found with color: {color}")
+
+        self.domain.submit(
+            self.presenter.get_slots_by_color, color,
+            on_done=render, on_error=self._show_error, label="query",
+        )
 
     def get_regs_by_color(self):
         color = self.query_color.get()
         if not color:
             messagebox.showerror("Error", "Please enter a color")
             return
-        
-        regs = self.presenter.get_regs_by_color(color)
-        self.output.delete("1.0", tk.END)
-        if regs:
-            self.output.insert(tk.END, f"Registration numbers with {color} vehicles:\n")
-            for reg in regs:
-                self.output.insert(tk.END, f"  {reg}\n")
-        else:
-            self.output.insert(tk.END, f"No vehicles found with color: {color}")
+
+        def render(regs):
+            self.output.delete("1.0", tk.END)
+            if regs:
+                self.output.insert(tk.END, f"Registration numbers with {color} vehicles:\n")
+                for reg in regs:
+                    self.output.insert(tk.END, f"  {reg}\n")
+            else:
+                self.output.insert(tk.END, f"No vehicles found with color: {color}")
+
+        self.domain.submit(
+            self.presenter.get_regs_by_color, color,
+            on_done=render, on_error=self._show_error, label="query",
+        )
 
     def get_slot_by_reg(self):
         regnum = self.query_reg.get()
         if not regnum:
             messagebox.showerror("Error", "Please enter a registration number")
             return
-        
-        slot = self.presenter.get_slot_by_reg(regnum)
-        self.output.delete("1.0", tk.END)
-        if slot is not None:
-            self.output.insert(tk.END, f"Vehicle Registration: {regnum}\nParked at Slot: {slot}")
-        else:
-            self.output.insert(tk.END, f"Vehicle with registration {regnum} not found")
+
+        def render(slot):
+            self.output.delete("1.0", tk.END)
+            if slot is not None:
+                self.output.insert(tk.END, f"Vehicle Registration: {regnum}\nParked at {self._format_slot(slot)}")
+            else:
+                self.output.insert(tk.END, f"Vehicle with registration {regnum} not found")
+
+        self.domain.submit(
+            self.presenter.get_slot_by_reg, regnum,
+            on_done=render, on_error=self._show_error, label="query",
+        )
+
+    @staticmethod
+    def _format_slot(slot):
+        # a Facility reports (level, slot) pairs, a single ParkingLot bare slots
+        if isinstance(slot, tuple):
+            level, slot = slot
+            return f"Level {level}, Slot {slot}"
+        return f"Slot {slot}"
 
     def start_charging(self):
         reg = self.charge_reg.get()
         if not reg:
             messagebox.showerror("Error", "Please enter registration number")
             return
-        ok = self.presenter.start_charging(reg)
-        if ok:
-            messagebox.showinfo("Charging", f"Started charging for {reg}")
-        else:
-            messagebox.showerror("Error", "Failed to start charging")
+
+        def done(ok):
+            if ok:
+                messagebox.showinfo("Charging", f"Started charging for {reg}")
+            else:
+                messagebox.showerror("Error", "Failed to start charging")
+
+        self.network.submit(
+            self.presenter.start_charging, reg,
+            on_done=done, on_error=self._show_error, label=f"start charging {reg}",
+        )
 
     def stop_charging(self):
         reg = self.charge_reg.get()
         if not reg:
             messagebox.showerror("Error", "Please enter registration number")
             return
-        ok = self.presenter.stop_charging(reg)
-        if ok:
-            messagebox.showinfo("Charging", f"Stopped charging for {reg}")
-        else:
-            messagebox.showerror("Error", "Failed to stop charging")
+
+        def done(ok):
+            if ok:
+                messagebox.showinfo("Charging", f"Stopped charging for {reg}")
+            else:
+                messagebox.showerror("Error", "Failed to stop charging")
+
+        self.network.submit(
+            self.presenter.stop_charging, reg,
+            on_done=done, on_error=self._show_error, label=f"stop charging {reg}",
+        )
 
     def check_charge_status(self):
         reg = self.charge_reg.get()
         if not reg:
             messagebox.showerror("Error", "Please enter registration number")
             return
-        status = self.presenter.get_charge_status(reg)
-        if status is None:
-            messagebox.showerror("Charging", "Charging service unavailable or vehicle not found")
-            return
-        messagebox.showinfo("Charging Status", str(status))
\ No newline at end of file
+
+        def done(status):
+            if status is None:
+                messagebox.showerror("Charging", "Charging service unavailable or vehicle not found")
+                return
+            messagebox.showinfo("Charging Status", str(status))
+
+        self.network.submit(
+            self.presenter.get_charge_status, reg,
+            on_done=done, on_error=self._show_error, label=f"charge status {reg}",
+        )
@@ -0,0 +1,110 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Task:
+    """Handle for work submitted to a BackgroundWorker."""
+
+    def __init__(self, label):
+        self.label = label
+        self.cancelled = False
+        self.future = None
+
+    def cancel(self):
+        # a call that is already running cannot be interrupted; its result is
+        # simply never delivered
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class BackgroundWorker:
+    """Runs blocking calls on a thread pool and hands results back to Tk.
+
+    Worker threads never touch widgets: finished calls are put on a queue
+    that the Tk main loop drains every poll_ms via root.after, and callbacks
+    run there. on_busy(labels) is called on the Tk thread whenever the set of
+    in-flight tasks changes.
+    """
+
+    def __init__(self, root, max_workers=4, poll_ms=50, on_busy=None, name="ui-worker"):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_busy = on_busy
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._results = queue.Queue()
+        self._in_flight = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, fn, *args, on_done=None, on_error=None, label=None):
+        # must be called from the Tk thread; callbacks run there too
+        task = Task(label or getattr(fn, "__name__", "task"))
+        with self._lock:
+            self._in_flight.append(task)
+        task.future = self._executor.submit(self._call, task, fn, args, on_done, on_error)
+        self._notify_busy()
+        return task
+
+    def _call(self, task, fn, args, on_done, on_error):
+        if task.cancelled:
+            # cancelled after the pool picked it up: report back with no
+            # callback, so _poll still drops it from the in-flight list
+            self._results.put((task, None, None))
+            return
+        try:
+            result = fn(*args)
+        except Exception as e:
+            self._results.put((task, on_error, e))
+        else:
+            self._results.put((task, on_done, result))
+
+    def _poll(self):
+        changed = False
+        while True:
+            try:
+                task, callback, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            changed |= self._finish(task)
+            if not task.cancelled and callback is not None:
+                callback(value)
+        # tasks cancelled before they started never report back
+        with self._lock:
+            pending = [t for t in self._in_flight if not (t.cancelled and t.future.cancelled())]
+            changed |= len(pending) != len(self._in_flight)
+            self._in_flight = pending
+        if changed:
+            self._notify_busy()
+        if not self._closed:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def _finish(self, task):
+        with self._lock:
+            if task in self._in_flight:
+                self._in_flight.remove(task)
+                return True
+        return False
+
+    def _notify_busy(self):
+        if self.on_busy is not None:
+            with self._lock:
+                labels = [t.label for t in self._in_flight if not t.cancelled]
+            self.on_busy(labels)
+
+    def in_flight(self):
+        with self._lock:
+            return [t for t in self._in_flight if not t.cancelled]
+
+    def cancel_all(self):
+        for task in self.in_flight():
+            task.cancel()
+        self._notify_busy()
+
+    def shutdown(self, wait=False):
+        self._closed = True
+        self.root.after_cancel(self._poll_id)
+        self.cancel_all()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,251 @@
+import tkinter as tk
+from bisect import bisect_left, insort
+from tkinter import ttk
+
+from domain.events import VehicleLeft, VehicleParked
+
+
+class StatusView:
+    """Lot status in a window that only renders the rows currently visible.
+
+    The full status is read once; after that the view applies the lot's
+    change events, re-reading only if its event queue overflowed. Rows are
+    kept in memory sorted under the current sort column and filter, and the
+    Treeview holds just VISIBLE_ROWS items whose values are swapped as the
+    user scrolls, so the widget cost does not grow with the number of
+    parked vehicles.
+    """
+
+    COLUMNS = ("slot", "level", "type", "regnum", "color", "make", "model")
+    HEADINGS = ("Slot", "Level", "Type", "RegNo", "Color", "Make", "Model")
+    TYPES = ("All", "Car", "Motorcycle", "EV")
+    VISIBLE_ROWS = 25
+
+    def __init__(self, root, presenter, domain_worker, poll_ms=100, on_close=None):
+        self.root = root
+        self.presenter = presenter
+        self.domain = domain_worker
+        self.poll_ms = poll_ms
+        self.on_close = on_close
+
+        self.rows = {}      # (level, slot) -> column values
+        self.order = []     # sorted (sort key, (level, slot)) of rows passing the filter
+        self.offset = 0
+        self.sort_column = "level"
+        self.sort_reverse = False
+        self.filter = (None, "All", "")
+        self._shown = [None] * self.VISIBLE_ROWS
+        # filled by whichever thread changes the lot, drained on the Tk thread
+        self.subscription = None
+        self.closed = False
+
+        self._build()
+        self._poll_id = self.window.after(self.poll_ms, self._poll)
+        self._watch()
+
+    def _build(self):
+        self.window = tk.Toplevel(self.root)
+        self.window.title("Lot Status")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        filters = tk.Frame(self.window)
+        filters.pack(fill=tk.X, padx=5, pady=5)
+        tk.Label(filters, text="Level").pack(side=tk.LEFT)
+        self.level_filter = tk.StringVar()
+        tk.Entry(filters, textvariable=self.level_filter, width=6).pack(side=tk.LEFT)
+        tk.Label(filters, text="Type").pack(side=tk.LEFT)
+        self.type_filter = tk.StringVar(value="All")
+        ttk.Combobox(
+            filters, textvariable=self.type_filter, values=self.TYPES, width=11, state="readonly"
+        ).pack(side=tk.LEFT)
+        tk.Label(filters, text="Color").pack(side=tk.LEFT)
+        self.color_filter = tk.StringVar()
+        tk.Entry(filters, textvariable=self.color_filter, width=10).pack(side=tk.LEFT)
+        tk.Button(filters, text="Apply", command=self.apply_filter).pack(side=tk.LEFT, padx=5)
+        self.count_text = tk.StringVar()
+        tk.Label(filters, textvariable=self.count_text).pack(side=tk.RIGHT)
+
+        table = tk.Frame(self.window)
+        table.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(
+            table, columns=self.COLUMNS, show="headings", height=self.VISIBLE_ROWS
+        )
+        for column, heading in zip(self.COLUMNS, self.HEADINGS):
+            self.tree.heading(column, text=heading, command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=90)
+        for i in range(self.VISIBLE_ROWS):
+            self.tree.insert("", tk.END, iid=str(i))
+            self.tree.detach(str(i))
+        self.scrollbar = ttk.Scrollbar(table, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_to(self.offset - e.delta // 40))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_to(self.offset - 3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_to(self.offset + 3))
+
+    def lift(self):
+        self.window.lift()
+
+    def close(self):
+        self.closed = True
+        self.window.after_cancel(self._poll_id)
+        if self.subscription is not None:
+            self.subscription.close()
+        self.window.destroy()
+        if self.on_close is not None:
+            self.on_close()
+
+    # Model
+
+    def _watch(self):
+        # runs on the domain lane, so no change can slip between subscribing
+        # and reading the status
+        self.domain.submit(self.presenter.watch_status, on_done=self._load, label="status")
+
+    def _load(self, watched):
+        subscription, status = watched
+        if self.closed:
+            subscription.close()
+            return
+        self.subscription = subscription
+        self.rows = {(level, slot): self._values(slot, level, vehicle) for slot, level, vehicle in status}
+        self._reorder()
+
+    @staticmethod
+    def _values(slot, level, vehicle):
+        return (slot, level, vehicle.getType(), vehicle.regnum, vehicle.color,
+                vehicle.make, vehicle.model)
+
+    def _sort_key(self, values):
+        slot, level = values[0], values[1]
+        # regular slots are ints, EV slots "EV-n"; regular first
+        slot_key = (1, int(slot[3:])) if isinstance(slot, str) else (0, slot)
+        column = self.COLUMNS.index(self.sort_column)
+        if column == 0:
+            primary = slot_key
+        elif column == 1:
+            primary = level
+        else:
+            primary = str(values[column]).lower()
+        return (primary, level, slot_key)
+
+    def _matches(self, values):
+        level, vehicle_type, color = self.filter
+        if level is not None and values[1] != level:
+            return False
+        if vehicle_type == "EV":
+            if not isinstance(values[0], str):
+                return False
+        elif vehicle_type != "All" and values[2] != vehicle_type:
+            return False
+        return not color or str(values[4]).lower() == color
+
+    def _reorder(self):
+        # sort/filter change: reorders the in-memory rows, not the widget
+        self.order = sorted(
+            (self._sort_key(values), key)
+            for key, values in self.rows.items() if self._matches(values)
+        )
+        self.scroll_to(0 if self.offset >= len(self.order) else self.offset, force=True)
+
+    def _apply(self, event):
+        # returns True when the whole order has to be rebuilt
+        key = (event.level, getattr(event, "slot", None))
+        if isinstance(event, VehicleParked):
+            values = self._values(event.slot, event.level, event.vehicle)
+            self.rows[key] = values
+            if self._matches(values):
+                insort(self.order, (self._sort_key(values), key))
+        elif isinstance(event, VehicleLeft):
+            values = self.rows.pop(key, None)
+            if values is not None and self._matches(values):
+                entry = (self._sort_key(values), key)
+                i = bisect_left(self.order, entry)
+                if i < len(self.order) and self.order[i] == entry:
+                    del self.order[i]
+        else:
+            # LotResized: the level's rows are gone
+            self.rows = {key: values for key, values in self.rows.items()
+                         if event.level is not None and key[0] != event.level}
+            return True
+        return False
+
+    def _poll(self):
+        subscription = self.subscription
+        if subscription is not None:
+            if subscription.dropped:
+                # fell behind the lot; start over from a fresh status
+                subscription.close()
+                self.subscription = None
+                self._watch()
+            else:
+                events = subscription.drain()
+                if events:
+                    reorder = False
+                    for event in events:
+                        reorder |= self._apply(event)
+                    if reorder:
+                        self._reorder()
+                    else:
+                        self.scroll_to(self.offset, force=True)
+        self._poll_id = self.window.after(self.poll_ms, self._poll)
+
+    # Sorting and filtering
+
+    def sort_by(self, column):
+        if column == self.sort_column:
+            self.sort_reverse = not self.sort_reverse
+            self.scroll_to(self.offset, force=True)
+            return
+        self.sort_column = column
+        self.sort_reverse = False
+        self._reorder()
+
+    def apply_filter(self):
+        level = self.level_filter.get().strip()
+        try:
+            level = int(level) if level else None
+        except ValueError:
+            level = None
+        self.filter = (level, self.type_filter.get(), self.color_filter.get().strip().lower())
+        self._reorder()
+
+    # Rendering; only the VISIBLE_ROWS items are ever touched
+
+    def _row(self, position):
+        if self.sort_reverse:
+            position = len(self.order) - 1 - position
+        return self.rows[self.order[position][1]]
+
+    def scroll_to(self, offset, force=False):
+        total = len(self.order)
+        offset = max(0, min(offset, total - self.VISIBLE_ROWS))
+        if offset == self.offset and not force:
+            return
+        self.offset = offset
+        for i in range(self.VISIBLE_ROWS):
+            position = offset + i
+            values = self._row(position) if position < total else None
+            if values == self._shown[i]:
+                continue
+            iid = str(i)
+            if values is None:
+                self.tree.detach(iid)
+            else:
+                self.tree.item(iid, values=values)
+                if self._shown[i] is None:
+                    self.tree.move(iid, "", i)
+            self._shown[i] = values
+        if total:
+            self.scrollbar.set(offset / total, min(1.0, (offset + self.VISIBLE_ROWS) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self.count_text.set(f"{total:,} of {len(self.rows):,} vehicles")
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.order)))
+        elif unit == "pages":
+            self.scroll_to(self.offset + int(amount) * self.VISIBLE_ROWS)
+        else:
+            self.scroll_to(self.offset + int(amount))